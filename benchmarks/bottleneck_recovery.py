@@ -0,0 +1,217 @@
+"""Bottleneck recovery benchmark: does BottleneckDetector find the bottlenecks the generator injected, and how fast?
+
+For each scale named in benchmarks/workloads.py, synthetic_data_generator.py builds a dataset along with its
+manifest of injected delays. The detector runs on that dataset with its rule-based fallback, as with
+main.py --no_ai, and its findings are scored against the manifest:
+
+* stage precision/recall/F1: flagged stages vs manifest stages whose injected delay averages at least
+  --min_magnitude hours;
+* per-bottleneck recall: the share of each injected bottleneck's stages that were flagged;
+* edge R-precision: among the k handoff edges with the longest mean wait (k = number of true edges), the
+  share that carry an injected queue wait.
+
+Accuracy and the detector's median runtime are appended to a JSON history. With --check, the exit status
+is 1 when precision or recall drops, or the runtime slows by more than --max_regression, compared with the
+previous run at the same scale, seed and --min_magnitude. A detector speed-up therefore has to keep its
+accuracy.
+
+Usage: python benchmarks/bottleneck_recovery.py [--scales small medium large] [--seed 42] [--repeat 3]
+           [--min_magnitude 24] [--history benchmarks/recovery_history.json] [--check] [--no_record]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.pipeline_suite import _MIN_COMPARABLE_S, _git_commit, _load_history  # noqa: E402
+from benchmarks.workloads import SCALES, Scale, build_workload  # noqa: E402
+from mvp.bottleneck_detector import BottleneckDetector  # noqa: E402
+from mvp.data_loader import load_dataset  # noqa: E402
+from mvp.llm_utils import set_force_openai_fallback  # noqa: E402
+from mvp.run_store import RunStore  # noqa: E402
+from synthetic_data_generator import BOTTLENECKS, write_dataset  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY = ROOT / "benchmarks" / "recovery_history.json"
+# Accuracy metrics compared between runs; any drop counts as a regression.
+_ACCURACY_KEYS = ("precision", "recall")
+
+Edge = Tuple[str, str]
+
+
+def _ground_truth(manifest: pd.DataFrame, min_magnitude: float) -> Tuple[Dict[str, Set[str]], Set[Edge]]:
+    """
+    Stages per bottleneck, and queue-wait edges, whose injected delay averages at least `min_magnitude` hours.
+    Misallocation shows up as service time at the wrong owner, so it contributes a stage but no edge.
+    """
+    stages: Dict[str, Set[str]] = {name: set() for name in BOTTLENECKS}
+    per_stage = manifest.groupby(["bottleneck", "stage"])[["count", "total_hours"]].sum()
+    for (name, stage), row in per_stage.iterrows():
+        if row["total_hours"] / row["count"] >= min_magnitude:
+            stages[name].add(stage)
+
+    queues = manifest[manifest["bottleneck"] != "misallocation"]
+    per_edge = queues.groupby(["from_stage", "to_stage"])[["count", "total_hours"]].sum()
+    edges = {edge for edge, row in per_edge.iterrows() if row["total_hours"] / row["count"] >= min_magnitude}
+    return stages, edges
+
+
+def _score(
+    truth_stages: Dict[str, Set[str]], truth_edges: Set[Edge], found: Set[str], edges: List[Dict[str, object]]
+) -> Dict[str, object]:
+    truth = set().union(*truth_stages.values())
+    hits = len(found & truth)
+    precision = hits / len(found) if found else 0.0
+    recall = hits / len(truth) if truth else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    ranked = sorted(edges, key=lambda edge: edge.get("mean_wait_hours", 0.0), reverse=True)
+    top = {(str(edge["from"]), str(edge["to"])) for edge in ranked[: len(truth_edges)]}
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "edge_r_precision": round(len(top & truth_edges) / len(truth_edges), 4) if truth_edges else None,
+        "by_bottleneck": {
+            name: round(len(stages & found) / len(stages), 4) if stages else None
+            for name, stages in truth_stages.items()
+        },
+        "true_stages": len(truth),
+        "flagged_stages": len(found),
+        "true_edges": len(truth_edges),
+    }
+
+
+def _evaluate(scale: Scale, seed: int, repeat: int, min_magnitude: float) -> Dict[str, object]:
+    frames = build_workload(scale, seed=seed)
+    truth_stages, truth_edges = _ground_truth(frames["manifest"], min_magnitude)
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        write_dataset(frames, work_dir / "data")
+        dataset = load_dataset(work_dir / "data")
+        store = RunStore(work_dir / "agent_runs.db")
+        samples: List[float] = []
+        for _ in range(repeat):
+            detector = BottleneckDetector(
+                dataset.events, dataset.employees, store, "recovery", reports_dir=work_dir, defer_image=True
+            )
+            started = time.perf_counter()
+            result = detector.run()
+            samples.append(time.perf_counter() - started)
+
+    found = {bottleneck.stage for bottleneck in result["bottlenecks"]}
+    scores = _score(truth_stages, truth_edges, found, result["process_graph"].get("edges", []))
+    return {
+        "tasks": len(frames["tasks"]),
+        "events": len(frames["events"]),
+        "median_s": round(statistics.median(samples), 6),
+        "repeat": repeat,
+        **scores,
+    }
+
+
+def _previous_result(
+    history: List[Dict[str, object]], scale_key: str, seed: int, min_magnitude: float
+) -> Dict[str, object]:
+    """The latest result scored the same way: a different --min_magnitude changes the ground truth."""
+    for entry in reversed(history):
+        if (
+            entry.get("scale_key") == scale_key
+            and entry.get("seed") == seed
+            and entry.get("min_magnitude") == min_magnitude
+        ):
+            return entry.get("result", {})  # type: ignore[return-value]
+    return {}
+
+
+def _compare(result: Dict[str, object], previous: Dict[str, object], max_regression: float) -> List[str]:
+    """Human-readable regressions against the previous run: any accuracy drop or a runtime over the limit."""
+    regressions = []
+    for key in _ACCURACY_KEYS:
+        before = previous.get(key)
+        if before is not None and result[key] < before:
+            regressions.append(f"{key} fell from {before:.3f} to {result[key]:.3f}")
+    before = previous.get("median_s")
+    if before and before >= _MIN_COMPARABLE_S and result["median_s"] > before * max_regression:
+        regressions.append(f"detector is {result['median_s'] / before:.2f}x slower")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=["small", "medium", "large"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--min_magnitude", type=float, default=24.0, help="Mean injected hours for a stage or edge to count."
+    )
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--max_regression", type=float, default=1.25, help="Allowed median slowdown ratio.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when a regression is found.")
+    parser.add_argument("--no_record", action="store_true", help="Compare against the history without appending.")
+    args = parser.parse_args()
+
+    set_force_openai_fallback(True)
+    history = _load_history(args.history)
+    regressions_found = False
+    for scale_name in args.scales:
+        scale = SCALES[scale_name]
+        result = _evaluate(scale, args.seed, args.repeat, args.min_magnitude)
+        edge_score = "n/a" if result["edge_r_precision"] is None else f"{result['edge_r_precision']:.3f}"
+        print(
+            f"\n{scale_name} ({scale.key}): {result['tasks']} tasks, {result['events']} events, "
+            f"detector median {result['median_s']:.3f}s"
+        )
+        print(
+            f"  stages  precision {result['precision']:.3f}  recall {result['recall']:.3f}  f1 {result['f1']:.3f}  "
+            f"({result['flagged_stages']} flagged, {result['true_stages']} injected)"
+        )
+        print(f"  edges   R-precision {edge_score}  ({result['true_edges']} injected)")
+        for name, recall in result["by_bottleneck"].items():
+            print(f"  {name:<24} recall {'n/a' if recall is None else f'{recall:.3f}'}")
+
+        previous = _previous_result(history, scale.key, args.seed, args.min_magnitude)
+        regressions = _compare(result, previous, args.max_regression)
+        for message in regressions:
+            print(f"[WARN] {scale_name}: {message} since the previous recorded run.")
+        regressions_found = regressions_found or bool(regressions)
+        history.append(
+            {
+                "id": str(uuid.uuid4()),
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "machine": platform.machine(),
+                "scale": scale_name,
+                "scale_key": scale.key,
+                "seed": args.seed,
+                "min_magnitude": args.min_magnitude,
+                "result": result,
+            }
+        )
+
+    if not args.no_record:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        args.history.write_text(json.dumps({"runs": history}, indent=2))
+        print(f"\n[INFO] Results appended to {args.history}")
+    if args.check and regressions_found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
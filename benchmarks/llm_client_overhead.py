@@ -0,0 +1,122 @@
+"""Per-call overhead of a fresh OpenAI client vs. the pooled client registry.
+
+Runs against a local stand-in chat-completions server so only client construction,
+connection setup, and request plumbing are measured (no model latency, no network).
+
+Usage: python benchmarks/llm_client_overhead.py [--calls 200] [--concurrency 16]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from openai import OpenAI  # noqa: E402
+
+from mvp import llm_utils  # noqa: E402
+
+_COMPLETION = json.dumps(
+    {
+        "id": "bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stand-in",
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": '{"ok": true}'}, "finish_reason": "stop"}
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+).encode("utf-8")
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(_COMPLETION)))
+        self.end_headers()
+        self.wfile.write(_COMPLETION)
+
+
+def _start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _time_calls(fn, calls: int) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summarize(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p90 = ordered[int(len(ordered) * 0.9) - 1]
+    print(f"{label:<28} mean={statistics.mean(timings):7.3f}ms  median={statistics.median(timings):7.3f}ms  p90={p90:7.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    server = _start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    llm_utils.configure_response_cache(Path("unused"), mode="off")
+    request = llm_utils._completion_request("stand-in", "system", "user", 0.2)
+
+    def fresh_client_call() -> None:
+        client = OpenAI(api_key="bench", base_url=base_url)
+        client.chat.completions.create(**request)
+        client.close()
+
+    def pooled_call() -> None:
+        llm_utils.call_openai_json("system", "user", model="stand-in")
+
+    pooled_call()  # warm the pool so the first connection is not billed to the loop
+    _summarize("fresh client per call", _time_calls(fresh_client_call, args.calls))
+    _summarize("pooled client", _time_calls(pooled_call, args.calls))
+
+    async def fan_out() -> float:
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one() -> None:
+            async with semaphore:
+                await llm_utils.acall_openai_json("system", "user", model="stand-in")
+
+        await asyncio.gather(*(one() for _ in range(args.calls)))
+        return (time.perf_counter() - start) * 1000
+
+    elapsed = asyncio.run(fan_out())
+    print(f"{'async pooled (concurrent)':<28} {args.calls} calls in {elapsed:.1f}ms ({elapsed / args.calls:.3f}ms/call amortized)")
+
+    llm_utils.close_openai_clients()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
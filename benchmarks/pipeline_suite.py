@@ -0,0 +1,223 @@
+"""Pipeline benchmark suite: each agent in isolation and the full orchestrator, at synthetic scales.
+
+Every AI call takes its deterministic fallback (as with main.py --no_ai), so timings measure this repo's
+code rather than the network. Workloads are synthetic_data_generator datasets at the scales named in
+benchmarks/workloads.py, cached per scale and seed under benchmarks/.workloads/. Each run is appended to a JSON history; a benchmark whose median
+exceeds the previous run at the same scale by more than --max_regression is reported, and --check
+turns that into a non-zero exit for CI.
+
+Usage: python benchmarks/pipeline_suite.py [--scales small medium] [--repeat 3] [--only allocation]
+           [--history benchmarks/history.json] [--max_regression 1.25] [--check] [--no_record]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.workloads import SCALES, Scale, build_workload, write_workload  # noqa: E402
+from mvp import data_loader  # noqa: E402
+from mvp.ai_opportunity import AIOpportunityScout  # noqa: E402
+from mvp.bottleneck_detector import BottleneckDetector  # noqa: E402
+from mvp.data_loader import Dataset, load_dataset  # noqa: E402
+from mvp.llm_utils import set_force_openai_fallback  # noqa: E402
+from mvp.orchestrator import Orchestrator  # noqa: E402
+from mvp.resource_allocation import ResourceAllocationAgent  # noqa: E402
+from mvp.run_store import RunStore  # noqa: E402
+from mvp.workflow_recommender import WorkflowRecommender  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKLOAD_CACHE = ROOT / "benchmarks" / ".workloads"
+DEFAULT_HISTORY = ROOT / "benchmarks" / "history.json"
+# Benchmarks faster than this are too noisy to flag as regressions.
+_MIN_COMPARABLE_S = 0.005
+
+Benchmark = Callable[[], object]
+
+
+def _workload_dir(scale: Scale, seed: int) -> Path:
+    """Generate the scale's CSVs once; later runs reuse them."""
+    target = WORKLOAD_CACHE / f"{scale.key}-s{seed}"
+    if not (target / "events.csv").exists():
+        started = time.perf_counter()
+        write_workload(build_workload(scale, seed=seed), target)
+        print(f"[INFO] Generated {scale.key} workload in {time.perf_counter() - started:.1f}s at {target}")
+    return target
+
+
+def _cold_load(data_dir: Path) -> Dataset:
+    # Drop frames parsed by earlier repetitions so each one measures a real load.
+    data_loader._FRAME_CACHE.clear()
+    return load_dataset(data_dir)
+
+
+def _benchmarks(
+    data_dir: Path, dataset: Dataset, work_dir: Path, only: Optional[List[str]] = None
+) -> Dict[str, Benchmark]:
+    """Name -> zero-argument callable; the agents get fresh instances so no state carries between repeats."""
+    store = RunStore(work_dir / "agent_runs.db")
+    run_id = "benchmark"
+
+    def allocator() -> ResourceAllocationAgent:
+        return ResourceAllocationAgent(
+            dataset.employees, dataset.availability, store, run_id, employee_ids=dataset.ids.employees
+        )
+
+    def scout() -> AIOpportunityScout:
+        return AIOpportunityScout(dataset.tasks, store, run_id, employees=dataset.employees)
+
+    def detector() -> BottleneckDetector:
+        return BottleneckDetector(
+            dataset.events, dataset.employees, store, run_id, reports_dir=work_dir, defer_image=True
+        )
+
+    def detector_with_image() -> Optional[str]:
+        agent = detector()
+        agent.run()
+        return agent.render_pending_image()
+
+    def selected(name: str) -> bool:
+        return not only or name.startswith(tuple(only))
+
+    benchmarks: Dict[str, Benchmark] = {
+        "load_dataset": lambda: _cold_load(data_dir),
+        "allocation._heuristic_assign": lambda: allocator()._heuristic_assign(dataset.tasks),
+        "allocation.run": lambda: allocator().run(dataset.tasks),
+        "ai_scout.run": lambda: scout().run(),
+        "bottlenecks._compute_metrics": lambda: detector()._compute_metrics(),
+        "bottlenecks.run": lambda: detector().run(),
+        "bottlenecks.run+image": detector_with_image,
+    }
+    if selected("recommend.run"):
+        # The recommender consumes the other agents' results; compute them once, outside the timings.
+        assignments = allocator().run(dataset.tasks)["assignments"]
+        suggestions = scout().run()
+        bottlenecks = detector().run()["bottlenecks"]
+        benchmarks["recommend.run"] = lambda: WorkflowRecommender(
+            assignments, suggestions, bottlenecks, store, run_id
+        ).run()
+    if selected("orchestrator.run"):
+        orchestrator = Orchestrator(data_dir, work_dir / "reports")
+        benchmarks["orchestrator.run"] = lambda: orchestrator.run()
+    return {name: run for name, run in benchmarks.items() if selected(name)}
+
+
+def _time(benchmark: Benchmark, repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        benchmark()
+        samples.append(time.perf_counter() - started)
+    return {
+        "median_s": round(statistics.median(samples), 6),
+        "min_s": round(min(samples), 6),
+        "max_s": round(max(samples), 6),
+        "repeat": repeat,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load_history(path: Path) -> List[Dict[str, object]]:
+    if not path.exists():
+        return []
+    return json.loads(path.read_text()).get("runs", [])
+
+
+def _previous_results(history: List[Dict[str, object]], scale_key: str) -> Dict[str, Dict[str, float]]:
+    for entry in reversed(history):
+        if entry.get("scale_key") == scale_key:
+            return entry.get("results", {})  # type: ignore[return-value]
+    return {}
+
+
+def _compare(
+    results: Dict[str, Dict[str, float]], previous: Dict[str, Dict[str, float]], max_regression: float
+) -> List[Tuple[str, float]]:
+    """(benchmark, slowdown ratio) for every benchmark slower than the previous run by more than the limit."""
+    regressions = []
+    for name, timing in results.items():
+        before = previous.get(name, {}).get("median_s")
+        if before and before >= _MIN_COMPARABLE_S and timing["median_s"] > before * max_regression:
+            regressions.append((name, timing["median_s"] / before))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=["small"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs="+", default=None, help="Run benchmarks whose name starts with any of these.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--max_regression", type=float, default=1.25, help="Allowed median slowdown ratio.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when a regression is found.")
+    parser.add_argument("--no_record", action="store_true", help="Compare against the history without appending.")
+    args = parser.parse_args()
+
+    set_force_openai_fallback(True)
+    history = _load_history(args.history)
+    regressions_found = False
+    for scale_name in args.scales:
+        scale = SCALES[scale_name]
+        data_dir = _workload_dir(scale, args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = load_dataset(data_dir)
+            benchmarks = _benchmarks(data_dir, dataset, Path(tmp), args.only)
+            print(f"\n{scale_name} ({scale.key}): {len(dataset.tasks)} tasks, {len(dataset.events)} events")
+            results = {}
+            for name, benchmark in benchmarks.items():
+                results[name] = _time(benchmark, args.repeat)
+                print(f"  {name:<32} median {results[name]['median_s']:9.3f}s  min {results[name]['min_s']:9.3f}s")
+
+        regressions = _compare(results, _previous_results(history, scale.key), args.max_regression)
+        for name, ratio in regressions:
+            print(f"[WARN] {scale_name}: {name} is {ratio:.2f}x slower than the previous recorded run.")
+        regressions_found = regressions_found or bool(regressions)
+        history.append(
+            {
+                "id": str(uuid.uuid4()),
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "machine": platform.machine(),
+                "scale": scale_name,
+                "scale_key": scale.key,
+                "seed": args.seed,
+                "results": results,
+            }
+        )
+
+    if not args.no_record:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        args.history.write_text(json.dumps({"runs": history}, indent=2))
+        print(f"\n[INFO] Results appended to {args.history}")
+    if args.check and regressions_found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Memory held by 100k AI suggestions: plain dataclasses vs. slotted records with shared text.
+
+Suggestions are built the way the scout's rule-based path builds them: guardrail text is formatted per
+task, so identical notes arrive as separate string objects unless the record shares them.
+
+Usage: python benchmarks/result_records.py [--rows 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mvp.ai_opportunity import AISuggestion  # noqa: E402
+
+DEPARTMENTS = ["Brand Marketing", "Performance Marketing", "Data & Analytics", "Operations", "Finance"]
+REDACTION = "Remove customer PII, order numbers and payment details before sharing with AI tools."
+PROHIBITED = ["pricing approvals", "refund decisions", "vendor contract changes", "access control changes"]
+
+
+@dataclass
+class LegacyAISuggestion:
+    """The record as it was before: a regular dataclass with a per-instance __dict__ and a list scope."""
+
+    task_id: str
+    project_id: str
+    recommended: bool
+    reviewer_required: bool
+    reviewer: str
+    department: str
+    reason: str
+    suggested_prompt: str
+    safe_use_notes: str
+    redaction_instructions: str
+    prohibited_scope: List[str]
+
+
+def _fields(index: int) -> dict:
+    department = DEPARTMENTS[index % len(DEPARTMENTS)]
+    reviewer = f"{department} lead"
+    return {
+        "task_id": f"T{index:06d}",
+        "project_id": f"P{index % 40:03d}",
+        "recommended": index % 3 != 0,
+        "reviewer_required": True,
+        "reviewer": reviewer,
+        "department": department,
+        "reason": f"Task T{index:06d} repeats a drafting pattern suited to AI assistance.",
+        "suggested_prompt": f"Draft a first pass for T{index:06d}; keep claims sourced.",
+        "safe_use_notes": f"{REDACTION} Avoid autonomy on {', '.join(PROHIBITED)}. Send draft to {reviewer} for sign-off.",
+        "redaction_instructions": "".join(REDACTION),  # an equal but separate string object per row
+        "prohibited_scope": list(PROHIBITED),
+    }
+
+
+def _measure(label: str, build, rows: int, baseline: int = 0) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    saved = f"  {1 - current / baseline:6.1%} less" if baseline else ""
+    print(f"{label:<36} {current / 1e6:8.1f} MB  {current / rows:7.0f} B/suggestion{saved}")
+    del held
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    def legacy(rows: int):
+        return [LegacyAISuggestion(**_fields(index)) for index in range(rows)]
+
+    def slotted(rows: int):
+        return [AISuggestion(**{**_fields(index), "prohibited_scope": tuple(PROHIBITED)}) for index in range(rows)]
+
+    baseline = _measure("dataclass with __dict__ (before)", legacy, args.rows)
+    _measure("slotted frozen + shared text", slotted, args.rows, baseline)
+
+
+if __name__ == "__main__":
+    main()
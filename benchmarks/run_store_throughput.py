@@ -0,0 +1,116 @@
+"""Insert throughput of RunStore vs. the original connect-and-commit-per-log implementation.
+
+Each mode writes the same agent-sized payloads into a fresh database under a temp directory.
+The multi-process mode checks that concurrent writers lose no rows.
+
+Usage: python benchmarks/run_store_throughput.py [--rows 2000] [--processes 4]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mvp.run_store import RunStore  # noqa: E402
+
+
+def _payload(index: int) -> dict:
+    return {
+        "assignments": [
+            {"task_id": f"T{index:05d}-{n}", "assignee": f"E{n:03d}", "score": 0.8, "rationale": "skill + timezone fit"}
+            for n in range(12)
+        ]
+    }
+
+
+def _legacy_insert(db_path: Path, rows: int) -> None:
+    """The pre-pooling behaviour: schema check, then a new connection and a commit for every log."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_runs (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, "
+            "agent_name TEXT NOT NULL, input_json TEXT NOT NULL, output_json TEXT NOT NULL, "
+            "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+    for index in range(rows):
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "INSERT INTO agent_runs (run_id, agent_name, input_json, output_json) VALUES (?, ?, ?, ?)",
+                ("bench", "agent", json.dumps({"tasks": index}), json.dumps(_payload(index))),
+            )
+            conn.commit()
+
+
+def _store_log(db_path: Path, rows: int, *, background: bool) -> None:
+    store = RunStore(db_path, background=background)
+    for index in range(rows):
+        store.log("bench", "agent", {"tasks": index}, _payload(index))
+    store.close()
+
+
+def _store_log_many(db_path: Path, rows: int) -> None:
+    store = RunStore(db_path, background=False)
+    store.log_many(("bench", "agent", {"tasks": index}, _payload(index)) for index in range(rows))
+    store.close()
+
+
+def _worker(db_path: str, rows: int) -> None:
+    _store_log(Path(db_path), rows, background=True)
+
+
+def _count(db_path: Path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM agent_runs").fetchone()[0]
+
+
+def _report(label: str, rows: int, elapsed: float) -> None:
+    print(f"{label:<34} {rows:>6} rows in {elapsed * 1000:8.1f}ms  {rows / elapsed:>10.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = [
+            ("legacy connect+commit per log", lambda path: _legacy_insert(path, args.rows)),
+            ("RunStore.log (synchronous)", lambda path: _store_log(path, args.rows, background=False)),
+            ("RunStore.log (background writer)", lambda path: _store_log(path, args.rows, background=True)),
+            ("RunStore.log_many", lambda path: _store_log_many(path, args.rows)),
+        ]
+        for index, (label, run) in enumerate(modes):
+            db_path = Path(tmp) / f"mode{index}.db"
+            start = time.perf_counter()
+            run(db_path)
+            elapsed = time.perf_counter() - start
+            assert _count(db_path) == args.rows, label
+            _report(label, args.rows, elapsed)
+
+        db_path = Path(tmp) / "multiprocess.db"
+        RunStore(db_path).close()
+        per_process = args.rows // args.processes
+        workers = [
+            multiprocessing.Process(target=_worker, args=(str(db_path), per_process)) for _ in range(args.processes)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        written = _count(db_path)
+        _report(f"{args.processes} processes, background writers", written, elapsed)
+        if written != per_process * args.processes:
+            raise SystemExit(f"lost rows under concurrency: expected {per_process * args.processes}, got {written}")
+
+
+if __name__ == "__main__":
+    main()
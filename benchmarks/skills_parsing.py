@@ -0,0 +1,78 @@
+"""Skills-column parsing: per-row ast.literal_eval (the previous loader) vs. the shared regex tokenizer.
+
+Rows are synthetic employees whose skill lists are drawn from the vocabulary in data/employees.csv, so
+most cells are distinct; `--distinct` caps how many different cells exist to show the factorized path
+on repetitive exports.
+
+Usage: python benchmarks/skills_parsing.py [--rows 100000] [--distinct 0]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mvp.skills import parse_skills, parse_skills_column  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+def _legacy_parse(skills_raw: str) -> list:
+    """The loader's previous per-row parser."""
+    if pd.isna(skills_raw):
+        return []
+    try:
+        parsed = ast.literal_eval(skills_raw)
+        if isinstance(parsed, list):
+            return [str(skill).strip() for skill in parsed]
+    except (ValueError, SyntaxError):
+        pass
+    return [skill.strip() for skill in skills_raw.split(",")]
+
+
+def _column(rows: int, distinct: int) -> pd.Series:
+    vocabulary = sorted(
+        {skill for cell in pd.read_csv(DATA_DIR / "employees.csv")["skills"] for skill in ast.literal_eval(cell)}
+    )
+    rng = random.Random(11)
+    pool = distinct or rows
+    cells = [str(rng.sample(vocabulary, k=rng.randint(3, 8))) for _ in range(pool)]
+    return pd.Series([cells[index % pool] for index in range(rows)], name="skills")
+
+
+def _time(label: str, run, column: pd.Series, baseline: float = 0.0) -> float:
+    start = time.perf_counter()
+    result = run(column)
+    elapsed = time.perf_counter() - start
+    speedup = f"  {baseline / elapsed:5.1f}x" if baseline else ""
+    print(f"{label:<34} {len(result):>7} rows in {elapsed * 1000:8.1f}ms{speedup}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct skill cells (0 = every row distinct).")
+    args = parser.parse_args()
+
+    column = _column(args.rows, args.distinct)
+    baseline = _time("ast.literal_eval per row", lambda values: values.apply(_legacy_parse), column)
+    _time("parse_skills per row", lambda values: values.map(parse_skills), column, baseline)
+    _time("parse_skills_column", parse_skills_column, column, baseline)
+
+    expected = column.apply(_legacy_parse).map(tuple)
+    parsed = parse_skills_column(column)
+    assert parsed.equals(expected), "parsed skills differ from literal_eval"
+    shared = len({id(cell) for cell in parsed})
+    print(f"{'distinct skill tuples held':<34} {shared:>7} objects for {len(parsed)} rows")
+
+
+if __name__ == "__main__":
+    main()
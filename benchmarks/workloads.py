@@ -0,0 +1,74 @@
+"""Named benchmark workloads: synthetic_data_generator datasets at fixed scale factors.
+
+The tables come from synthetic_data_generator.generate(), so the pipeline suite times the same
+deterministic data, injected bottlenecks included, that benchmarks/bottleneck_recovery.py scores. The same
+scale and seed always give the same tables.
+
+Usage: python benchmarks/workloads.py --scale medium --output_dir /tmp/workload-medium
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic_data_generator import GeneratorConfig, generate, write_dataset  # noqa: E402
+
+
+@dataclass(frozen=True)
+class Scale:
+    factor: float  # GeneratorConfig.scaled() factor
+
+    @property
+    def key(self) -> str:
+        return f"x{self.factor:g}"
+
+    def config(self, seed: int) -> GeneratorConfig:
+        return GeneratorConfig(seed=seed).scaled(self.factor)
+
+
+# Each step up to xlarge is 10x the last: small is 165 employees, 750 tasks and ~2k events; xlarge is 165k
+# employees, 750k tasks and ~2M events (plus 10M availability rows), which needs tens of GB to run the
+# pipeline on. xxlarge reaches ~10M events (and ~50M availability rows); generating it alone takes ~8 GB.
+SCALES: Dict[str, Scale] = {
+    "small": Scale(factor=5),
+    "medium": Scale(factor=50),
+    "large": Scale(factor=500),
+    "xlarge": Scale(factor=5_000),
+    "xxlarge": Scale(factor=25_000),
+}
+
+
+def build_workload(scale: Scale, *, seed: int = 7) -> Dict[str, pd.DataFrame]:
+    """The generator's tables (and bottleneck manifest) at `scale`, keyed like load_dataset's frames."""
+    return generate(scale.config(seed))
+
+
+def write_workload(frames: Dict[str, pd.DataFrame], output_dir: Path) -> Path:
+    """Write the tables under their data/ file names, so load_dataset(output_dir) reads them."""
+    write_dataset(frames, output_dir)
+    return Path(output_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output_dir", type=Path, required=True)
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    frames = build_workload(scale, seed=args.seed)
+    write_workload(frames, args.output_dir)
+    sizes = ", ".join(f"{name}={len(frame)}" for name, frame in frames.items())
+    print(f"[INFO] Wrote {scale.key} workload to {args.output_dir}: {sizes}")
+
+
+if __name__ == "__main__":
+    main()
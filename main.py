@@ -2,15 +2,31 @@
 from __future__ import annotations
 
 import argparse
+import cProfile
 import json
 import re
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Sequence
 
-from mvp.data_loader import load_employees, load_tasks
+from mvp.data_loader import snapshot_dataset
+from mvp.ids import RecordLookup
 from mvp.orchestrator import Orchestrator
-from mvp.llm_utils import safe_openai_json, set_force_openai_fallback
+from mvp.instrumentation import get_tracer
+from mvp.report_writer import ReportWriter
+from mvp.run_store import RunStore
+from mvp.llm_utils import (
+    CACHE_MODES,
+    asafe_openai_json,
+    configure_response_cache,
+    fallback_telemetry,
+    note_fallback,
+    openai_unavailable_reason,
+    set_force_openai_fallback,
+)
+
+# Above the cacheable temperature, so without an API key the summary can never be replayed from the cache.
+_SUMMARY_TEMPERATURE = 0.35
 
 
 def _format_table(headers: Sequence[str], rows: Sequence[Sequence[str]]) -> str:
@@ -32,9 +48,8 @@ def _format_table(headers: Sequence[str], rows: Sequence[Sequence[str]]) -> str:
     return "\n".join([header_line, separator, *row_lines])
 
 
-def _build_workload_table(workloads: List[Dict[str, object]], employees_df) -> str:
+def _build_workload_table(workloads: List[Dict[str, object]], employees_by_id: RecordLookup) -> str:
     """Summarize baseline/new/projected hours vs capacity by employee."""
-    employees_by_id = employees_df.set_index("id").to_dict("index")
     rows: List[List[str]] = []
     for rollup in workloads:
         emp_id = str(rollup.get("employee_id", ""))
@@ -70,16 +85,42 @@ def _build_workload_table(workloads: List[Dict[str, object]], employees_df) -> s
     return _format_table(headers, rows) if rows else "No workload data available."
 
 
+def _build_timing_table(stage_rows: List[Dict[str, object]]) -> str:
+    """Per-stage totals from the run's spans: loads, agents, LLM calls (per agent) and output artifacts."""
+    rows = [
+        [
+            row["category"],
+            row["name"],
+            str(row["calls"]),
+            f"{row['total_seconds']:.3f}",
+            f"{row['mean_seconds'] * 1000:.1f}",
+            f"{row['max_seconds'] * 1000:.1f}",
+        ]
+        for row in stage_rows
+    ]
+    return _format_table(["Category", "Stage", "Calls", "Total (s)", "Mean (ms)", "Max (ms)"], rows)
+
+
+def _write_profile(reports_dir: Path, run_id: str, profiler: cProfile.Profile | None) -> None:
+    """--profile output: a Chrome trace of the run's spans and, with --cprofile, a pstats dump."""
+    profile_dir = reports_dir / "profile"
+    trace_path = ReportWriter(profile_dir, pretty=False).write(f"{run_id}.trace.json", get_tracer().chrome_trace())
+    print(f"[INFO] Trace saved to {trace_path} (open in chrome://tracing, ui.perfetto.dev or speedscope).")
+    if profiler is not None:
+        stats_path = profile_dir / f"{run_id}.prof"
+        profiler.dump_stats(stats_path)
+        print(f"[INFO] cProfile stats saved to {stats_path} (e.g. python -m pstats or snakeviz).")
+
+
 def _is_unstarted_status(status: object) -> bool:
     normalized = str(status or "").strip().lower()
     return normalized in {"", "not_started", "not started", "todo", "pending", "backlog"}
 
 
-def _summarize_unstarted(assignments: List[Dict[str, object]], tasks_df, employees_df) -> str:
+def _summarize_unstarted(
+    assignments: List[Dict[str, object]], tasks_by_id: RecordLookup, employees_by_id: RecordLookup
+) -> str:
     """Render unstarted task assignments with rationales."""
-    tasks_by_id = tasks_df.set_index("id").to_dict("index")
-    employees_by_id = employees_df.set_index("id").to_dict("index")
-
     rows: List[List[str]] = []
     for assignment in assignments:
         task_id = assignment.get("task_id")
@@ -105,11 +146,10 @@ def _summarize_unstarted(assignments: List[Dict[str, object]], tasks_df, employe
     return _format_table(headers, rows) if rows else "No unstarted tasks were routed in this run."
 
 
-def _summarize_ai_flags(ai_flags: List[Dict[str, object]], tasks_df, employees_df) -> str:
+def _summarize_ai_flags(
+    ai_flags: List[Dict[str, object]], tasks_by_id: RecordLookup, employees_by_id: RecordLookup
+) -> str:
     """Summarize AI-assist recommendations and reviewer needs."""
-    tasks_by_id = tasks_df.set_index("id").to_dict("index")
-    employees_by_id = employees_df.set_index("id").to_dict("index")
-
     lines: List[str] = []
     for flag in ai_flags:
         if not flag.get("recommended", False):
@@ -218,11 +258,10 @@ def _summarize_bottlenecks(bottlenecks: List[Dict[str, object]], stage_delays: L
     )
 
 
-def _build_summary_context(report: Dict[str, object], employees_df, tasks_df) -> Dict[str, object]:
+def _build_summary_context(
+    report: Dict[str, object], employees_by_id: RecordLookup, tasks_by_id: RecordLookup
+) -> Dict[str, object]:
     """Assemble highlights for the executive summary prompt."""
-    employees_by_id = employees_df.set_index("id").to_dict("index")
-    tasks_by_id = tasks_df.set_index("id").to_dict("index")
-
     workloads = report.get("workloads", [])
     total_projected = sum(float(w.get("projected_hours", 0.0)) for w in workloads)
     over_capacity = []
@@ -308,9 +347,15 @@ def _build_summary_context(report: Dict[str, object], employees_df, tasks_df) ->
     }
 
 
-def _generate_executive_summary(report: Dict[str, object], employees_df, tasks_df) -> str:
+async def _generate_executive_summary(
+    report: Dict[str, object], employees_by_id: RecordLookup, tasks_by_id: RecordLookup
+) -> str:
     """Call OpenAI to produce a concise executive summary. Empty string if unavailable."""
-    context = _build_summary_context(report, employees_df, tasks_df)
+    unavailable = openai_unavailable_reason(_SUMMARY_TEMPERATURE)
+    if unavailable:
+        note_fallback("executive_summary", unavailable)
+        return ""
+    context = _build_summary_context(report, employees_by_id, tasks_by_id)
     system_prompt = (
         "You are an operations chief of staff summarizing a run from a multi-agent planning system."
         " Provide crisp highlights that balance workload, AI guardrails, and process risks."
@@ -323,7 +368,9 @@ def _generate_executive_summary(report: Dict[str, object], employees_df, tasks_d
         f"\n\nRun context:\n```json\n{json.dumps(context, indent=2)}\n```"
     )
     fallback = {"sentences": []}
-    result = safe_openai_json(system_prompt, user_prompt, fallback=fallback, temperature=0.35)
+    result = await asafe_openai_json(
+        system_prompt, user_prompt, fallback=fallback, temperature=_SUMMARY_TEMPERATURE, agent="executive_summary"
+    )
     sentences = [str(s).strip() for s in result.get("sentences", []) if str(s).strip()]
     if not sentences:
         return ""
@@ -332,14 +379,14 @@ def _generate_executive_summary(report: Dict[str, object], employees_df, tasks_d
 
 def _render_console_report(
     report: Dict[str, object],
-    employees_df,
-    tasks_df,
+    employees_by_id: RecordLookup,
+    tasks_by_id: RecordLookup,
     executive_summary: str | None = None,
 ) -> str:
     """Compose the full report."""
-    workload_table = _build_workload_table(report.get("workloads", []), employees_df)
-    unstarted_block = _summarize_unstarted(report.get("assignments", []), tasks_df, employees_df)
-    ai_block = _summarize_ai_flags(report.get("ai_opportunities", []), tasks_df, employees_df)
+    workload_table = _build_workload_table(report.get("workloads", []), employees_by_id)
+    unstarted_block = _summarize_unstarted(report.get("assignments", []), tasks_by_id, employees_by_id)
+    ai_block = _summarize_ai_flags(report.get("ai_opportunities", []), tasks_by_id, employees_by_id)
     bottlenecks_block = _summarize_bottlenecks(report.get("bottlenecks", []), report.get("stage_delays", []))
 
     sections = [
@@ -372,6 +419,26 @@ def _render_console_report(
     return "\n".join(sections)
 
 
+def _run_retention(args: argparse.Namespace) -> None:
+    """Apply the agent_runs.db retention policy and reclaim the freed space online."""
+    store = RunStore(Path("reports") / "agent_runs.db", background=False)
+    stats = store.prune(args.keep_runs, archive_dir=None if args.no_archive else args.archive_dir)
+    print(
+        f"[INFO] Pruned {stats['pruned_rows']} agent rows into {stats['rollup_days']} daily rollups "
+        f"({stats['archived_rows']} archived, {stats['blobs_deleted']} payload blobs released)."
+    )
+    pages = store.vacuum(full=args.full_vacuum)
+    storage = store.storage_stats()
+    print(f"[INFO] Vacuum released {pages} pages; agent_runs.db is now {storage['file_bytes'] / 1e6:.1f} MB.")
+    store.close()
+
+
+def _run_snapshot(args: argparse.Namespace) -> None:
+    """Convert the input CSVs into columnar snapshots that later runs load instead of re-parsing."""
+    for name, target in snapshot_dataset(args.data_dir).items():
+        print(f"[INFO] Snapshot of {name} ready at {target}.")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run the multi-agent workflow optimization CLI.")
     parser.add_argument(
@@ -384,30 +451,141 @@ def main() -> None:
         action="store_true",
         help="Force fallback behavior for all AI calls even when an OpenAI API key is configured.",
     )
+    parser.add_argument(
+        "--prompt_token_budget",
+        type=int,
+        default=None,
+        help="Token budget per LLM prompt batch (defaults to OPENAI_PROMPT_TOKEN_BUDGET or 8000).",
+    )
+    parser.add_argument(
+        "--cache_mode",
+        choices=CACHE_MODES,
+        default="readwrite",
+        help="LLM response cache for low-temperature calls: off, read (replay only), or readwrite (default).",
+    )
+    parser.add_argument(
+        "--compact_reports",
+        action="store_true",
+        help="Write the JSON reports without indentation (smaller and faster for large runs).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a Chrome trace of the run's timing spans to reports/profile/<run_id>.trace.json.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="With --profile, also dump cProfile stats (main thread) to reports/profile/<run_id>.prof.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    retention = subparsers.add_parser(
+        "retention",
+        help="Prune, roll up, archive and vacuum reports/agent_runs.db instead of running the pipeline.",
+    )
+    retention.add_argument(
+        "--keep_runs",
+        type=int,
+        default=50,
+        help="Most recent rows to keep per agent; older rows are folded into daily rollups (default 50).",
+    )
+    retention.add_argument(
+        "--archive_dir",
+        type=Path,
+        default=Path("reports") / "archive",
+        help="Directory for per-day gzip JSONL archives of pruned rows (default reports/archive).",
+    )
+    retention.add_argument("--no_archive", action="store_true", help="Delete pruned rows without archiving them.")
+    retention.add_argument(
+        "--full_vacuum",
+        action="store_true",
+        help="Run one blocking VACUUM if the store predates incremental auto-vacuum.",
+    )
+    snapshot = subparsers.add_parser(
+        "snapshot",
+        help="Write columnar snapshots of the input CSVs; data loads prefer them while the CSVs are unchanged.",
+    )
+    snapshot.add_argument(
+        "--data_dir",
+        type=Path,
+        default=Path("data"),
+        help="Directory holding the input CSVs (default data); snapshots go to its .snapshots/ folder.",
+    )
     args = parser.parse_args()
 
+    if args.command == "retention":
+        _run_retention(args)
+        return
+    if args.command == "snapshot":
+        _run_snapshot(args)
+        return
+
     if args.no_ai:
         set_force_openai_fallback(True)
         print("[INFO] AI usage disabled via --no_ai; all agents will use deterministic fallbacks.")
 
     data_dir = Path("data")
     reports_dir = Path("reports")
-    orchestrator = Orchestrator(data_dir=data_dir, reports_dir=reports_dir, test_mode=args.test_mode)
+    configure_response_cache(reports_dir / "llm_cache.db", mode=args.cache_mode)
+    orchestrator = Orchestrator(
+        data_dir=data_dir,
+        reports_dir=reports_dir,
+        test_mode=args.test_mode,
+        prompt_token_budget=args.prompt_token_budget,
+        compact_reports=args.compact_reports,
+    )
     if args.test_mode:
         print("[INFO] Running AI opportunity scout in test mode (LLM limited to first 3 tasks).")
-    report = orchestrator.run()
+    profiler = cProfile.Profile() if args.profile and args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+    # Reports are written by the output stage below, together with the Markdown summary and the image.
+    report = orchestrator.run(write_reports=False)
+    prompt_tokens = report.get("prompt_tokens", {})
+    if prompt_tokens.get("prompts"):
+        print(
+            f"[INFO] Prompt packing: ~{prompt_tokens['packed_tokens']} tokens across {prompt_tokens['prompts']} prompts."
+        )
+    cache_stats = report.get("llm_cache", {})
+    if cache_stats.get("mode", "off") != "off":
+        print(f"[INFO] LLM response cache ({cache_stats['mode']}): {cache_stats['hits']} hits, {cache_stats['misses']} misses.")
+    critical = report.get("critical_path", {})
+    if critical.get("path"):
+        spans = ", ".join(f"{name}={entry['seconds']:.2f}s" for name, entry in report["node_timings"].items())
+        print(f"[INFO] Agent timings: {spans}; critical path {' -> '.join(critical['path'])} = {critical['seconds']:.2f}s.")
+
+    dataset = orchestrator.dataset
+    # Row lookups are built once from the load-time ID registries and shared by every section below.
+    employees_by_id = RecordLookup(dataset.ids.employees, dataset.employees)
+    tasks_by_id = RecordLookup(dataset.ids.tasks, dataset.tasks)
+
+    # JSON reports, the bottleneck image and the executive summary run concurrently; the Markdown summary
+    # follows the executive summary. run() returns once every artifact is written and fsynced.
+    stage = orchestrator.output_stage(report)
+    stage.add("executive_summary", lambda: _generate_executive_summary(report, employees_by_id, tasks_by_id))
+    stage.add_text(
+        "human_readable_summary.md",
+        lambda: _render_console_report(
+            report, employees_by_id, tasks_by_id, executive_summary=stage.results["executive_summary"]
+        ),
+        after=["executive_summary"],
+    )
+    stage.run()
+    if profiler is not None:
+        profiler.disable()
+    orchestrator.persist_spans(report["run_id"])
     bottleneck_image = report.get("bottleneck_image")
     if bottleneck_image:
         print(f"Bottleneck map image saved to {bottleneck_image}")
-
-    employees_df = load_employees(data_dir / "employees.csv")
-    tasks_df = load_tasks(data_dir / "tasks.csv")
-
-    executive_summary = _generate_executive_summary(report, employees_df, tasks_df)
-    console_report = _render_console_report(report, employees_df, tasks_df, executive_summary=executive_summary)
-    summary_path = reports_dir / "human_readable_summary.md"
-    summary_path.write_text(console_report)
-    print(f"Human-readable summary saved to {summary_path}")
+    print(f"Human-readable summary saved to {stage.results['human_readable_summary.md']}")
+    fallbacks = fallback_telemetry()
+    if fallbacks["total"]:
+        counts = ", ".join(f"{entry['agent']}={entry['count']} ({entry['reason']})" for entry in fallbacks["entries"])
+        print(f"[INFO] LLM fallbacks this run: {counts}")
+    if args.profile:
+        _write_profile(reports_dir, report["run_id"], profiler)
+    print("\nTiming by stage:")
+    print(_build_timing_table(get_tracer().stage_table()))
     # print("\nRaw JSON payload (also written to reports/):")
     # print(json.dumps(report, indent=2))
 
@@ -2,17 +2,76 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-import ast
-from typing import Dict, List, Optional
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 
-from .llm_utils import safe_openai_json
+from .json_stream import ItemSchema
+from .llm_utils import (
+    ResponseCache,
+    active_response_cache,
+    note_fallback,
+    openai_enabled,
+    resolve_model,
+    safe_stream_openai_json_items,
+)
+from .prompt_packing import (
+    PromptPacker,
+    compact_json,
+    estimate_tokens,
+    key_legend,
+    record_prompt_tokens,
+    shorten_keys,
+)
+from .records import shared_text, shared_tuple
 from .run_store import RunStore
+from .skills import parse_skills
 
+# Bump when prompt wording or suggestion post-processing changes so memoized suggestions are not reused.
+_SUGGESTION_MEMO_VERSION = 1
+# Task fields that determine a suggestion; id/project_id are re-stamped when a memoized suggestion is reused.
+_MEMO_TASK_FIELDS = ("name", "skill_needed", "department", "role")
+_DEFAULT_PROMPT_TEMPLATE = "Draft a concise first version tailored to the department audience."
+_POLICY_INSTRUCTIONS = (
+    "Recommend AI assist for writing, summarization, drafting presentations, data QA summaries. "
+    "Always include reviewer and guardrail notes per task department."
+)
+# Long -> short task keys; the legend is sent once per batch so the model can expand them.
+_TASK_KEY_LEGEND = {"project_id": "pid", "skill_needed": "skill", "department": "dept"}
+# Per-department fields hoisted into a shared table instead of being repeated on every task row.
+_HOISTED_TASK_FIELDS = {"preferred_prompt_template", "required_reviewer"}
+_SUGGESTION_EXAMPLE: Dict[str, object] = {
+    "task_id": "T0001",
+    "project_id": "P001",
+    "department": "Product",
+    "recommended": True,
+    "reviewer_required": True,
+    "reviewer": "Product owner",
+    "reason": "why AI helps",
+    "suggested_prompt": "prompt text",
+    "safe_use_notes": "PII redaction, prohibited autonomy, reviewer sign-off.",
+    "redaction_instructions": "Mask customer identifiers and sensitive data.",
+    "prohibited_scope": ["payments or refunds", "access control changes"],
+}
+_SUGGESTION_SCHEMA = ItemSchema(
+    required={"task_id": (str, int)},
+    optional={
+        "project_id": (str, int),
+        "department": (str,),
+        "recommended": (bool,),
+        "reviewer_required": (bool,),
+        "reviewer": (str,),
+        "reason": (str,),
+        "suggested_prompt": (str,),
+        "safe_use_notes": (str,),
+        "redaction_instructions": (str,),
+        "prohibited_scope": (list,),
+    },
+)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class AISuggestion:
     task_id: str
     project_id: str
@@ -24,7 +83,13 @@ class AISuggestion:
     suggested_prompt: str
     safe_use_notes: str
     redaction_instructions: str
-    prohibited_scope: List[str]
+    prohibited_scope: Tuple[str, ...]
+
+    def __post_init__(self) -> None:
+        # Guardrail text is identical across most tasks; every suggestion references one shared copy.
+        for name in ("department", "reviewer", "safe_use_notes", "redaction_instructions"):
+            object.__setattr__(self, name, shared_text(getattr(self, name)))
+        object.__setattr__(self, "prohibited_scope", shared_tuple(self.prohibited_scope))
 
 
 class AIOpportunityScout:
@@ -38,12 +103,15 @@ class AIOpportunityScout:
         employees: Optional[pd.DataFrame] = None,
         *,
         test_mode: bool = False,
+        token_budget: Optional[int] = None,
     ):
-        self.tasks = tasks.copy()
+        # Shallow: department/role are added as new columns before the only in-place (.loc) write.
+        self.tasks = tasks.copy(deep=False)
         self.run_store = run_store
         self.run_id = run_id
         self.employees = employees
         self.test_mode = test_mode
+        self.packer = PromptPacker(token_budget)
         self._skill_department_map = self._build_skill_department_map()
         self._attach_department_metadata()
 
@@ -56,29 +124,7 @@ class AIOpportunityScout:
                 department = str(row.get("department", "")).strip()
                 if not department:
                     continue
-                skills_raw = row.get("skills", "")
-                parsed_skills: List[str]
-                if isinstance(skills_raw, (list, tuple, set)):
-                    parsed_skills = [str(skill).strip() for skill in skills_raw if str(skill).strip()]
-                else:
-                    if skills_raw is None:
-                        continue
-                    try:
-                        if pd.isna(skills_raw):
-                            continue
-                    except Exception:
-                        # Non-scalar; treat as generic iterable in fallback below.
-                        pass
-                    text_value = str(skills_raw).strip()
-                    if not text_value:
-                        continue
-                    try:
-                        parsed_skills = json.loads(text_value)
-                    except Exception:
-                        try:
-                            parsed_skills = ast.literal_eval(text_value)
-                        except Exception:
-                            parsed_skills = [s.strip() for s in text_value.split(",") if s.strip()]
+                parsed_skills = parse_skills(row.get("skills", ""))
                 for skill in parsed_skills:
                     skill_key = str(skill).lower().strip()
                     if skill_key and skill_key not in mapping:
@@ -244,60 +290,148 @@ class AIOpportunityScout:
             fallback[suggestion["task_id"]] = suggestion
         return fallback
 
-    def _iter_task_batches(self, tasks: pd.DataFrame, batch_size: int):
-        if batch_size <= 0:
-            batch_size = len(tasks) or 1
-        for start in range(0, len(tasks), batch_size):
-            yield tasks.iloc[start : start + batch_size]
+    def _prompt_task_row(
+        self, row: pd.Series, department_templates: Dict[str, str], reviewers: Dict[str, str]
+    ) -> Dict[str, object]:
+        """Full (legacy-shaped) task row; the packed prompt shortens keys and hoists the department fields."""
+        department = str(row.get("department", "")).strip() or "General"
+        return {
+            "id": row["id"],
+            "project_id": row["project_id"],
+            "name": row["name"],
+            "skill_needed": row["skill_needed"],
+            "department": department,
+            "role": row.get("role", ""),
+            "preferred_prompt_template": department_templates.get(department, _DEFAULT_PROMPT_TEMPLATE),
+            "required_reviewer": reviewers.get(department, "Department lead"),
+        }
+
+    @staticmethod
+    def _compact_task_row(task_row: Dict[str, object]) -> Dict[str, object]:
+        row = {key: value for key, value in task_row.items() if key not in _HOISTED_TASK_FIELDS}
+        return shorten_keys(row, _TASK_KEY_LEGEND)
 
-    def _render_prompt(self, tasks_subset: pd.DataFrame) -> str:
-        department_templates = self._department_templates()
-        reviewers = self._department_reviewers()
-        policy = self._guardrail_policy()
-        condensed_tasks = []
-        for _, row in tasks_subset.iterrows():
-            department = str(row.get("department", "")).strip() or "General"
-            condensed_tasks.append(
-                {
-                    "id": row["id"],
-                    "project_id": row["project_id"],
-                    "name": row["name"],
-                    "skill_needed": row["skill_needed"],
-                    "department": department,
-                    "role": row.get("role", ""),
-                    "preferred_prompt_template": department_templates.get(
-                        department, "Draft a concise first version tailored to the department audience."
-                    ),
-                    "required_reviewer": reviewers.get(department, "Department lead"),
-                }
-            )
-        return json.dumps(
+    def _render_prompt(
+        self,
+        task_rows: List[Dict[str, object]],
+        policy: Dict[str, object],
+        departments: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> str:
+        if departments is None:
+            departments = {}
+            for task_row in task_rows:
+                departments.setdefault(
+                    str(task_row["department"]),
+                    {
+                        "template": str(task_row["preferred_prompt_template"]),
+                        "reviewer": str(task_row["required_reviewer"]),
+                    },
+                )
+        return compact_json(
             {
-                "tasks": condensed_tasks,
-                "policy": {
-                    **policy,
-                    "instructions": "Recommend AI assist for writing, summarization, drafting presentations, data QA summaries. Always include reviewer and guardrail notes per task department.",
-                },
-                "response_schema": {
-                    "suggestions": [
-                        {
-                            "task_id": "T0001",
-                            "project_id": "P001",
-                            "department": "Product",
-                            "recommended": True,
-                            "reviewer_required": True,
-                            "reviewer": "Product owner",
-                            "reason": "why AI helps",
-                            "suggested_prompt": "prompt text",
-                            "safe_use_notes": "PII redaction, prohibited autonomy, reviewer sign-off.",
-                            "redaction_instructions": "Mask customer identifiers and sensitive data.",
-                            "prohibited_scope": ["payments or refunds", "access control changes"],
-                        }
-                    ]
-                },
-            },
-            indent=2,
+                "keys": key_legend(_TASK_KEY_LEGEND),
+                "departments": departments,
+                "tasks": [self._compact_task_row(task_row) for task_row in task_rows],
+                "policy": {**policy, "instructions": _POLICY_INSTRUCTIONS},
+                "response_schema": {"suggestions": [_SUGGESTION_EXAMPLE]},
+            }
+        )
+
+    def _suggestion_memo_key(
+        self, task_row: Dict[str, object], policy: Dict[str, object], system_prompt: str
+    ) -> str:
+        """Fingerprint of everything that shapes one task's suggestion: task fields, template, reviewer, policy."""
+        return ResponseCache.make_key(
+            "ai_suggestion",
+            _SUGGESTION_MEMO_VERSION,
+            resolve_model(),
+            system_prompt,
+            [task_row.get(field, "") for field in _MEMO_TASK_FIELDS],
+            task_row["preferred_prompt_template"],
+            task_row["required_reviewer"],
+            policy,
+            _POLICY_INSTRUCTIONS,
+        )
+
+    def _prompt_overhead_tokens(
+        self, department_templates: Dict[str, str], reviewers: Dict[str, str], policy: Dict[str, object]
+    ) -> int:
+        """Tokens spent on everything but task rows, assuming every department gets hoisted."""
+        all_departments = {
+            dept: {"template": department_templates.get(dept, _DEFAULT_PROMPT_TEMPLATE), "reviewer": reviewer}
+            for dept, reviewer in reviewers.items()
+        }
+        return estimate_tokens(self._render_prompt([], policy, departments=all_departments))
+
+    def _collect_llm_items(
+        self,
+        llm_tasks: pd.DataFrame,
+        system_prompt: str,
+        department_templates: Dict[str, str],
+        reviewers: Dict[str, str],
+        policy: Dict[str, object],
+        fallback_by_id: Dict[str, Dict[str, object]],
+    ) -> Tuple[List[Dict[str, object]], int]:
+        """Suggestion payloads from memo hits plus packed LLM batches; returns (items, memoized count)."""
+        task_rows = [
+            self._prompt_task_row(row, department_templates, reviewers) for _, row in llm_tasks.iterrows()
+        ]
+        task_order = {str(task_row["id"]): idx for idx, task_row in enumerate(task_rows)}
+
+        # Reuse suggestions for tasks whose prompt-relevant fields are unchanged since an earlier run,
+        # so one edited task no longer invalidates a whole batch. Memo probes stay out of the cache's hit/miss
+        # stats, which describe replayed LLM calls; memo hits are reported as memoized_suggestions instead.
+        memo = active_response_cache()
+        memo_keys: Dict[str, str] = {}
+        payload_items: List[Dict[str, object]] = []
+        pending_rows: List[Dict[str, object]] = []
+        for task_row in task_rows:
+            task_id = str(task_row["id"])
+            if memo is None:
+                pending_rows.append(task_row)
+                continue
+            memo_keys[task_id] = self._suggestion_memo_key(task_row, policy, system_prompt)
+            cached = memo.get(memo_keys[task_id], record_stats=False)
+            if cached is None:
+                pending_rows.append(task_row)
+                continue
+            payload_items.append({**json.loads(cached), "task_id": task_id, "project_id": str(task_row["project_id"])})
+
+        overhead_tokens = estimate_tokens(system_prompt) + self._prompt_overhead_tokens(
+            department_templates, reviewers, policy
         )
+        reserve_per_row = self.packer.row_tokens(_SUGGESTION_EXAMPLE)
+
+        for batch in self.packer.pack(
+            pending_rows,
+            self._compact_task_row,
+            overhead_tokens=overhead_tokens,
+            reserve_per_row=reserve_per_row,
+        ):
+            user_prompt = self._render_prompt(batch.items, policy)
+            record_prompt_tokens("ai_opportunity_scout", system_prompt + user_prompt)
+            batch_ids = [str(task_row["id"]) for task_row in batch.items]
+            # Only suggestions that actually streamed back from the model are memoized; gaps left by
+            # skipped, malformed, or failed output are filled from the rule-based payloads below.
+            chunk_items: List[Dict[str, object]] = []
+            seen_chunk_ids: set[str] = set()
+            for item in safe_stream_openai_json_items(
+                system_prompt, user_prompt, "suggestions", schema=_SUGGESTION_SCHEMA, agent="ai_opportunity_scout"
+            ):
+                task_id = str(item["task_id"])
+                chunk_items.append(item)
+                seen_chunk_ids.add(task_id)
+                memo_key = memo_keys.get(task_id)
+                if memo is not None and memo_key and task_id in batch_ids:
+                    memo.put(memo_key, json.dumps(item))
+            for task_id in batch_ids:
+                if task_id not in seen_chunk_ids and task_id in fallback_by_id:
+                    chunk_items.append(dict(fallback_by_id[task_id]))
+                    seen_chunk_ids.add(task_id)
+            payload_items.extend(chunk_items)
+
+        payload_items.sort(key=lambda item: task_order.get(str(item.get("task_id")), len(task_order)))
+        return payload_items, len(task_rows) - len(pending_rows)
 
     def run(self) -> List[AISuggestion]:
         system_prompt = (
@@ -314,26 +448,15 @@ class AIOpportunityScout:
         policy = self._guardrail_policy()
         fallback_by_id = self._build_fallback_suggestions(department_templates, reviewers, policy)
 
-        payload_items: List[Dict[str, object]] = []
-        batch_size = len(llm_tasks) if self.test_mode else 20
-        for batch in self._iter_task_batches(llm_tasks, batch_size):
-            user_prompt = self._render_prompt(batch)
-            fallback_payload = {
-                "suggestions": [
-                    dict(fallback_by_id[str(row["id"])])
-                    for _, row in batch.iterrows()
-                    if str(row["id"]) in fallback_by_id
-                ]
-            }
-            result = safe_openai_json(system_prompt, user_prompt, fallback=fallback_payload)
-            chunk_items = list(result.get("suggestions", []))
-            batch_ids = [str(row["id"]) for _, row in batch.iterrows()]
-            seen_chunk_ids = {str(item.get("task_id")) for item in chunk_items}
-            for task_id in batch_ids:
-                if task_id not in seen_chunk_ids and task_id in fallback_by_id:
-                    chunk_items.append(dict(fallback_by_id[task_id]))
-                    seen_chunk_ids.add(task_id)
-            payload_items.extend(chunk_items)
+        if openai_enabled():
+            payload_items, memoized_count = self._collect_llm_items(
+                llm_tasks, system_prompt, department_templates, reviewers, policy, fallback_by_id
+            )
+        else:
+            # Nothing would reach the model: skip prompt rendering and use the rule-based payloads as-is.
+            note_fallback("ai_opportunity_scout")
+            payload_items = [fallback_by_id[task_id] for task_id in llm_tasks["id"].astype(str) if task_id in fallback_by_id]
+            memoized_count = 0
 
         deduped_items: List[Dict[str, object]] = []
         seen_ids = set()
@@ -364,14 +487,14 @@ class AIOpportunityScout:
                     safe_use_notes=str(item.get("safe_use_notes", "")) or default_safe_use,
                     redaction_instructions=str(item.get("redaction_instructions", ""))
                     or policy["pii_redaction"],
-                    prohibited_scope=[str(scope) for scope in item.get("prohibited_scope", policy["prohibited_autonomy"])],
+                    prohibited_scope=tuple(str(scope) for scope in item.get("prohibited_scope", policy["prohibited_autonomy"])),
                 )
             )
 
         self.run_store.log(
             self.run_id,
             "ai_opportunity_scout",
-            inputs={"tasks": len(self.tasks), "test_mode": self.test_mode},
-            outputs={"suggestions": [s.__dict__ for s in suggestions]},
+            inputs={"tasks": len(self.tasks), "test_mode": self.test_mode, "memoized_suggestions": memoized_count},
+            outputs={"suggestions": [asdict(s) for s in suggestions]},
         )
         return suggestions
@@ -6,9 +6,9 @@ import math
 import os
 import textwrap
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 _MPL_CACHE_DIR = Path("reports") / ".matplotlib_cache"
 _MPL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
@@ -23,13 +23,57 @@ from matplotlib import font_manager
 from matplotlib import patches
 from matplotlib.path import Path
 import matplotlib.colors as mcolors
+import numpy as np
 import pandas as pd
 
-from .llm_utils import safe_openai_json
+from .llm_utils import note_fallback, openai_enabled, safe_openai_json
+from .prompt_packing import PromptPacker, compact_json, estimate_tokens, record_prompt_tokens
+from .report_writer import atomic_writer
 from .run_store import RunStore
 
-
-@dataclass
+_BOTTLENECK_INSTRUCTIONS = (
+    "Analyze the provided metrics to surface the top bottlenecks. Prioritize roles with extreme wait/service "
+    "times, large utilization, or high rework counts, and handoffs with severe queues. For each bottleneck, "
+    "quantify it with a cited metric, then describe a plausible narrative for why the slowdown occurs based on "
+    "the data (e.g., async approvals, unclear inputs, timezone misalignment). Finally, recommend a targeted "
+    "solution (capacity, sequencing, AI assist, SLAs, etc.). The `issue` field should blend the metric plus the "
+    "story behind it. Stay grounded in the data. Metric tables are columnar: `columns` names each position in "
+    "every row, and all durations are hours."
+)
+_BOTTLENECK_EXAMPLE: Dict[str, object] = {
+    "stage": "stage name",
+    "issue": "metric-backed story of the bottleneck",
+    "metric": 12.5,
+    "unit": "hours",
+    "recommendation": "solution with guardrails or process tweak",
+}
+# (metric key, short column name) pairs for the columnar stage/edge tables sent to the model.
+_STAGE_PROMPT_COLUMNS = [
+    ("mean_wait_hours", "wait"),
+    ("p90_wait_hours", "p90_wait"),
+    ("mean_service_hours", "service"),
+    ("p90_service_hours", "p90_service"),
+    ("wait_to_service_ratio", "wait_service_ratio"),
+    ("utilization_hours", "util"),
+    ("instances", "n"),
+    ("handoffs", "handoffs"),
+    ("rework_count", "rework"),
+    ("long_wait_instances", "long_waits"),
+    ("total_wait_hours", "total_wait"),
+    ("total_service_hours", "total_service"),
+    ("wait_share_pct", "wait_pct"),
+    ("service_share_pct", "service_pct"),
+    ("share_of_activity_pct", "activity_pct"),
+]
+_EDGE_PROMPT_COLUMNS = [
+    ("count", "n"),
+    ("mean_wait_hours", "wait"),
+    ("p90_wait_hours", "p90_wait"),
+    ("wait_share_pct", "wait_pct"),
+]
+
+
+@dataclass(frozen=True, slots=True)
 class Bottleneck:
     stage: str
     issue: str
@@ -38,7 +82,7 @@ class Bottleneck:
     recommendation: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StageDelay:
     stage: str
     mean_service_hours: float
@@ -49,22 +93,100 @@ class StageDelay:
     utilization_hours: float
 
 
+@dataclass(frozen=True, slots=True)
+class _ImagePlan:
+    """Layout inputs for the bottleneck chord diagram, computed before any drawing."""
+
+    diagram_cfg: Dict[str, object]
+    nodes: List[str]
+    palette: List[str]
+    font_family: str
+    title_size: float
+    label_size: float
+    matrix: List[List[float]]
+    row_totals: List[float]
+    total_flow: float
+
+
+# One task's events in time order as plain lists: microsecond timestamps, types, from and to assignees.
+_TaskEvents = Tuple[List[int], List[str], List[object], List[object]]
+
+
+def _hours(delta_us: int) -> float:
+    return delta_us / 1e6 / 3600.0
+
+
+def _column_values(frame: pd.DataFrame, column: str, default: object) -> np.ndarray:
+    if column not in frame:
+        return np.full(len(frame), default, dtype=object)
+    return frame[column].to_numpy(dtype=object)
+
+
+def _task_event_lists(frame: pd.DataFrame, *, sort_tasks: bool) -> Iterator[Tuple[object, _TaskEvents]]:
+    """
+    Group and time-order the events once over whole columns, then hand each task its slice as lists, so
+    the per-task walk never touches pandas. Tasks come in key order when `sort_tasks`, otherwise in order
+    of first appearance; events with equal timestamps keep their file order.
+    """
+    if frame.empty:
+        return
+    groups = frame.groupby("task_id", sort=sort_tasks, observed=True).ngroup().to_numpy()
+    stamps = pd.to_datetime(frame["timestamp"]).to_numpy(dtype="datetime64[us]").view("int64")
+    order = np.lexsort((stamps, groups))
+    order = order[groups[order] >= 0]
+    if not len(order):
+        return
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    bounds = np.r_[starts, len(order)].tolist()
+    task_ids = frame["task_id"].to_numpy(dtype=object)[order[starts]]
+    columns = (
+        stamps[order].tolist(),
+        [str(value) for value in _column_values(frame, "type", "")[order]],
+        _column_values(frame, "from_assignee", None)[order].tolist(),
+        _column_values(frame, "to_assignee", None)[order].tolist(),
+    )
+    for position, task_id in enumerate(task_ids):
+        low, high = bounds[position], bounds[position + 1]
+        yield task_id, tuple(values[low:high] for values in columns)  # type: ignore[misc]
+
+
 class BottleneckDetector:
-    """Computes baseline delays and enriches with OpenAI insights."""
+    """
+    Computes baseline delays and enriches with OpenAI insights.
+
+    `events` is either the whole event frame or a stream of chunks (e.g. data_loader.iter_events) in which
+    each task's events are contiguous, as in the generated events.csv. A stream is aggregated as it is read,
+    holding one chunk at a time, and can be consumed by a single run().
+    """
 
     def __init__(
         self,
-        events: pd.DataFrame,
+        events: Union[pd.DataFrame, Iterable[pd.DataFrame]],
         employees: pd.DataFrame,
         run_store: RunStore,
         run_id: str,
         reports_dir: Path,
+        *,
+        token_budget: Optional[int] = None,
+        defer_image: bool = False,
     ):
-        self.events = events.copy()
-        self.employees = employees.copy()
+        self.events: Optional[pd.DataFrame] = None
+        self._event_chunks: Optional[Iterable[pd.DataFrame]] = None
+        if isinstance(events, pd.DataFrame):
+            self.events = events.copy(deep=False)
+        else:
+            self._event_chunks = events
+        self._event_count = 0
+        self._event_span: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None
+        self.employees = employees.copy(deep=False)
         self.run_store = run_store
         self.run_id = run_id
         self.reports_dir = reports_dir
+        self.packer = PromptPacker(token_budget)
+        # Deferred images are planned by run() and drawn later by render_pending_image(), off the agent graph.
+        self.defer_image = defer_image
+        self._pending_image: Optional[_ImagePlan] = None
 
     def _role_lookup(self) -> Dict[str, str]:
         lookup = {}
@@ -82,19 +204,54 @@ class BottleneckDetector:
             return 0.0
         return float(pd.Series(values).quantile(q))
 
-    def _stage_end_time(self, events: pd.DataFrame, idx: int, assignee_id: object, fallback: pd.Timestamp) -> pd.Timestamp:
+    @staticmethod
+    def _stage_end_time(stamps: List[int], from_ids: List[str], idx: int, assignee_id: object) -> int:
         """Find when the current stage actually completes for wait time math."""
         assignee = str(assignee_id or "")
         if assignee:
-            for next_idx in range(idx + 1, len(events)):
-                next_event = events.iloc[next_idx]
-                next_ts = pd.to_datetime(next_event.get("timestamp"))
-                from_assignee = str(next_event.get("from_assignee") or "")
-                if from_assignee == assignee:
-                    return next_ts
-        if idx + 1 < len(events):
-            return pd.to_datetime(events.iloc[idx + 1].get("timestamp"))
-        return fallback
+            for next_idx in range(idx + 1, len(stamps)):
+                if from_ids[next_idx] == assignee:
+                    return stamps[next_idx]
+        if idx + 1 < len(stamps):
+            return stamps[idx + 1]
+        return stamps[idx]
+
+    def _task_groups(self) -> Iterator[Tuple[object, _TaskEvents]]:
+        """(task_id, events) per task; also counts the events and tracks the overall time span."""
+        if self.events is not None:
+            self._event_count = len(self.events)
+            if not self.events.empty:
+                self._event_span = (self.events["timestamp"].min(), self.events["timestamp"].max())
+            yield from _task_event_lists(self.events, sort_tasks=True)
+            return
+        if self._event_chunks is None:
+            raise RuntimeError("The event stream was already consumed by an earlier run.")
+        chunks, self._event_chunks = self._event_chunks, None
+        carry: Optional[pd.DataFrame] = None
+        finished: set = set()
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            self._event_count += len(chunk)
+            low, high = chunk["timestamp"].min(), chunk["timestamp"].max()
+            if self._event_span is not None:
+                low, high = min(low, self._event_span[0]), max(high, self._event_span[1])
+            self._event_span = (low, high)
+            # The chunk's last task may continue in the next chunk, so it is held back until then.
+            frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+            last_task = frame["task_id"].iloc[-1]
+            tail = (frame["task_id"] == last_task).to_numpy()
+            carry = frame[tail]
+            for task_id, task_events in _task_event_lists(frame[~tail], sort_tasks=False):
+                if task_id in finished:
+                    raise ValueError(f"Events for task {task_id} are not contiguous; pass the whole frame instead.")
+                finished.add(task_id)
+                yield task_id, task_events
+        if carry is not None:
+            for task_id, task_events in _task_event_lists(carry, sort_tasks=False):
+                if task_id in finished:
+                    raise ValueError(f"Events for task {task_id} are not contiguous; pass the whole frame instead.")
+                yield task_id, task_events
 
     def _compute_metrics(self) -> Dict[str, object]:
         role_lookup = self._role_lookup()
@@ -115,32 +272,29 @@ class BottleneckDetector:
         total_wait_hours = 0.0
         total_service_hours = 0.0
 
-        grouped = self.events.groupby("task_id")
-        for task_id, evs in grouped:
-            evs_sorted = evs.sort_values("timestamp").reset_index(drop=True)
+        self._event_count = 0
+        self._event_span = None
+        for task_id, (stamps, types, from_ids, to_ids) in self._task_groups():
             prev_end_time = None
             prev_role = None
             stages_for_task: List[Dict[str, object]] = []
             role_hits: Dict[str, int] = defaultdict(int)
+            from_keys = [str(value or "") for value in from_ids]
 
-            for idx, event in evs_sorted.iterrows():
-                event_type = str(event.get("type", ""))
-                timestamp = pd.to_datetime(event.get("timestamp"))
+            for idx, event_type in enumerate(types):
+                timestamp = stamps[idx]
 
                 if event_type not in {"start", "handoff"}:
                     if event_type == "end":
                         prev_end_time = timestamp
                     continue
 
-                assignee_id = event.get("to_assignee") or event.get("from_assignee") or "Unassigned"
+                assignee_id = to_ids[idx] or from_ids[idx] or "Unassigned"
                 stage_role = role_lookup.get(str(assignee_id), str(assignee_id))
-                stage_end_time = self._stage_end_time(evs_sorted, idx, assignee_id, timestamp)
+                stage_end_time = self._stage_end_time(stamps, from_keys, idx, assignee_id)
 
-                wait_hours = 0.0 if prev_end_time is None else max(
-                    (timestamp - prev_end_time).total_seconds() / 3600.0,
-                    0.0,
-                )
-                service_hours = max((stage_end_time - timestamp).total_seconds() / 3600.0, 0.0)
+                wait_hours = 0.0 if prev_end_time is None else max(_hours(timestamp - prev_end_time), 0.0)
+                service_hours = max(_hours(stage_end_time - timestamp), 0.0)
 
                 stage_stats[stage_role]["service_hours"].append(service_hours)
                 stage_stats[stage_role]["wait_hours"].append(wait_hours)
@@ -172,7 +326,7 @@ class BottleneckDetector:
                 prev_role = stage_role
 
             if stages_for_task:
-                total_duration = (stages_for_task[-1]["end"] - stages_for_task[0]["start"]).total_seconds() / 3600.0
+                total_duration = _hours(stages_for_task[-1]["end"] - stages_for_task[0]["start"])
                 task_paths.append(
                     {
                         "task_id": task_id,
@@ -248,8 +402,8 @@ class BottleneckDetector:
             )
 
         critical_paths = sorted(task_paths, key=lambda t: t.get("total_hours", 0.0), reverse=True)[:3]
-        overall_start = pd.to_datetime(self.events["timestamp"].min()) if not self.events.empty else None
-        overall_end = pd.to_datetime(self.events["timestamp"].max()) if not self.events.empty else None
+        overall_start = pd.to_datetime(self._event_span[0]) if self._event_span is not None else None
+        overall_end = pd.to_datetime(self._event_span[1]) if self._event_span is not None else None
         timeline_hours = 0.0
         if overall_start is not None and overall_end is not None:
             timeline_hours = max((overall_end - overall_start).total_seconds() / 3600.0, 0.0)
@@ -317,44 +471,67 @@ class BottleneckDetector:
             "story_hints": story_hints,
         }
 
-    def _render_prompt(self, metrics: Dict[str, object]) -> str:
-        aggregate = metrics.get("aggregate", {})
-        stage_rankings = metrics.get("stage_rankings", {})
-        story_hints = metrics.get("story_hints", [])
-        instructions = (
-            "Analyze the provided metrics to surface the top bottlenecks. Prioritize roles with extreme wait/service "
-            "times, large utilization, or high rework counts, and handoffs with severe queues. For each bottleneck, "
-            "quantify it with a cited metric, then describe a plausible narrative for why the slowdown occurs based on "
-            "the data (e.g., async approvals, unclear inputs, timezone misalignment). Finally, recommend a targeted "
-            "solution (capacity, sequencing, AI assist, SLAs, etc.). The `issue` field should blend the metric plus the "
-            "story behind it. Stay grounded in the data."
-        )
-        analysis_notes = {
-            "aggregate": aggregate,
-            "story_hints": story_hints,
-            "rankings": stage_rankings,
-        }
-        return json.dumps(
+    @staticmethod
+    def _round(value: object) -> object:
+        return round(float(value), 2) if isinstance(value, (int, float)) else value
+
+    def _render_prompt(self, metrics: Dict[str, object], system_prompt: str = "") -> str:
+        stage_metrics: Dict[str, Dict[str, float]] = metrics.get("stage_metrics", {})  # type: ignore[assignment]
+        edges: List[Dict[str, object]] = metrics.get("edges", [])  # type: ignore[assignment]
+        stage_rankings: Dict[str, List[Dict[str, object]]] = metrics.get("stage_rankings", {})  # type: ignore[assignment]
+
+        # Column headers are hoisted once per table instead of repeating metric names on every row.
+        stage_rows = [
+            [stage, *[self._round(stats.get(column, 0.0)) for column, _ in _STAGE_PROMPT_COLUMNS]]
+            for stage, stats in sorted(
+                stage_metrics.items(), key=lambda kv: kv[1].get("p90_wait_hours", 0.0), reverse=True
+            )
+        ]
+        edge_rows = [
+            [edge["from"], edge["to"], *[self._round(edge.get(column, 0.0)) for column, _ in _EDGE_PROMPT_COLUMNS]]
+            for edge in sorted(edges, key=lambda e: e.get("p90_wait_hours", 0.0), reverse=True)
+        ]
+        critical_paths = [
             {
-                "stage_metrics": metrics.get("stage_metrics", {}),
-                "edge_metrics": metrics.get("edges", []),
-                "critical_paths": metrics.get("critical_paths", []),
-                "analysis_notes": analysis_notes,
-                "instructions": instructions,
-                "response_schema": {
-                    "bottlenecks": [
-                        {
-                            "stage": "stage name",
-                            "issue": "metric-backed story of the bottleneck",
-                            "metric": 12.5,
-                            "unit": "hours",
-                            "recommendation": "solution with guardrails or process tweak",
-                        }
-                    ],
+                "task_id": path.get("task_id"),
+                "hours": self._round(path.get("total_hours", 0.0)),
+                "stages": [
+                    [stage.get("role"), self._round(stage.get("service_hours", 0.0)), self._round(stage.get("wait_hours", 0.0))]
+                    for stage in path.get("stages", [])
+                ],
+            }
+            for path in metrics.get("critical_paths", [])  # type: ignore[union-attr]
+        ]
+
+        def payload(stages: List[List[object]], edge_list: List[List[object]]) -> Dict[str, object]:
+            return {
+                "stage_metrics": {
+                    "columns": ["stage", *[short for _, short in _STAGE_PROMPT_COLUMNS]],
+                    "rows": stages,
                 },
-            },
-            indent=2,
-        )
+                "edge_metrics": {
+                    "columns": ["from", "to", *[short for _, short in _EDGE_PROMPT_COLUMNS]],
+                    "rows": edge_list,
+                },
+                "critical_paths": {"stage_columns": ["role", "service_h", "wait_h"], "paths": critical_paths},
+                "analysis_notes": {
+                    "aggregate": {key: self._round(value) for key, value in metrics.get("aggregate", {}).items()},  # type: ignore[union-attr]
+                    "story_hints": metrics.get("story_hints", []),
+                    "rankings": {
+                        key: [entry.get("stage") for entry in entries] for key, entries in stage_rankings.items()
+                    },
+                },
+                "instructions": _BOTTLENECK_INSTRUCTIONS,
+                "response_schema": {"bottlenecks": [_BOTTLENECK_EXAMPLE]},
+            }
+
+        # Trim the least-congested stages/handoffs first when the full tables exceed the token budget.
+        overhead = estimate_tokens(system_prompt) + estimate_tokens(compact_json(payload([], [])))
+        available = self.packer.token_budget - overhead
+        kept_stages = self.packer.truncate(stage_rows, available)
+        available -= sum(self.packer.row_tokens(row) for row in kept_stages)
+        kept_edges = self.packer.truncate(edge_rows, available)
+        return compact_json(payload(kept_stages, kept_edges))
 
     def _render_bottleneck_map(self, metrics: Dict[str, object]) -> str:
         lines: List[str] = []
@@ -540,7 +717,8 @@ class BottleneckDetector:
 
         return aggregated_metrics, aggregated_edges
 
-    def _generate_bottleneck_image(self, metrics: Dict[str, object]) -> str | None:
+    def _plan_bottleneck_image(self, metrics: Dict[str, object]) -> Optional[_ImagePlan]:
+        """Everything the chord diagram needs, or None when there is no cross-department flow to draw."""
         stage_metrics: Dict[str, Dict[str, float]] = metrics.get("stage_metrics", {})  # type: ignore[assignment]
         edges: List[Dict[str, object]] = metrics.get("edges", [])  # type: ignore[assignment]
         if not stage_metrics:
@@ -579,17 +757,6 @@ class BottleneckDetector:
         title_size = float(font_cfg.get("title_size", font_cfg.get("size", 15)))
         label_size = float(font_cfg.get("label_size", font_cfg.get("size", 12)))
 
-        def polar(angle: float, radius: float) -> Tuple[float, float]:
-            return (radius * math.cos(angle), radius * math.sin(angle))
-
-        def lighten(color: str, amount: float) -> Tuple[float, float, float]:
-            r, g, b = mcolors.to_rgb(color)
-            return tuple(min(1.0, c + (1.0 - c) * amount) for c in (r, g, b))  # type: ignore[return-value]
-
-        def darken(color: str, factor: float) -> Tuple[float, float, float]:
-            r, g, b = mcolors.to_rgb(color)
-            return tuple(max(0.0, c * factor) for c in (r, g, b))  # type: ignore[return-value]
-
         matrix = [[0.0 for _ in nodes] for _ in nodes]
         for edge in filtered_edges:
             src = str(edge.get("from"))
@@ -609,6 +776,41 @@ class BottleneckDetector:
         if total_flow <= 0:
             return None
 
+        return _ImagePlan(
+            diagram_cfg=diagram_cfg,
+            nodes=nodes,
+            palette=palette,
+            font_family=font_family,
+            title_size=title_size,
+            label_size=label_size,
+            matrix=matrix,
+            row_totals=row_totals,
+            total_flow=total_flow,
+        )
+
+    def _draw_bottleneck_image(self, plan: _ImagePlan) -> str:
+        """Render a planned chord diagram to bottleneck_map.png; the slow part, so callers may defer it."""
+        diagram_cfg = plan.diagram_cfg
+        nodes = plan.nodes
+        palette = plan.palette
+        font_family = plan.font_family
+        title_size = plan.title_size
+        label_size = plan.label_size
+        matrix = plan.matrix
+        row_totals = plan.row_totals
+        total_flow = plan.total_flow
+
+        def polar(angle: float, radius: float) -> Tuple[float, float]:
+            return (radius * math.cos(angle), radius * math.sin(angle))
+
+        def lighten(color: str, amount: float) -> Tuple[float, float, float]:
+            r, g, b = mcolors.to_rgb(color)
+            return tuple(min(1.0, c + (1.0 - c) * amount) for c in (r, g, b))  # type: ignore[return-value]
+
+        def darken(color: str, factor: float) -> Tuple[float, float, float]:
+            r, g, b = mcolors.to_rgb(color)
+            return tuple(max(0.0, c * factor) for c in (r, g, b))  # type: ignore[return-value]
+
         inner_radius = float(diagram_cfg.get("inner_radius", 0.9))
         outer_radius = float(diagram_cfg.get("outer_radius", 1.15))
         tick_length = float(diagram_cfg.get("tick_length", 0.05))
@@ -762,10 +964,16 @@ class BottleneckDetector:
         )
 
         image_path = self.reports_dir / "bottleneck_map.png"
-        fig.savefig(image_path, dpi=200, bbox_inches="tight")
+        with atomic_writer(image_path, durable=self.defer_image) as out:
+            fig.savefig(out, format="png", dpi=200, bbox_inches="tight")
         plt.close(fig)
         return str(image_path)
 
+    def render_pending_image(self) -> Optional[str]:
+        """Draw the image a `defer_image` run planned; its path was already reported by run()."""
+        plan, self._pending_image = self._pending_image, None
+        return self._draw_bottleneck_image(plan) if plan is not None else None
+
     def run(self) -> Dict[str, List]:
         metrics = self._compute_metrics()
         stage_delays = [
@@ -781,7 +989,12 @@ class BottleneckDetector:
             for s, v in metrics.get("stage_metrics", {}).items()
         ]
         bottleneck_map = self._render_bottleneck_map(metrics)
-        bottleneck_image = self._generate_bottleneck_image(metrics)
+        image_plan = self._plan_bottleneck_image(metrics)
+        bottleneck_image = str(self.reports_dir / "bottleneck_map.png") if image_plan is not None else None
+        if self.defer_image:
+            self._pending_image = image_plan
+        elif image_plan is not None:
+            self._draw_bottleneck_image(image_plan)
 
         system_prompt = (
             "You are a workflow diagnostics expert who also acts like an investigative operations analyst. "
@@ -791,8 +1004,6 @@ class BottleneckDetector:
             "and one actionable recommendation. Do not fabricate new roles or metrics. Respond strictly "
             "with JSON that matches the provided schema."
         )
-        user_prompt = self._render_prompt(metrics)
-
         fallback_bottlenecks = []
         stage_metric_values = metrics.get("stage_metrics", {})
         if stage_metric_values:
@@ -873,12 +1084,20 @@ class BottleneckDetector:
                     }
                 )
 
-        result = safe_openai_json(
-            system_prompt,
-            user_prompt,
-            fallback={"bottlenecks": fallback_bottlenecks},
-            temperature=0.1,
-        )
+        if openai_enabled():
+            user_prompt = self._render_prompt(metrics, system_prompt)
+            record_prompt_tokens("bottleneck_detector", system_prompt + user_prompt)
+            result = safe_openai_json(
+                system_prompt,
+                user_prompt,
+                fallback={"bottlenecks": fallback_bottlenecks},
+                temperature=0.1,
+                agent="bottleneck_detector",
+            )
+        else:
+            # Nothing would reach the model: skip the metric tables and use the rule-based findings.
+            note_fallback("bottleneck_detector")
+            result = {"bottlenecks": fallback_bottlenecks}
 
         bottlenecks: List[Bottleneck] = []
         for item in result.get("bottlenecks", []):
@@ -895,9 +1114,9 @@ class BottleneckDetector:
         self.run_store.log(
             self.run_id,
             "bottleneck_detector",
-            inputs={"events": len(self.events)},
+            inputs={"events": self._event_count},
             outputs={
-                "bottlenecks": [b.__dict__ for b in bottlenecks],
+                "bottlenecks": [asdict(b) for b in bottlenecks],
                 "metrics": metrics,
                 "bottleneck_map": bottleneck_map,
                 "bottleneck_image": bottleneck_image,
@@ -1,43 +1,201 @@
 """Data loading helpers for the workflow optimization MVP."""
-import ast
-from typing import List
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 
+from .ids import IdRegistries, build_id_registries
+from .instrumentation import annotate, span
+from .skills import parse_skills_column
+from .snapshots import read_snapshot, snapshot_dir_for, write_snapshot
 
-def _parse_skills(skills_raw: str) -> List[str]:
-    if pd.isna(skills_raw):
-        return []
-    try:
-        parsed = ast.literal_eval(skills_raw)
-        if isinstance(parsed, list):
-            return [str(skill).strip() for skill in parsed]
-    except (ValueError, SyntaxError):
-        pass
-    return [skill.strip() for skill in skills_raw.split(",")]
 
-
-def load_employees(path: str) -> pd.DataFrame:
+def _read_employees_csv(path: Path) -> pd.DataFrame:
     employees = pd.read_csv(path)
-    employees["skills"] = employees["skills"].apply(_parse_skills)
+    employees["skills"] = parse_skills_column(employees["skills"])
     return employees
 
 
-def load_availability(path: str) -> pd.DataFrame:
+def _read_availability_csv(path: Path) -> pd.DataFrame:
     availability = pd.read_csv(path, parse_dates=["date"])
     return availability
 
 
-def load_projects(path: str) -> pd.DataFrame:
+def _read_projects_csv(path: Path) -> pd.DataFrame:
     return pd.read_csv(path, parse_dates=["deadline"])
 
 
-def load_tasks(path: str) -> pd.DataFrame:
+def _read_tasks_csv(path: Path) -> pd.DataFrame:
     tasks = pd.read_csv(path, parse_dates=["start", "due"], keep_default_na=False)
     tasks["status"] = tasks.get("status", "").fillna("")
     tasks["assignee"] = tasks["assignee"].fillna("")
     return tasks
 
 
+EVENT_CATEGORY_COLUMNS = ("task_id", "type", "from_assignee", "to_assignee")
+EVENT_CHUNK_ROWS = 100_000
+
+
+def iter_events(
+    path: str, *, since: Optional[object] = None, chunksize: int = EVENT_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream an events CSV in chunks of at most `chunksize` rows, so logs larger than memory can be consumed
+    piecewise. Timestamps arrive parsed; ids and event types are categoricals. With `since`, older rows
+    are dropped as each chunk is read and chunks left empty are never yielded. The filter runs after a
+    chunk is parsed, so it saves memory and downstream work but not parse time: the CSV has no index to
+    seek by, and the whole file is still read. BottleneckDetector accepts the stream directly and
+    aggregates it chunk by chunk.
+    """
+    cutoff = pd.Timestamp(since) if since is not None else None
+    reader = pd.read_csv(
+        path,
+        parse_dates=["timestamp"],
+        keep_default_na=False,
+        # The parser builds the categoricals itself, without materialising a string per row.
+        dtype={column: "category" for column in EVENT_CATEGORY_COLUMNS},
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            if cutoff is not None:
+                chunk = chunk[chunk["timestamp"] >= cutoff]
+                if chunk.empty:
+                    continue
+            yield chunk
+
+
+def concat_event_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Stack chunks from iter_events into one frame, merging each chunk's categories into one sorted set."""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame(columns=["task_id", "type", "timestamp", "from_assignee", "to_assignee"])
+    for column in EVENT_CATEGORY_COLUMNS:
+        if column in chunks[0].columns:
+            categories = union_categoricals([chunk[column] for chunk in chunks], sort_categories=True).categories
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _read_events_csv(path: Path) -> pd.DataFrame:
+    return concat_event_chunks(iter_events(path))
+
+
+def _prefer_snapshot(path: str, read_csv: Callable[[Path], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Load from the table's columnar snapshot when one was taken from the CSV as it is now. A snapshot
+    left behind by an edited CSV is refreshed from the re-parsed file; none is created implicitly.
+    """
+    path = Path(path)
+    target = snapshot_dir_for(path)
+    if not target.exists():
+        annotate(source="csv")
+        return read_csv(path)
+    frame = read_snapshot(target, path)
+    if frame is None:
+        annotate(source="csv, snapshot refreshed")
+        frame = read_csv(path)
+        write_snapshot(frame, target, path)
+    else:
+        annotate(source="snapshot")
+    return frame
+
+
+def load_employees(path: str) -> pd.DataFrame:
+    return _prefer_snapshot(path, _read_employees_csv)
+
+
+def load_availability(path: str) -> pd.DataFrame:
+    return _prefer_snapshot(path, _read_availability_csv)
+
+
+def load_projects(path: str) -> pd.DataFrame:
+    return _prefer_snapshot(path, _read_projects_csv)
+
+
+def load_tasks(path: str) -> pd.DataFrame:
+    return _prefer_snapshot(path, _read_tasks_csv)
+
+
 def load_events(path: str) -> pd.DataFrame:
-    return pd.read_csv(path, parse_dates=["timestamp"], keep_default_na=False)
+    return _prefer_snapshot(path, _read_events_csv)
+
+
+@dataclass
+class Dataset:
+    """The five input tables, loaded once per run and shared by the agents and the report renderer."""
+
+    data_dir: Path
+    employees: pd.DataFrame
+    availability: pd.DataFrame
+    projects: pd.DataFrame
+    tasks: pd.DataFrame
+    events: pd.DataFrame
+    ids: IdRegistries
+
+
+DATASET_FILES: Dict[str, Tuple[str, Callable[[str], pd.DataFrame]]] = {
+    "employees": ("employees.csv", load_employees),
+    "availability": ("availability.csv", load_availability),
+    "projects": ("projects.csv", load_projects),
+    "tasks": ("tasks.csv", load_tasks),
+    "events": ("events.csv", load_events),
+}
+
+# (resolved path, loader) -> (mtime_ns, size, parsed frame); a changed file replaces its entry.
+_FRAME_CACHE: Dict[Tuple[str, str], Tuple[int, int, pd.DataFrame]] = {}
+_FRAME_CACHE_LOCK = threading.Lock()
+
+
+def _load_cached(path: Path, loader: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+    stat = path.stat()
+    key = (str(path.resolve()), loader.__name__)
+    with _FRAME_CACHE_LOCK:
+        cached = _FRAME_CACHE.get(key)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        frame = loader(path)
+        with _FRAME_CACHE_LOCK:
+            _FRAME_CACHE[key] = (stat.st_mtime_ns, stat.st_size, frame)
+    else:
+        annotate(source="memory")
+        frame = cached[2]
+    # A shallow copy: the column data stays shared with the cache (and memory-mapped when it came from a
+    # snapshot), while adding or replacing columns only touches the caller's frame. Callers must not
+    # write into existing columns in place.
+    return frame.copy(deep=False)
+
+
+def load_dataset(data_dir: Path) -> Dataset:
+    """Load every input table, reusing frames parsed earlier in this process when the files are unchanged."""
+    data_dir = Path(data_dir)
+    frames: Dict[str, pd.DataFrame] = {}
+    for name, (filename, loader) in DATASET_FILES.items():
+        with span(name, "load") as attrs:
+            frames[name] = _load_cached(data_dir / filename, loader)
+            attrs["rows"] = len(frames[name])
+    ids = build_id_registries(frames["employees"], frames["tasks"])
+    return Dataset(data_dir=data_dir, **frames, ids=ids)
+
+
+def snapshot_dataset(data_dir: Path) -> Dict[str, Path]:
+    """Write (or refresh) the columnar snapshot of every input table; returns each table's snapshot directory."""
+    data_dir = Path(data_dir)
+    written: Dict[str, Path] = {}
+    for name, (filename, loader) in DATASET_FILES.items():
+        csv_path = data_dir / filename
+        target = snapshot_dir_for(csv_path)
+        if target.exists():
+            loader(csv_path)  # re-parses and rewrites the snapshot only if the CSV changed
+        else:
+            write_snapshot(loader(csv_path), target, csv_path)
+        written[name] = target
+    return written
+
+
+def clear_dataset_cache() -> None:
+    with _FRAME_CACHE_LOCK:
+        _FRAME_CACHE.clear()
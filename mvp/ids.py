@@ -0,0 +1,59 @@
+"""Dense integer codes for employee and task IDs, assigned once when the dataset is loaded."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class IdRegistry:
+    """
+    Maps each distinct ID to a dense int code in first-seen order. Codes equal a table's row positions only
+    while its IDs are unique; a repeated ID keeps the code of its first row. Unknown IDs code to -1.
+    """
+
+    def __init__(self, labels: Iterable[object]):
+        self.labels = pd.Index(pd.unique(pd.Series([str(label) for label in labels], dtype=object)), dtype=object)
+        self._codes: Dict[str, int] = {label: code for code, label in enumerate(self.labels)}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def code(self, label: object) -> int:
+        return self._codes.get(str(label), -1)
+
+    def codes(self, values: Iterable[object]) -> np.ndarray:
+        """Vectorized lookup: an int32 array of codes, -1 where the value is not registered."""
+        values = pd.Index([str(value) for value in values], dtype=object)
+        return self.labels.get_indexer(values).astype(np.int32)
+
+
+class RecordLookup:
+    """
+    A table's rows addressed by ID through its registry's codes; built once and shared by every renderer.
+    A duplicated ID resolves to its last row, as the dict it replaced did.
+    """
+
+    def __init__(self, registry: IdRegistry, frame: pd.DataFrame, column: str = "id"):
+        self.registry = registry
+        self._records: List[Optional[Dict[str, object]]] = [None] * len(registry)
+        for code, record in zip(registry.codes(frame[column]), frame.to_dict("records")):
+            if code >= 0:
+                self._records[code] = {key: value for key, value in record.items() if key != column}
+
+    def get(self, label: object, default: Optional[Dict[str, object]] = None) -> Optional[Dict[str, object]]:
+        code = self.registry.code(label)
+        record = self._records[code] if code >= 0 else None
+        return default if record is None else record
+
+
+@dataclass
+class IdRegistries:
+    employees: IdRegistry
+    tasks: IdRegistry
+
+
+def build_id_registries(employees: pd.DataFrame, tasks: pd.DataFrame) -> IdRegistries:
+    return IdRegistries(employees=IdRegistry(employees["id"]), tasks=IdRegistry(tasks["id"]))
@@ -0,0 +1,132 @@
+"""Lightweight timing spans for a run: agents, LLM calls, table loads and output artifacts."""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# Attributes of the innermost open span in this thread/task, so nested code can annotate it.
+_CURRENT_ATTRS: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("span_attrs", default=None)
+
+
+@dataclass(frozen=True, slots=True)
+class Span:
+    name: str
+    category: str
+    started: float  # seconds since the tracer was reset
+    seconds: float
+    thread: str
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Collects spans from every thread of a run. A span costs two clock reads and a locked append, so
+    tracing stays on for every run; exporting (run store, Chrome trace, timing table) happens at the end.
+    """
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time the block; the yielded dict (also reachable through `annotate`) becomes the span's attributes."""
+        token = _CURRENT_ATTRS.set(attrs)
+        started = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as exc:
+            attrs.setdefault("error", type(exc).__name__)
+            raise
+        finally:
+            finished = time.perf_counter()
+            _CURRENT_ATTRS.reset(token)
+            self.record(name, category, started, finished, attrs)
+
+    def record(self, name: str, category: str, started: float, finished: float, attrs: Optional[Dict[str, Any]] = None) -> None:
+        """Add a span timed elsewhere; `started`/`finished` are time.perf_counter() readings."""
+        span = Span(
+            name=name,
+            category=category,
+            started=round(started - self.origin, 6),
+            seconds=round(finished - started, 6),
+            thread=threading.current_thread().name,
+            attrs=dict(attrs or {}),
+        )
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return sorted(self._spans, key=lambda span: span.started)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace-event JSON (chrome://tracing, Perfetto, speedscope): one track per thread."""
+        spans = self.spans()
+        thread_ids: Dict[str, int] = {}
+        events: List[Dict[str, Any]] = []
+        for span in spans:
+            tid = thread_ids.setdefault(span.thread, len(thread_ids) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.started * 1e6, 1),
+                    "dur": round(span.seconds * 1e6, 1),
+                    "pid": 1,
+                    "tid": tid,
+                    "args": span.attrs,
+                }
+            )
+        names = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}}
+            for thread, tid in thread_ids.items()
+        ]
+        return {"traceEvents": names + events, "displayTimeUnit": "ms"}
+
+    def stage_table(self) -> List[Dict[str, Any]]:
+        """Per (category, name) totals in first-seen order: calls, total/mean/max seconds."""
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        for span in self.spans():
+            row = rows.setdefault(
+                (span.category, span.name),
+                {"category": span.category, "name": span.name, "calls": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+            )
+            row["calls"] += 1
+            row["total_seconds"] += span.seconds
+            row["max_seconds"] = max(row["max_seconds"], span.seconds)
+        for row in rows.values():
+            row["mean_seconds"] = row["total_seconds"] / row["calls"]
+        return list(rows.values())
+
+
+_TRACER = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _TRACER
+
+
+def reset_tracer() -> Tracer:
+    """Start a fresh trace (the orchestrator does this at the start of every run)."""
+    global _TRACER
+    _TRACER = Tracer()
+    return _TRACER
+
+
+def span(name: str, category: str, **attrs: Any):
+    """`with span("employees", "load"):` on the current run's tracer."""
+    return _TRACER.span(name, category, **attrs)
+
+
+def annotate(**attrs: Any) -> None:
+    """Add attributes to the innermost open span, if any (e.g. response sizes from inside an LLM call)."""
+    current = _CURRENT_ATTRS.get()
+    if current is not None:
+        current.update(attrs)
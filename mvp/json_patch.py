@@ -0,0 +1,77 @@
+"""Minimal RFC 6902 JSON Patch (add/remove/replace) for delta-encoding similar payloads."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Operations that turn `old` into `new`; lists are diffed by position, which suits appended/edited rows."""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(old, dict):
+        ops: List[Dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(str(key))}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(str(key))}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(make_patch(old[key], value, child))
+        return ops
+    if isinstance(old, list):
+        ops = []
+        common = min(len(old), len(new))
+        for index in range(common):
+            ops.extend(make_patch(old[index], new[index], f"{path}/{index}"))
+        # Remove from the end so earlier indices stay valid while the patch is applied.
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/-", "value": new[index]})
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(document: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Apply operations in order, mutating `document` where possible; returns the patched document."""
+    for operation in patch:
+        op, path = operation["op"], operation["path"]
+        if path == "":
+            if op == "remove":
+                document = None
+            else:
+                document = operation["value"]
+            continue
+        tokens = [_unescape(token) for token in path.split("/")[1:]]
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if op == "add":
+                if last == "-":
+                    parent.append(operation["value"])
+                else:
+                    parent.insert(int(last), operation["value"])
+            elif op == "remove":
+                del parent[int(last)]
+            else:
+                parent[int(last)] = operation["value"]
+        else:
+            if op == "remove":
+                del parent[last]
+            else:
+                parent[last] = operation["value"]
+    return document
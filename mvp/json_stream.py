@@ -0,0 +1,136 @@
+"""Incremental extraction of array items from a JSON completion as its text streams in."""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Outside strings only brackets and quotes change parser state; inside strings only quotes and escapes do.
+# Jumping between these with a regex keeps the per-character work in C.
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+@dataclass(frozen=True)
+class ItemSchema:
+    """Required keys and accepted types for one array item; extra keys pass through untouched."""
+
+    required: Dict[str, Tuple[type, ...]]
+    optional: Dict[str, Tuple[type, ...]] = field(default_factory=dict)
+
+    def problem(self, item: Any) -> Optional[str]:
+        """Describe why item does not fit the schema, or None when it does."""
+        if not isinstance(item, dict):
+            return f"expected an object, got {type(item).__name__}"
+        for key, types in self.required.items():
+            if item.get(key) is None:
+                return f"missing {key!r}"
+            if not isinstance(item[key], types):
+                return f"{key!r} has type {type(item[key]).__name__}"
+        for key, types in self.optional.items():
+            if item.get(key) is not None and not isinstance(item[key], types):
+                return f"{key!r} has type {type(item[key]).__name__}"
+        return None
+
+
+class JSONArrayItemStream:
+    """
+    Feed completion text chunk by chunk; each object inside the top-level `array_key` array is decoded
+    once, as soon as its closing brace arrives. Text before the first '{' (prose, code fences) is skipped,
+    and a truncated tail only loses the item that was cut off.
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.complete = False
+        self.malformed = 0
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume one chunk and return the items it completed, in order."""
+        if self.complete or not chunk:
+            return []
+        self._buf += chunk
+        items: List[Any] = []
+        buf = self._buf
+        pos = self._pos
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buf):
+                        # The escaped character has not arrived yet; resume at the backslash.
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                if self._depth == 1 and not self._in_array:
+                    self._last_key = buf[self._string_start : pos]
+                continue
+
+            if self._depth == 0:
+                # Skip anything ahead of the top-level object, e.g. a ```json fence or a preamble.
+                start = buf.find("{", pos)
+                if start == -1:
+                    pos = len(buf)
+                    break
+                self._depth = 1
+                pos = start + 1
+                continue
+
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+                self._string_start = match.start()
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_key == f'"{self.array_key}"':
+                    self._in_array = True
+                elif char == "{" and self._in_array and self._depth == 2:
+                    self._item_start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._in_array and self._depth == 2 and self._item_start is not None:
+                    try:
+                        items.append(json.loads(buf[self._item_start : pos]))
+                    except json.JSONDecodeError:
+                        self.malformed += 1
+                    self._item_start = None
+                elif self._in_array and self._depth == 1:
+                    self._in_array = False
+                elif self._depth == 0:
+                    self.complete = True
+                    break
+        # Drop text that can no longer matter so long responses do not grow the buffer.
+        keep_from = pos
+        if self._item_start is not None:
+            keep_from = self._item_start
+        elif self._in_string:
+            keep_from = self._string_start
+        if keep_from:
+            self._buf = buf[keep_from:]
+            if self._item_start is not None:
+                self._item_start -= keep_from
+            if self._in_string:
+                self._string_start -= keep_from
+            pos -= keep_from
+        self._pos = pos
+        return items
@@ -1,16 +1,59 @@
 """Shared helpers for OpenAI-backed agents with graceful fallbacks."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import os
-import inspect
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from openai import OpenAI
+from openai import (
+    DEFAULT_CONNECTION_LIMITS,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    AuthenticationError,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+    RateLimitError,
+    Timeout,
+)
+
+from .instrumentation import annotate, get_tracer, span
+from .json_stream import ItemSchema, JSONArrayItemStream
 
 _FORCE_OPENAI_FALLBACK = False
 
+CACHE_MODES = ("off", "read", "readwrite")
+# Only near-deterministic completions are worth replaying; higher temperatures are meant to vary.
+CACHEABLE_MAX_TEMPERATURE = 0.2
+DEFAULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_OPENAI_TIMEOUT_SECONDS = 120.0
+DEFAULT_OPENAI_CONNECT_TIMEOUT_SECONDS = 10.0
+DEFAULT_OPENAI_MAX_CONNECTIONS = 20
+_UNAVAILABLE_MESSAGES = {
+    "disabled": "OpenAI usage disabled via CLI flag; forcing fallback.",
+    "missing_api_key": "OPENAI_API_KEY not set; cannot call OpenAI API.",
+}
+
+
+class OpenAIUnavailableError(RuntimeError):
+    """Raised before any request is made when OpenAI cannot be used; `reason` is a telemetry tag."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
 
 def set_force_openai_fallback(force: bool) -> None:
     """Toggle a global switch that bypasses OpenAI calls even if API keys are configured."""
@@ -18,6 +61,356 @@ def set_force_openai_fallback(force: bool) -> None:
     _FORCE_OPENAI_FALLBACK = force
 
 
+class ResponseCache:
+    """Content-addressed SQLite cache of raw completion text with TTL expiry and size-based LRU eviction."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        mode: str = "readwrite",
+        ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {', '.join(CACHE_MODES)}.")
+        self.db_path = Path(db_path)
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if mode != "off":
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: object) -> str:
+        return hashlib.sha256(json.dumps(parts, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str, *, record_stats: bool = True) -> Optional[str]:
+        """Cached value for `key`; record_stats=False keeps the lookup out of the hit/miss counters."""
+        if self._conn is None:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds):
+                if record_stats:
+                    self.misses += 1
+                if row is not None and self.mode == "readwrite":
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                return None
+            if record_stats:
+                self.hits += 1
+            if self.mode == "readwrite":
+                self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return row[0]
+
+    def has_entries(self) -> bool:
+        """Whether any unexpired completion could be replayed."""
+        if self._conn is None:
+            return False
+        oldest = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM llm_cache WHERE created_at >= ? LIMIT 1", (oldest,)).fetchone()
+        return row is not None
+
+    def put(self, key: str, value: str) -> None:
+        if self._conn is None or self.mode != "readwrite":
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self.writes += 1
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        assert self._conn is not None
+        if self.ttl_seconds > 0:
+            expired = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            self.evictions += max(expired, 0)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least-recently-used entries until the cache is back under its size cap.
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.writes = self.evictions = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_RESPONSE_CACHE: Optional[ResponseCache] = None
+
+
+def configure_response_cache(
+    db_path: Path,
+    mode: str = "readwrite",
+    *,
+    ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+) -> Optional[ResponseCache]:
+    """Install the process-wide response cache used by call_openai_json (mode "off" disables it)."""
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is not None:
+        _RESPONSE_CACHE.close()
+    _RESPONSE_CACHE = None
+    if mode != "off":
+        _RESPONSE_CACHE = ResponseCache(db_path, mode=mode, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+    return _RESPONSE_CACHE
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _RESPONSE_CACHE
+
+
+def active_response_cache(temperature: float = 0.2) -> Optional[ResponseCache]:
+    """The cache to consult for a call at this temperature, or None when caching does not apply."""
+    if _FORCE_OPENAI_FALLBACK or temperature > CACHEABLE_MAX_TEMPERATURE:
+        return None
+    return _RESPONSE_CACHE
+
+
+def resolve_model(model: Optional[str] = None) -> str:
+    return model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+
+def response_cache_stats() -> Dict[str, object]:
+    if _RESPONSE_CACHE is None:
+        return {"mode": "off", "hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+    return _RESPONSE_CACHE.stats()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """HTTP settings shared by every pooled OpenAI client."""
+
+    timeout_seconds: float = DEFAULT_OPENAI_TIMEOUT_SECONDS
+    connect_timeout_seconds: float = DEFAULT_OPENAI_CONNECT_TIMEOUT_SECONDS
+    max_connections: int = DEFAULT_OPENAI_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_OPENAI_MAX_CONNECTIONS
+    keepalive_expiry_seconds: float = 60.0
+    max_retries: int = 2
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        max_connections = _env_int("OPENAI_MAX_CONNECTIONS", DEFAULT_OPENAI_MAX_CONNECTIONS)
+        return cls(
+            timeout_seconds=_env_float("OPENAI_TIMEOUT_SECONDS", DEFAULT_OPENAI_TIMEOUT_SECONDS),
+            connect_timeout_seconds=_env_float(
+                "OPENAI_CONNECT_TIMEOUT_SECONDS", DEFAULT_OPENAI_CONNECT_TIMEOUT_SECONDS
+            ),
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            max_retries=_env_int("OPENAI_MAX_RETRIES", 2),
+        )
+
+    def http_options(self) -> Dict[str, Any]:
+        # Build Limits from the HTTP library the installed openai SDK ships with rather than importing it directly.
+        limits_type = type(DEFAULT_CONNECTION_LIMITS)
+        return {
+            "timeout": Timeout(self.timeout_seconds, connect=self.connect_timeout_seconds),
+            "limits": limits_type(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry_seconds,
+            ),
+        }
+
+
+_CLIENT_SETTINGS: Optional[ClientSettings] = None
+_CLIENTS: Dict[Tuple[str, Optional[str]], OpenAI] = {}
+# Async clients own connections bound to one event loop, so they are registered per loop.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str]], AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+_CLIENTS_LOCK = threading.Lock()
+
+
+def configure_openai_client(settings: Optional[ClientSettings] = None, **overrides: Any) -> ClientSettings:
+    """Set pool/timeout settings for pooled clients; existing clients are closed and rebuilt lazily."""
+    global _CLIENT_SETTINGS
+    base = settings or ClientSettings.from_env()
+    resolved = replace(base, **overrides) if overrides else base
+    close_openai_clients()
+    with _CLIENTS_LOCK:
+        _CLIENT_SETTINGS = resolved
+    return resolved
+
+
+def _client_settings() -> ClientSettings:
+    global _CLIENT_SETTINGS
+    if _CLIENT_SETTINGS is None:
+        _CLIENT_SETTINGS = ClientSettings.from_env()
+    return _CLIENT_SETTINGS
+
+
+def get_openai_client(api_key: Optional[str] = None) -> OpenAI:
+    """Process-wide OpenAI client per (api key, base URL) with a keep-alive connection pool."""
+    resolved_key = api_key or _require_api_key()
+    registry_key = (resolved_key, os.getenv("OPENAI_BASE_URL") or None)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(registry_key)
+        if client is None:
+            settings = _client_settings()
+            client = OpenAI(
+                api_key=resolved_key,
+                base_url=registry_key[1],
+                max_retries=settings.max_retries,
+                http_client=DefaultHttpxClient(**settings.http_options()),
+            )
+            _CLIENTS[registry_key] = client
+        return client
+
+
+def get_async_openai_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """Async twin of get_openai_client; must be called from inside a running event loop."""
+    loop = asyncio.get_running_loop()
+    resolved_key = api_key or _require_api_key()
+    registry_key = (resolved_key, os.getenv("OPENAI_BASE_URL") or None)
+    with _CLIENTS_LOCK:
+        loop_clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = loop_clients.get(registry_key)
+        if client is None:
+            settings = _client_settings()
+            client = AsyncOpenAI(
+                api_key=resolved_key,
+                base_url=registry_key[1],
+                max_retries=settings.max_retries,
+                http_client=DefaultAsyncHttpxClient(**settings.http_options()),
+            )
+            loop_clients[registry_key] = client
+        return client
+
+
+def close_openai_clients() -> None:
+    """Close pooled sync clients and forget async ones (their loops close their transports)."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+        _ASYNC_CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+def _require_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise OpenAIUnavailableError("missing_api_key", _UNAVAILABLE_MESSAGES["missing_api_key"])
+    return api_key
+
+
+def _completion_request(model: str, system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": temperature,
+    }
+
+
+def _cached_lookup(
+    system_prompt: str, user_prompt: str, model: Optional[str], temperature: float
+) -> Tuple[str, Optional[ResponseCache], str, Optional[str]]:
+    """Resolve the model and consult the response cache; returns (model, cache, key, cached content)."""
+    if _FORCE_OPENAI_FALLBACK:
+        raise OpenAIUnavailableError("disabled", _UNAVAILABLE_MESSAGES["disabled"])
+
+    resolved_model = resolve_model(model)
+    cache = active_response_cache(temperature)
+    if cache is None:
+        return resolved_model, None, "", None
+    cache_key = ResponseCache.make_key(resolved_model, temperature, system_prompt, user_prompt)
+    return resolved_model, cache, cache_key, cache.get(cache_key)
+
+
+def _llm_span(tag: str, model: Optional[str], system_prompt: str, user_prompt: str):
+    """Span around one LLM call; the call annotates it with response size, tokens and cache use."""
+    prompt_bytes = len(system_prompt.encode("utf-8")) + len(user_prompt.encode("utf-8"))
+    return span(tag, "llm", model=resolve_model(model), prompt_bytes=prompt_bytes)
+
+
+def _annotate_completion(completion: Any, content: Optional[str]) -> None:
+    usage = getattr(completion, "usage", None)
+    tokens = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens} if usage else {}
+    annotate(cached=False, response_bytes=len((content or "").encode("utf-8")), **tokens)
+
+
+def _finish_completion(content: Optional[str], cache: Optional[ResponseCache], cache_key: str) -> Dict[str, Any]:
+    raw = content or "{}"
+    parsed = _parse_json_response(raw)
+    if cache is not None:
+        # Store only after a successful parse so malformed completions are retried next run.
+        cache.put(cache_key, raw)
+    return parsed
+
+
 def call_openai_json(
     system_prompt: str,
     user_prompt: str,
@@ -26,25 +419,162 @@ def call_openai_json(
 ) -> Dict[str, Any]:
     """Returns parsed JSON from an OpenAI chat completion."""
 
-    if _FORCE_OPENAI_FALLBACK:
-        raise RuntimeError("OpenAI usage disabled via CLI flag; forcing fallback.")
+    resolved_model, cache, cache_key, cached = _cached_lookup(system_prompt, user_prompt, model, temperature)
+    if cached is not None:
+        annotate(cached=True, response_bytes=len(cached.encode("utf-8")))
+        return _parse_json_response(cached)
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY not set; cannot call OpenAI API.")
-
-    client = OpenAI(api_key=api_key)
+    client = get_openai_client()
     completion = client.chat.completions.create(
-        model=model or os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        response_format={"type": "json_object"},
-        temperature=temperature,
+        **_completion_request(resolved_model, system_prompt, user_prompt, temperature)
+    )
+    content = completion.choices[0].message.content
+    _annotate_completion(completion, content)
+    return _finish_completion(content, cache, cache_key)
+
+
+async def acall_openai_json(
+    system_prompt: str,
+    user_prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+) -> Dict[str, Any]:
+    """Async twin of call_openai_json for callers fanning out concurrent requests."""
+
+    resolved_model, cache, cache_key, cached = _cached_lookup(system_prompt, user_prompt, model, temperature)
+    if cached is not None:
+        annotate(cached=True, response_bytes=len(cached.encode("utf-8")))
+        return _parse_json_response(cached)
+
+    client = get_async_openai_client()
+    completion = await client.chat.completions.create(
+        **_completion_request(resolved_model, system_prompt, user_prompt, temperature)
     )
-    content = completion.choices[0].message.content or "{}"
-    return _parse_json_response(content)
+    content = completion.choices[0].message.content
+    _annotate_completion(completion, content)
+    return _finish_completion(content, cache, cache_key)
+
+
+def _stream_completion_text(
+    client: OpenAI, model: str, system_prompt: str, user_prompt: str, temperature: float
+) -> Iterator[str]:
+    with client.chat.completions.create(
+        **_completion_request(model, system_prompt, user_prompt, temperature), stream=True
+    ) as stream:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class FallbackTelemetry:
+    """Thread-safe counters of fallback usage per (agent, reason), plus the latest message for each."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._last_message: Dict[Tuple[str, str], str] = {}
+
+    def record(self, agent: str, reason: str, message: str) -> int:
+        """Count one fallback and return how many times this (agent, reason) pair has now occurred."""
+        key = (agent, reason)
+        with self._lock:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            self._last_message[key] = message
+            return count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._last_message.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            entries = [
+                {"agent": agent, "reason": reason, "count": count, "last_message": self._last_message[(agent, reason)]}
+                for (agent, reason), count in sorted(self._counts.items())
+            ]
+        by_agent: Dict[str, int] = {}
+        for entry in entries:
+            by_agent[entry["agent"]] = by_agent.get(entry["agent"], 0) + entry["count"]
+        return {"total": sum(by_agent.values()), "by_agent": by_agent, "entries": entries}
+
+
+_FALLBACK_TELEMETRY = FallbackTelemetry()
+
+
+def fallback_telemetry() -> Dict[str, object]:
+    return _FALLBACK_TELEMETRY.snapshot()
+
+
+def reset_fallback_telemetry() -> None:
+    _FALLBACK_TELEMETRY.reset()
+
+
+def _fallback_reason(exc: BaseException) -> str:
+    if isinstance(exc, OpenAIUnavailableError):
+        return exc.reason
+    if isinstance(exc, json.JSONDecodeError):
+        return "invalid_json"
+    if isinstance(exc, APITimeoutError):
+        return "timeout"
+    if isinstance(exc, APIConnectionError):
+        return "connection_error"
+    if isinstance(exc, RateLimitError):
+        return "rate_limited"
+    if isinstance(exc, AuthenticationError):
+        return "auth_error"
+    if isinstance(exc, APIStatusError):
+        return "api_error"
+    return "error"
+
+
+def _caller_tag(depth: int = 2) -> str:
+    """`module:function` of the first frame outside this module; a few attribute reads, no stack walk."""
+    try:
+        frame = sys._getframe(depth)
+    except ValueError:
+        return "unknown"
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    module = str(frame.f_globals.get("__name__", "")).rsplit(".", 1)[-1]
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _record_fallback(agent: Optional[str], exc: BaseException) -> None:
+    _count_fallback(agent or _caller_tag(3), _fallback_reason(exc), str(exc))
+
+
+def _count_fallback(tag: str, reason: str, message: str) -> None:
+    # Warn once per agent/reason; repeats are counted and surfaced in the run report. A forced
+    # fallback is announced by the CLI already, so it is only counted.
+    if _FALLBACK_TELEMETRY.record(tag, reason, message) == 1 and reason != "disabled":
+        print(f"[WARN] [{tag}] OpenAI call failed, using fallback. Reason: {message}")
+
+
+def openai_unavailable_reason(temperature: float = 0.2) -> Optional[str]:
+    """Why an OpenAI call at this temperature would fail before any request is made, or None if it may proceed."""
+    if _FORCE_OPENAI_FALLBACK:
+        return "disabled"
+    # Without a key only a cache replay can succeed: the call must be cacheable and the cache non-empty.
+    if not os.getenv("OPENAI_API_KEY"):
+        cache = active_response_cache(temperature)
+        if cache is None or not cache.has_entries():
+            return "missing_api_key"
+    return None
+
+
+def openai_enabled(temperature: float = 0.2) -> bool:
+    """Cheap capability check so agents can skip prompt construction when every call would fall back."""
+    return openai_unavailable_reason(temperature) is None
+
+
+def note_fallback(agent: str, reason: Optional[str] = None) -> None:
+    """Count a fallback taken without attempting a call, e.g. after openai_enabled() returned False."""
+    resolved = reason or openai_unavailable_reason() or "error"
+    _count_fallback(agent, resolved, _UNAVAILABLE_MESSAGES.get(resolved, "OpenAI call skipped."))
 
 
 def safe_openai_json(
@@ -53,16 +583,103 @@ def safe_openai_json(
     fallback: Dict[str, Any],
     model: Optional[str] = None,
     temperature: float = 0.2,
+    *,
+    agent: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Attempts an OpenAI JSON call, returning fallback on any failure."""
 
+    tag = agent or _caller_tag(2)
+    with _llm_span(tag, model, system_prompt, user_prompt) as attrs:
+        try:
+            return call_openai_json(system_prompt, user_prompt, model=model, temperature=temperature)
+        except Exception as exc:  # noqa: BLE001
+            attrs["fallback"] = _fallback_reason(exc)
+            _record_fallback(tag, exc)
+            return fallback
+
+
+async def asafe_openai_json(
+    system_prompt: str,
+    user_prompt: str,
+    fallback: Dict[str, Any],
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    *,
+    agent: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Async twin of safe_openai_json."""
+
+    tag = agent or _caller_tag(2)
+    with _llm_span(tag, model, system_prompt, user_prompt) as attrs:
+        try:
+            return await acall_openai_json(system_prompt, user_prompt, model=model, temperature=temperature)
+        except Exception as exc:  # noqa: BLE001
+            attrs["fallback"] = _fallback_reason(exc)
+            _record_fallback(tag, exc)
+            return fallback
+
+
+def safe_stream_openai_json_items(
+    system_prompt: str,
+    user_prompt: str,
+    array_key: str,
+    *,
+    schema: Optional[ItemSchema] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    agent: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a JSON completion and yield each item of its `array_key` array as soon as it is complete.
+    Items that fail `schema` are dropped, and a failed or truncated call simply ends the iteration, so
+    callers keep what already arrived and fill the remaining gaps from their fallback.
+    """
+
+    tag = agent or _caller_tag(2)
+    parser = JSONArrayItemStream(array_key)
+    # Timed by hand rather than with span(): the consumer runs between yields, so no span may stay current.
+    started = time.perf_counter()
+    attrs: Dict[str, Any] = {
+        "model": resolve_model(model),
+        "prompt_bytes": len(system_prompt.encode("utf-8")) + len(user_prompt.encode("utf-8")),
+        "response_bytes": 0,
+        "items": 0,
+    }
     try:
-        return call_openai_json(system_prompt, user_prompt, model=model, temperature=temperature)
+        resolved_model, cache, cache_key, cached = _cached_lookup(system_prompt, user_prompt, model, temperature)
+        attrs["cached"] = cached is not None
+        if cached is not None:
+            chunks: Iterable[str] = (cached,)
+            cache = None
+        else:
+            chunks = _stream_completion_text(
+                get_openai_client(), resolved_model, system_prompt, user_prompt, temperature
+            )
+        received: List[str] = []
+        rejected = 0
+        for chunk in chunks:
+            attrs["response_bytes"] += len(chunk.encode("utf-8"))
+            if cache is not None:
+                received.append(chunk)
+            for item in parser.feed(chunk):
+                problem = schema.problem(item) if schema is not None else None
+                if problem is not None:
+                    rejected += 1
+                    _count_fallback(tag, "invalid_item", f"Dropped malformed {array_key!r} item: {problem}")
+                    continue
+                attrs["items"] += 1
+                yield item
+        if not parser.complete:
+            raise json.JSONDecodeError("Completion ended before the JSON object closed", "", 0)
+        if parser.malformed:
+            _count_fallback(tag, "invalid_item", f"Dropped {parser.malformed} undecodable {array_key!r} item(s).")
+        elif cache is not None and not rejected:
+            cache.put(cache_key, "".join(received))
     except Exception as exc:  # noqa: BLE001
-        context = _caller_context()
-        context_note = f" [{context}]" if context else ""
-        print(f"[WARN]{context_note} OpenAI call failed, using fallback. Reason: {exc}")
-        return fallback
+        attrs["fallback"] = _fallback_reason(exc)
+        _count_fallback(tag, attrs["fallback"], str(exc))
+    finally:
+        get_tracer().record(tag, "llm", started, time.perf_counter(), attrs)
 
 
 def _strip_code_fence(payload: str) -> str:
@@ -79,57 +696,26 @@ def _strip_code_fence(payload: str) -> str:
     return body.strip()
 
 
-def _slice_json_block(payload: str) -> str:
-    """Return the substring spanning the outermost JSON object/array if found."""
-    for open_char, close_char in [("{", "}"), ("[", "]")]:
-        start = payload.find(open_char)
-        end = payload.rfind(close_char)
-        if start != -1 and end != -1 and start < end:
-            return payload[start : end + 1]
-    return payload
-
-
-def _candidate_payloads(raw: str) -> Iterable[str]:
-    yield raw
-    stripped = raw.strip()
-    if stripped != raw:
-        yield stripped
-    fence_stripped = _strip_code_fence(raw)
-    if fence_stripped not in {raw, stripped}:
-        yield fence_stripped
-    sliced = _slice_json_block(fence_stripped)
-    if sliced not in {raw, stripped, fence_stripped}:
-        yield sliced
+_JSON_DECODER = json.JSONDecoder()
 
 
 def _parse_json_response(payload: str) -> Dict[str, Any]:
-    """Attempt multiple cleanup strategies before giving up on malformed JSON."""
-    last_error: Optional[json.JSONDecodeError] = None
-    for candidate in _candidate_payloads(payload):
-        try:
-            return json.loads(candidate)
-        except json.JSONDecodeError as exc:
-            last_error = exc
-    if last_error:
-        raise last_error
-    return {}
-
-
-def _caller_context() -> str:
-    """Return first stack frame outside this module for logging context."""
+    """
+    Parse the completion once; on failure, drop a code fence and any prose around the outermost
+    object/array and decode it in place with raw_decode instead of re-parsing cleaned copies.
+    """
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError as exc:
+        first_error = exc
+    body = _strip_code_fence(payload)
+    start = body.find("{")
+    if start == -1:
+        start = body.find("[")
+    if start == -1:
+        raise first_error
     try:
-        stack = inspect.stack()
-        current_file = Path(__file__).resolve()
-        for frame_info in stack[1:]:
-            frame_path = Path(frame_info.filename).resolve()
-            if frame_path == current_file:
-                continue
-            rel_path = frame_path
-            try:
-                rel_path = frame_path.relative_to(Path.cwd())
-            except ValueError:
-                rel_path = frame_path
-            return f"{rel_path}:{frame_info.lineno} ({frame_info.function})"
-    except Exception:  # noqa: BLE001
-        return ""
-    return ""
+        parsed, _ = _JSON_DECODER.raw_decode(body, start)
+    except json.JSONDecodeError:
+        raise first_error from None
+    return parsed
@@ -1,22 +1,65 @@
 """LangGraph orchestrator chaining OpenAI agents."""
 from __future__ import annotations
 
-import json
+import time
 import uuid
 from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, List, TypedDict
+from typing import Annotated, Callable, Dict, List, Optional, Tuple, TypedDict, Union
 
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
 
 from .ai_opportunity import AIOpportunityScout
 from .bottleneck_detector import BottleneckDetector
-from .data_loader import load_availability, load_employees, load_events, load_projects, load_tasks
+from .data_loader import Dataset, load_dataset
+from .instrumentation import get_tracer, reset_tracer
+from .llm_utils import fallback_telemetry, get_response_cache, reset_fallback_telemetry, response_cache_stats
+from .output_stage import ArtifactTiming, OutputStage
+from .prompt_packing import prompt_token_summary, reset_prompt_token_summary
 from .resource_allocation import Assignment, ResourceAllocationAgent
 from .run_store import RunStore
 from .workflow_recommender import WorkflowRecommender
 
 
+# Node -> nodes it must wait for. Allocation, AI scouting and bottleneck detection only read the loaded
+# data, so they run as parallel branches and join before the recommender.
+NODE_DEPENDENCIES: Dict[str, List[str]] = {
+    "allocation": [],
+    "ai_scout": [],
+    "bottlenecks": [],
+    "recommend": ["allocation", "ai_scout", "bottlenecks"],
+}
+
+
+def _merge_timings(left: Dict[str, Dict[str, float]], right: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Reducer for node_timings: parallel branches each contribute their own entry in the same step."""
+    return {**(left or {}), **(right or {})}
+
+
+def critical_path(timings: Dict[str, Dict[str, float]]) -> Dict[str, object]:
+    """Longest chain of node durations through NODE_DEPENDENCIES; it bounds the graph's wall time."""
+    finish: Dict[str, float] = {}
+    via: Dict[str, Optional[str]] = {}
+
+    def resolve(node: str) -> float:
+        if node not in finish:
+            upstream = [(resolve(dep), dep) for dep in NODE_DEPENDENCIES.get(node, []) if dep in timings]
+            longest, previous = max(upstream, default=(0.0, None))
+            finish[node] = longest + timings[node]["seconds"]
+            via[node] = previous
+        return finish[node]
+
+    if not timings:
+        return {"path": [], "seconds": 0.0}
+    last = max(timings, key=lambda name: (resolve(name), timings[name]["finished"]))
+    path = []
+    node: Optional[str] = last
+    while node is not None:
+        path.append(node)
+        node = via[node]
+    return {"path": path[::-1], "seconds": round(finish[last], 3)}
+
+
 class WorkflowState(TypedDict, total=False):
     run_id: str
     employees: object
@@ -33,32 +76,52 @@ class WorkflowState(TypedDict, total=False):
     bottleneck_map: str
     bottleneck_image: str
     recommendations: List[str]
+    node_timings: Annotated[Dict[str, Dict[str, float]], _merge_timings]
 
 
 class Orchestrator:
-    def __init__(self, data_dir: Path, reports_dir: Path, *, test_mode: bool = False):
+    def __init__(
+        self,
+        data_dir: Path,
+        reports_dir: Path,
+        *,
+        test_mode: bool = False,
+        prompt_token_budget: Optional[int] = None,
+        compact_reports: bool = False,
+    ):
         self.data_dir = data_dir
         self.reports_dir = reports_dir
         self.reports_dir.mkdir(parents=True, exist_ok=True)
         self.run_store = RunStore(self.reports_dir / "agent_runs.db")
         self.test_mode = test_mode
-
-    def _load_data(self) -> Dict[str, object]:
-        employees = load_employees(self.data_dir / "employees.csv")
-        availability = load_availability(self.data_dir / "availability.csv")
-        projects = load_projects(self.data_dir / "projects.csv")
-        tasks = load_tasks(self.data_dir / "tasks.csv")
-        events = load_events(self.data_dir / "events.csv")
-        return {
-            "employees": employees,
-            "availability": availability,
-            "projects": projects,
-            "tasks": tasks,
-            "events": events,
-        }
+        self.prompt_token_budget = prompt_token_budget
+        self.compact_reports = compact_reports
+        # Input tables of the most recent run(), for callers that render reports from the same data.
+        self.dataset: Optional[Dataset] = None
+        self._render_image: Optional[Callable[[], Optional[str]]] = None
+        # Per-artifact timings of the last output stage run by run(write_reports=True).
+        self.output_timings: List[ArtifactTiming] = []
 
     def _build_graph(self):
         graph = StateGraph(WorkflowState)
+        graph_start = time.perf_counter()
+
+        def timed(name: str, node: Callable[[WorkflowState], WorkflowState]) -> Callable[[WorkflowState], WorkflowState]:
+            def run_node(state: WorkflowState) -> WorkflowState:
+                started = time.perf_counter()
+                update = node(state)
+                finished = time.perf_counter()
+                get_tracer().record(name, "agent", started, finished)
+                update["node_timings"] = {
+                    name: {
+                        "started": round(started - graph_start, 3),
+                        "finished": round(finished - graph_start, 3),
+                        "seconds": round(finished - started, 3),
+                    }
+                }
+                return update
+
+            return run_node
 
         def allocate(state: WorkflowState) -> WorkflowState:
             agent = ResourceAllocationAgent(
@@ -66,6 +129,8 @@ class Orchestrator:
                 state["availability"],
                 run_store=self.run_store,
                 run_id=state["run_id"],
+                token_budget=self.prompt_token_budget,
+                employee_ids=self.dataset.ids.employees,
             )
             result = agent.run(state["tasks"])
             return {"assignments": result["assignments"], "workloads": result["workloads"]}
@@ -77,6 +142,7 @@ class Orchestrator:
                 run_id=state["run_id"],
                 employees=state.get("employees"),
                 test_mode=self.test_mode,
+                token_budget=self.prompt_token_budget,
             )
             suggestions = agent.run()
             return {"ai_opportunities": suggestions}
@@ -88,8 +154,12 @@ class Orchestrator:
                 run_store=self.run_store,
                 run_id=state["run_id"],
                 reports_dir=self.reports_dir,
+                token_budget=self.prompt_token_budget,
+                defer_image=True,
             )
             result = agent.run()
+            # The image path is already known; drawing it is left to the output stage so it overlaps the writes.
+            self._render_image = agent.render_pending_image
             return {
                 "bottlenecks": result["bottlenecks"],
                 "stage_delays": result["stage_delays"],
@@ -105,36 +175,48 @@ class Orchestrator:
                 bottlenecks=state.get("bottlenecks", []),
                 run_store=self.run_store,
                 run_id=state["run_id"],
+                token_budget=self.prompt_token_budget,
             )
             recs = agent.run()
             return {"recommendations": recs}
 
-        graph.add_node("allocation", allocate)
-        graph.add_node("ai_scout", scout)
-        graph.add_node("bottlenecks", detect)
-        graph.add_node("recommend", recommend)
-
-        graph.set_entry_point("allocation")
-        graph.add_edge("allocation", "ai_scout")
-        graph.add_edge("ai_scout", "bottlenecks")
-        graph.add_edge("bottlenecks", "recommend")
+        nodes = {"allocation": allocate, "ai_scout": scout, "bottlenecks": detect, "recommend": recommend}
+        for name, node in nodes.items():
+            graph.add_node(name, timed(name, node))
+        for name, dependencies in NODE_DEPENDENCIES.items():
+            if dependencies:
+                # A list of sources makes LangGraph wait for every branch before running the node.
+                graph.add_edge(dependencies, name)
+            else:
+                graph.add_edge(START, name)
         graph.add_edge("recommend", END)
 
         return graph.compile()
 
-    def run(self) -> Dict[str, object]:
-        data = self._load_data()
+    def run(self, *, write_reports: bool = True) -> Dict[str, object]:
+        """
+        Run the agent graph and return the report. With `write_reports=False` nothing is written: the caller
+        gets the files (and the bottleneck image) by running `output_stage(report)`, after adding its own jobs.
+        """
+        reset_tracer()
+        data = load_dataset(self.data_dir)
+        self.dataset = data
         run_id = str(uuid.uuid4())
+        reset_prompt_token_summary()
+        reset_fallback_telemetry()
+        cache = get_response_cache()
+        if cache is not None:
+            cache.reset_stats()
 
         app = self._build_graph()
         final_state = app.invoke(
             {
                 "run_id": run_id,
-                "employees": data["employees"],
-                "availability": data["availability"],
-                "projects": data["projects"],
-                "tasks": data["tasks"],
-                "events": data["events"],
+                "employees": data.employees,
+                "availability": data.availability,
+                "projects": data.projects,
+                "tasks": data.tasks,
+                "events": data.events,
             }
         )
 
@@ -148,22 +230,36 @@ class Orchestrator:
             "bottleneck_map": final_state.get("bottleneck_map", ""),
             "bottleneck_image": final_state.get("bottleneck_image"),
             "recommendations": final_state.get("recommendations", []),
+            "node_timings": final_state.get("node_timings", {}),
+            "critical_path": critical_path(final_state.get("node_timings", {})),
+            "prompt_tokens": prompt_token_summary(),
+            "llm_cache": response_cache_stats(),
+            "llm_fallbacks": fallback_telemetry(),
             "run_id": run_id,
         }
-        self._persist_reports(report)
+        if write_reports:
+            self.output_timings = self.output_stage(report).run()
+        # Agent logs are written in the background; make sure this run is on disk before returning.
+        self.run_store.flush()
+        if write_reports:
+            self.persist_spans(run_id)
         return report
 
-    def _persist_reports(self, report: Dict[str, object]) -> None:
-        assignment_path = self.reports_dir / "assignment_report.json"
-        workload_path = self.reports_dir / "workload_report.json"
-        ai_path = self.reports_dir / "ai_opportunities.json"
-        bottleneck_path = self.reports_dir / "bottleneck_report.json"
-        recommendations_path = self.reports_dir / "workflow_recommendations.json"
-        full_run_path = self.reports_dir / "full_run.json"
-
-        assignment_path.write_text(json.dumps(report["assignments"], indent=2))
-        workload_path.write_text(json.dumps(report["workloads"], indent=2))
-        ai_path.write_text(json.dumps(report["ai_opportunities"], indent=2))
+    def persist_spans(self, run_id: str) -> int:
+        """Store the run's timing spans; callers that ran the output stage themselves call this afterwards."""
+        return self.run_store.log_spans(run_id, get_tracer().spans())
+
+    def output_stage(self, report: Dict[str, object]) -> OutputStage:
+        """The report files and the bottleneck image as concurrent output jobs; callers may add more before running."""
+        stage = OutputStage(self.reports_dir, pretty=not self.compact_reports)
+        sections = {
+            "assignments": "assignment_report.json",
+            "workloads": "workload_report.json",
+            "ai_opportunities": "ai_opportunities.json",
+            "recommendations": "workflow_recommendations.json",
+        }
+        for key, filename in sections.items():
+            stage.add_json(filename, report[key])
         bottleneck_payload = {
             "bottlenecks": report["bottlenecks"],
             "stage_delays": report["stage_delays"],
@@ -171,6 +267,29 @@ class Orchestrator:
             "bottleneck_map": report.get("bottleneck_map", ""),
             "bottleneck_image": report.get("bottleneck_image"),
         }
-        bottleneck_path.write_text(json.dumps(bottleneck_payload, indent=2))
-        recommendations_path.write_text(json.dumps(report["recommendations"], indent=2))
-        full_run_path.write_text(json.dumps(report, indent=2))
+        stage.add_blocking(
+            "bottleneck_report.json", stage.writer.write_combined, "bottleneck_report.json", bottleneck_payload
+        )
+        # full_run.json reuses the section files' bytes rather than encoding those sections again; the
+        # bottleneck keys sit next to each other in the report, so bottleneck_report.json's members splice in.
+        section_paths: Dict[Union[str, Tuple[str, ...]], Path] = {
+            key: self.reports_dir / filename for key, filename in sections.items()
+        }
+        section_paths[tuple(bottleneck_payload)] = self.reports_dir / "bottleneck_report.json"
+        stage.add_blocking(
+            "full_run.json",
+            stage.writer.write_combined,
+            "full_run.json",
+            report,
+            section_paths,
+            after=[*sections.values(), "bottleneck_report.json"],
+        )
+        render_image, self._render_image = self._render_image, None
+        if render_image is not None:
+
+            def draw_image() -> Optional[Path]:
+                image_path = render_image()
+                return Path(image_path) if image_path else None
+
+            stage.add_blocking("bottleneck_map.png", draw_image)
+        return stage
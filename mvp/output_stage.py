@@ -0,0 +1,100 @@
+"""Post-run output stage: report files, summaries and images produced concurrently on one event loop."""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .instrumentation import get_tracer
+from .report_writer import ReportWriter
+
+ArtifactJob = Callable[[], Awaitable[Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactTiming:
+    artifact: str
+    path: Optional[str]
+    started: float
+    finished: float
+    seconds: float
+
+
+class OutputStage:
+    """
+    Runs a run's output jobs concurrently and returns once every one has finished. Each job waits only for
+    the jobs named in its `after`, so independent artifacts overlap. Blocking work (file writes, matplotlib)
+    runs on worker threads and LLM calls use the async client; files are written atomically and fsynced,
+    so once the stage returns every artifact is durably on disk.
+    """
+
+    def __init__(self, reports_dir: Path, *, pretty: bool = True):
+        self.writer = ReportWriter(reports_dir, pretty=pretty, durable=True)
+        self._jobs: Dict[str, ArtifactJob] = {}
+        self._after: Dict[str, Tuple[str, ...]] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: List[ArtifactTiming] = []
+
+    def add(self, name: str, job: ArtifactJob, *, after: Iterable[str] = ()) -> None:
+        """Register a coroutine function; its return value is kept in `results[name]` for later jobs."""
+        after = tuple(after)
+        if name in self._jobs:
+            raise ValueError(f"Output artifact {name!r} is already registered.")
+        missing = [dependency for dependency in after if dependency not in self._jobs]
+        if missing:
+            raise ValueError(f"Output artifact {name!r} depends on unregistered {missing}.")
+        self._jobs[name] = job
+        self._after[name] = after
+
+    def add_blocking(self, name: str, func: Callable[..., Any], *args: Any, after: Iterable[str] = ()) -> None:
+        """Register a plain function; it runs on a worker thread so it overlaps with the other jobs."""
+        self.add(name, lambda: asyncio.to_thread(func, *args), after=after)
+
+    def add_json(self, filename: str, value: object, *, after: Iterable[str] = ()) -> None:
+        self.add_blocking(filename, self.writer.write, filename, value, after=after)
+
+    def add_text(self, filename: str, render: Callable[[], str], *, after: Iterable[str] = ()) -> None:
+        """`render` runs on the worker thread too, so it may read `results` of the jobs it comes after."""
+        self.add_blocking(filename, lambda: self.writer.write_text(filename, render()), after=after)
+
+    async def run_async(self) -> List[ArtifactTiming]:
+        stage_start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_job(name: str) -> None:
+            dependencies = [tasks[dependency] for dependency in self._after[name]]
+            if dependencies:
+                await asyncio.gather(*dependencies)
+            started = time.perf_counter()
+            result = await self._jobs[name]()
+            finished = time.perf_counter()
+            self.results[name] = result
+            path = str(result) if isinstance(result, Path) else None
+            get_tracer().record(name, "output", started, finished, {"path": path} if path else None)
+            self.timings.append(
+                ArtifactTiming(
+                    artifact=name,
+                    path=path,
+                    started=round(started - stage_start, 3),
+                    finished=round(finished - stage_start, 3),
+                    seconds=round(finished - started, 3),
+                )
+            )
+
+        # Jobs are registered after their dependencies, so every awaited task already exists.
+        for name in self._jobs:
+            tasks[name] = asyncio.create_task(run_job(name), name=name)
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        # Every job has settled (written or failed) before an error is raised, so no write is left in flight.
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        self.timings.sort(key=lambda timing: timing.started)
+        return self.timings
+
+    def run(self) -> List[ArtifactTiming]:
+        """Run the stage to completion from synchronous code."""
+        return asyncio.run(self.run_async())
+
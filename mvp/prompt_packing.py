@@ -0,0 +1,159 @@
+"""Token-aware prompt packing helpers for batching agent payloads into LLM prompts."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Roughly four characters per token for English prose and compact JSON; good enough for budgeting.
+_CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 8000
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate that avoids a tokenizer dependency."""
+    if not text:
+        return 0
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def compact_json(payload: Any) -> str:
+    """Serialize without indentation or padding so prompts carry data, not whitespace."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def shorten_keys(row: Dict[str, Any], legend: Dict[str, str]) -> Dict[str, Any]:
+    """Rename row keys using a long->short legend; unknown keys pass through."""
+    return {legend.get(key, key): value for key, value in row.items()}
+
+
+def key_legend(legend: Dict[str, str]) -> Dict[str, str]:
+    """Invert a long->short legend so the prompt can explain short keys once per batch."""
+    return {short: long for long, short in legend.items()}
+
+
+def resolve_token_budget(token_budget: Optional[int] = None) -> int:
+    """Explicit budget wins, then OPENAI_PROMPT_TOKEN_BUDGET, then the module default."""
+    if token_budget is not None and token_budget > 0:
+        return int(token_budget)
+    env_value = os.getenv("OPENAI_PROMPT_TOKEN_BUDGET", "").strip()
+    if env_value:
+        try:
+            parsed = int(env_value)
+            if parsed > 0:
+                return parsed
+        except ValueError:
+            pass
+    return DEFAULT_TOKEN_BUDGET
+
+
+@dataclass
+class PackedBatch(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    tokens: int = 0
+
+
+class PromptPacker:
+    """Fills prompt batches with rendered rows until a token budget is reached."""
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = resolve_token_budget(token_budget)
+
+    @staticmethod
+    def row_tokens(row: Any) -> int:
+        # +1 accounts for the separating comma inside the JSON array.
+        return estimate_tokens(compact_json(row)) + 1
+
+    def pack(
+        self,
+        items: Iterable[T],
+        render_row: Callable[[T], Any],
+        *,
+        overhead_tokens: int = 0,
+        reserve_per_row: int = 0,
+    ) -> Iterator[PackedBatch[T]]:
+        """
+        Yield batches whose rendered rows (plus the expected response size per row) fit the budget.
+        A single row that exceeds the budget on its own is still emitted as a one-row batch.
+        """
+        available = max(self.token_budget - overhead_tokens, 1)
+        batch: PackedBatch[T] = PackedBatch()
+        for item in items:
+            row = render_row(item)
+            cost = self.row_tokens(row) + reserve_per_row
+            if batch.items and batch.tokens + cost > available:
+                yield batch
+                batch = PackedBatch()
+            batch.items.append(item)
+            batch.tokens += cost
+        if batch.items:
+            yield batch
+
+    def truncate(self, rows: Sequence[Any], available_tokens: int) -> List[Any]:
+        """Return the longest prefix of already-rendered rows that fits in available_tokens."""
+        kept: List[Any] = []
+        used = 0
+        for row in rows:
+            cost = self.row_tokens(row)
+            if used + cost > available_tokens:
+                break
+            kept.append(row)
+            used += cost
+        return kept
+
+
+class PromptTokenLedger:
+    """Thread-safe per-run tally of prompt counts and estimated packed prompt tokens per agent."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, int]] = {}
+
+    def record(self, agent: str, packed_tokens: int) -> None:
+        with self._lock:
+            entry = self._agents.setdefault(agent, {"prompts": 0, "packed_tokens": 0})
+            entry["prompts"] += 1
+            entry["packed_tokens"] += packed_tokens
+
+    def reset(self) -> None:
+        with self._lock:
+            self._agents.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            agents = {name: dict(entry) for name, entry in self._agents.items()}
+        return {
+            "agents": agents,
+            "prompts": sum(entry["prompts"] for entry in agents.values()),
+            "packed_tokens": sum(entry["packed_tokens"] for entry in agents.values()),
+        }
+
+
+_LEDGER = PromptTokenLedger()
+
+
+def record_prompt_tokens(agent: str, packed_prompt: str) -> None:
+    """Record one rendered prompt's estimated size."""
+    _LEDGER.record(agent, estimate_tokens(packed_prompt))
+
+
+def prompt_token_summary() -> Dict[str, object]:
+    return _LEDGER.snapshot()
+
+
+def reset_prompt_token_summary() -> None:
+    _LEDGER.reset()
@@ -0,0 +1,28 @@
+"""Shared pieces for the agents' result records: process-wide interned text and string tuples."""
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Iterable, Tuple
+
+# Every distinct sequence of strings maps to one shared tuple; skill lists (mvp/skills.py) use it too.
+_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_TUPLES_LOCK = threading.Lock()
+
+
+def shared_text(value: object) -> str:
+    """One process-wide copy of a string, so policy text repeated across thousands of records is stored once."""
+    return sys.intern(str(value))
+
+
+def shared_tuple(values: Iterable[object]) -> Tuple[str, ...]:
+    """One process-wide tuple per distinct sequence of strings."""
+    key = tuple(shared_text(value) for value in values)
+    with _TUPLES_LOCK:
+        return _TUPLES.setdefault(key, key)
+
+
+def record_dict(record: Any) -> Any:
+    """A dataclass record as a plain dict; dicts and other values pass through unchanged."""
+    return asdict(record) if is_dataclass(record) and not isinstance(record, type) else record
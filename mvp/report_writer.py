@@ -0,0 +1,195 @@
+"""Atomic, streaming JSON report files; encodes with orjson when it is installed."""
+from __future__ import annotations
+
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, Iterator, Mapping, Optional, Tuple, Union
+
+try:  # optional: several times faster than the stdlib encoder; output is equivalent JSON either way
+    import orjson
+except ImportError:  # pragma: no cover - exercised only where orjson is absent
+    orjson = None
+
+_COPY_CHUNK_BYTES = 1 << 20
+# Items encoded per call when streaming a list: bounds memory while keeping the encoder's per-call overhead low.
+_STREAM_BATCH_ITEMS = 1024
+
+
+def _current_umask() -> int:
+    # os.umask can only be read by setting it; this runs once, at import, before any writer threads start.
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _current_umask()
+
+
+def encode_json(value: object, *, pretty: bool = True) -> bytes:
+    """One JSON value as UTF-8 bytes: two-space indentation when pretty, no whitespace otherwise."""
+    if orjson is not None:
+        try:
+            options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            return orjson.dumps(value, option=options | orjson.OPT_INDENT_2 if pretty else options)
+        except TypeError:
+            pass  # types orjson refuses (e.g. sets via default handlers) go through the stdlib encoder
+    if pretty:
+        return json.dumps(value, indent=2).encode("utf-8")
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _target_mode(path: Path) -> int:
+    """Permissions for a rewritten file: the existing file's, else what a plain open() would create."""
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename; platforms that cannot open directories (Windows) skip it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover - platform dependent
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_writer(path: Path, *, durable: bool = False) -> Iterator[IO[bytes]]:
+    """
+    Write to a temp file beside `path` and rename it into place, so readers never see a partial report.
+    With `durable`, the file and the rename are fsynced before returning, so the report survives a crash.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile("wb", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False)
+    try:
+        with handle:
+            yield handle
+            if durable:
+                handle.flush()
+                os.fsync(handle.fileno())
+        # NamedTemporaryFile creates the file 0600; keep the report readable as before.
+        os.chmod(handle.name, _target_mode(path))
+        os.replace(handle.name, path)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+    if durable:
+        _fsync_directory(path.parent)
+
+
+class ReportWriter:
+    """
+    Writes report sections into one directory. Long lists are streamed in batches of items, and the
+    combined report copies the bytes of sections already on disk instead of encoding them a second time.
+    """
+
+    def __init__(self, reports_dir: Path, *, pretty: bool = True, durable: bool = False):
+        self.reports_dir = Path(reports_dir)
+        self.pretty = pretty
+        self.durable = durable
+        self._indent = b"\n  " if pretty else b"\n"
+
+    def _write_value(self, out: IO[bytes], value: object, nested: bool) -> None:
+        """Stream `value`; nested values sit one level deep, so their continuation lines are indented."""
+        depth = 1 if nested else 0
+        if not (isinstance(value, list) and len(value) > _STREAM_BATCH_ITEMS):
+            self._write_indented(out, encode_json(value, pretty=self.pretty), depth)
+            return
+        # Long lists are encoded a batch at a time; each batch's own brackets are dropped when splicing.
+        opening, closing = (b"[\n", b"\n]") if self.pretty else (b"[", b"]")
+        out.write(b"[")
+        for start in range(0, len(value), _STREAM_BATCH_ITEMS):
+            encoded = encode_json(value[start : start + _STREAM_BATCH_ITEMS], pretty=self.pretty)
+            out.write((b"," if start else b"") + (b"\n" + b"  " * depth if self.pretty else b""))
+            self._write_indented(out, encoded[len(opening) : -len(closing)], depth)
+        out.write(b"\n" + b"  " * depth + b"]" if self.pretty else b"]")
+
+    def _write_indented(self, out: IO[bytes], encoded: bytes, depth: int) -> None:
+        if self.pretty and depth:
+            # JSON strings never hold raw newlines, so every newline starts a layout line.
+            encoded = encoded.replace(b"\n", b"\n" + b"  " * depth)
+        out.write(encoded)
+
+    def write(self, filename: str, value: object) -> Path:
+        """Write one section file atomically."""
+        path = self.reports_dir / filename
+        with atomic_writer(path, durable=self.durable) as out:
+            self._write_value(out, value, nested=False)
+        return path
+
+    def write_text(self, filename: str, text: str) -> Path:
+        """Write a non-JSON artifact (e.g. the Markdown summary) with the same atomic and durable guarantees."""
+        path = self.reports_dir / filename
+        with atomic_writer(path, durable=self.durable) as out:
+            out.write(text.encode("utf-8"))
+        return path
+
+    def write_combined(
+        self,
+        filename: str,
+        report: Mapping[str, object],
+        sections: Optional[Dict[Union[str, Tuple[str, ...]], Path]] = None,
+    ) -> Path:
+        """
+        Write `report` as one object in a single streaming pass. Keys listed in `sections` are copied from
+        the files written for them (which must hold exactly that key's value) rather than re-encoded. A
+        tuple of keys names a file written by write_combined with exactly those consecutive keys, whose
+        members are spliced in as they are.
+        """
+        sections = sections or {}
+        positions = {key: position for position, key in enumerate(report)}
+        order = list(report)
+        groups = {}
+        for keys, source_path in sections.items():
+            if not isinstance(keys, tuple) or not keys or keys[0] not in positions:
+                continue
+            start = positions[keys[0]]
+            # A group whose keys are not consecutive in `report` is encoded key by key instead.
+            if tuple(order[start : start + len(keys)]) == keys:
+                groups[keys[0]] = (keys, source_path)
+        spliced: set = set()
+        path = self.reports_dir / filename
+        with atomic_writer(path, durable=self.durable) as out:
+            out.write(b"{" + self._indent if self.pretty and report else b"{")
+            for position, (key, value) in enumerate(report.items()):
+                if key in spliced:
+                    continue
+                if position:
+                    out.write(b"," + self._indent if self.pretty else b",")
+                if key in groups:
+                    keys, source_path = groups[key]
+                    spliced.update(keys)
+                    self._copy_members(out, source_path)
+                    continue
+                out.write(encode_json(str(key)) + (b": " if self.pretty else b":"))
+                if key in sections:
+                    with open(sections[key], "rb") as source:
+                        while chunk := source.read(_COPY_CHUNK_BYTES):
+                            self._write_indented(out, chunk, depth=1)
+                else:
+                    self._write_value(out, value, nested=True)
+            out.write(b"\n}" if self.pretty and report else b"}")
+        return path
+
+    def _copy_members(self, out: IO[bytes], source_path: Path) -> None:
+        """Copy the members of a write_combined object without its braces; they are already at depth 1."""
+        opening, closing = (b"{" + self._indent, b"\n}") if self.pretty else (b"{", b"}")
+        with open(source_path, "rb") as source:
+            remaining = os.fstat(source.fileno()).st_size - len(opening) - len(closing)
+            source.seek(len(opening))
+            while remaining > 0:
+                chunk = source.read(min(remaining, _COPY_CHUNK_BYTES))
+                if not chunk:
+                    break
+                out.write(chunk)
+                remaining -= len(chunk)
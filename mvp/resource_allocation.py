@@ -1,20 +1,51 @@
 """OpenAI-backed resource allocation agent with heuristic fallback."""
 from __future__ import annotations
 
-import json
 import re
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime, time, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 
-from .llm_utils import safe_openai_json
+from .ids import IdRegistry
+from .json_stream import ItemSchema
+from .llm_utils import note_fallback, openai_enabled, safe_stream_openai_json_items
+from .prompt_packing import (
+    PromptPacker,
+    compact_json,
+    estimate_tokens,
+    key_legend,
+    record_prompt_tokens,
+    shorten_keys,
+)
+from .records import shared_text
 from .run_store import RunStore
 
-
-@dataclass
+_ALLOCATION_INSTRUCTIONS = (
+    "Assign only the listed unstarted tasks. Maximize skill match, respect capacity (max vs current weekly load) "
+    "and availability calendars (including zero-availability days), avoid overtime, and account for timezone "
+    "overlap with task windows."
+)
+# Long -> short keys; the legend is sent once per batch so the model can expand them.
+_EMPLOYEE_KEY_LEGEND = {"max_hours": "max", "timezone": "tz", "load_hours": "load", "avg_hours_free": "free"}
+_TASK_KEY_LEGEND = {"project_id": "pid", "skill_needed": "skill", "est_hours": "hrs", "weekly_hours": "wk_hrs"}
+_ASSIGNMENT_EXAMPLE: Dict[str, object] = {
+    "task_id": "T0001",
+    "project_id": "P001",
+    "assignee": "E001",
+    "score": 0.95,
+    "rationale": "why this person fits",
+}
+_ASSIGNMENT_SCHEMA = ItemSchema(
+    required={"task_id": (str, int), "assignee": (str, int)},
+    optional={"project_id": (str, int), "score": (int, float), "rationale": (str,)},
+)
+
+
+@dataclass(frozen=True, slots=True)
 class Assignment:
     task_id: str
     project_id: str
@@ -22,8 +53,13 @@ class Assignment:
     score: float
     rationale: str
 
+    def __post_init__(self) -> None:
+        # Projects and assignees repeat across tasks; keep one shared copy of each ID string.
+        object.__setattr__(self, "project_id", shared_text(self.project_id))
+        object.__setattr__(self, "assignee", shared_text(self.assignee))
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WorkloadRollup:
     employee_id: str
     baseline_hours: float
@@ -39,14 +75,30 @@ class ResourceAllocationAgent:
     Falls back to a deterministic heuristic if the API is unavailable.
     """
 
-    def __init__(self, employees: pd.DataFrame, availability: pd.DataFrame, run_store: RunStore, run_id: str):
-        self.employees = employees.copy()
-        self.availability = availability.copy()
+    def __init__(
+        self,
+        employees: pd.DataFrame,
+        availability: pd.DataFrame,
+        run_store: RunStore,
+        run_id: str,
+        *,
+        token_budget: Optional[int] = None,
+        employee_ids: Optional[IdRegistry] = None,
+    ):
+        # Shallow copies: columns are only added, never written in place, so input data stays shared.
+        self.employees = employees.copy(deep=False)
+        self.availability = availability.copy(deep=False)
         self.run_store = run_store
         self.run_id = run_id
+        self.packer = PromptPacker(token_budget)
         # Pre-compute normalized department metadata for fairness heuristics.
         self.employees["department_normalized"] = self.employees["department"].apply(self._normalize_department)
         self.employees["department_tokens"] = self.employees["department"].apply(self._department_tokens)
+        # The scoring loop addresses employees by registry code: plain records plus per-code availability arrays.
+        self.employee_ids = employee_ids if employee_ids is not None else IdRegistry(self.employees["id"])
+        self._employee_codes = self.employee_ids.codes(self.employees["id"])
+        self._employee_records = self.employees.to_dict("records")
+        self._availability_by_code = self._index_availability()
 
     @staticmethod
     def _normalize_skill_text(value: object) -> str:
@@ -66,7 +118,7 @@ class ResourceAllocationAgent:
         if not normalized_needed:
             return 0.0
 
-        if isinstance(employee_skills, list):
+        if isinstance(employee_skills, (list, tuple)):
             skills_iterable = employee_skills
         elif employee_skills:
             skills_iterable = [employee_skills]
@@ -97,27 +149,36 @@ class ResourceAllocationAgent:
             return 0.4
         return 0.0
 
+    def _index_availability(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Per employee code: that employee's availability dates and non-negative free hours, in file order."""
+        codes = self.employee_ids.codes(self.availability["employee_id"])
+        dates = self.availability["date"].to_numpy()
+        hours = self.availability["hours_free"].clip(lower=0).to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(self.employee_ids) + 1))
+        return [(dates[order[lo:hi]], hours[order[lo:hi]]) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
     def _availability_score(
-        self, employee_id: str, est_hours: float, task_start: Optional[pd.Timestamp], task_due: Optional[pd.Timestamp]
+        self, employee_code: int, est_hours: float, task_start: Optional[pd.Timestamp], task_due: Optional[pd.Timestamp]
     ) -> float:
-        avail_rows = self.availability[self.availability["employee_id"] == employee_id]
-        if avail_rows.empty:
+        if employee_code < 0:
+            return 0.2
+        dates, hours_free = self._availability_by_code[employee_code]
+        if not len(dates):
             return 0.2
 
         start_ts = task_start if isinstance(task_start, pd.Timestamp) else pd.to_datetime(task_start, errors="coerce")
         due_ts = task_due if isinstance(task_due, pd.Timestamp) else pd.to_datetime(task_due, errors="coerce")
 
         if pd.notna(start_ts) and pd.notna(due_ts):
-            window_rows = avail_rows[
-                (avail_rows["date"] >= start_ts.normalize()) & (avail_rows["date"] <= due_ts.normalize())
-            ]
-            if not window_rows.empty:
-                window_hours = window_rows["hours_free"].clip(lower=0).sum()
+            in_window = (dates >= start_ts.normalize().to_datetime64()) & (dates <= due_ts.normalize().to_datetime64())
+            if in_window.any():
+                window_hours = np.nansum(hours_free[in_window])
                 if window_hours <= 0:
                     return 0.0
                 return min(window_hours, est_hours) / (est_hours + 1e-6)
 
-        max_free = avail_rows["hours_free"].clip(lower=0).max()
+        max_free = np.nanmax(hours_free)
         if max_free <= 0:
             return 0.0
         return min(max_free, est_hours) / (est_hours + 1e-6)
@@ -237,17 +298,22 @@ class ResourceAllocationAgent:
 
             candidate_rows: List[Dict] = []
             best_skill_score = 0.0
-            for _, employee in self.employees.iterrows():
+            timezone_scores: Dict[object, float] = {}
+            for emp_code, employee in zip(self._employee_codes, self._employee_records):
                 emp_id = employee["id"]
                 max_hours = float(employee["max_hours"])
                 current_load = existing_workload.get(emp_id, 0.0) + incremental_load.get(emp_id, 0.0)
                 est_hours = float(task["est_hours"])
 
                 skill_score = self._skill_match_score(employee.get("skills", []), task["skill_needed"])
-                availability_score = self._availability_score(emp_id, est_hours, task["start"], task["due"])
+                availability_score = self._availability_score(emp_code, est_hours, task["start"], task["due"])
                 remaining_capacity = max_hours - current_load
                 balance_score = max(0.0, remaining_capacity / max_hours)
-                timezone_score = self._timezone_overlap_score(task["start"], task["due"], employee.get("timezone", "UTC"))
+                employee_tz = employee.get("timezone", "UTC")
+                if employee_tz not in timezone_scores:
+                    # The overlap depends only on the task window and the zone, so it is shared by colleagues.
+                    timezone_scores[employee_tz] = self._timezone_overlap_score(task["start"], task["due"], employee_tz)
+                timezone_score = timezone_scores[employee_tz]
                 projected_load = current_load + weekly_hours
                 if max_hours <= 0:
                     overload_ratio = float("inf")
@@ -364,51 +430,135 @@ class ResourceAllocationAgent:
 
         return rollups
 
-    def _render_prompt(self, tasks: pd.DataFrame) -> str:
-        condensed_employees = [
+    def _prompt_task_row(self, task: pd.Series) -> Dict[str, object]:
+        return {
+            "id": task["id"],
+            "project_id": task["project_id"],
+            "skill_needed": task["skill_needed"],
+            "est_hours": task["est_hours"],
+            "weekly_hours": round(self._hours_per_week(task.get("est_hours", 0.0), task.get("start"), task.get("due")), 1),
+        }
+
+    @staticmethod
+    def _compact_task_row(task_row: Dict[str, object]) -> Dict[str, object]:
+        return shorten_keys(task_row, _TASK_KEY_LEGEND)
+
+    def _roster(self) -> List[Dict[str, object]]:
+        """Every employee's prompt fields and availability summary, built once per allocation run."""
+        mean_free = self.availability.groupby("employee_id")["hours_free"].mean().to_dict()
+        return [
             {
-                "id": row["id"],
-                "skills": row["skills"],
-                "max_hours": row["max_hours"],
-                "timezone": row["timezone"],
+                "id": record["id"],
+                "skills": record["skills"],
+                "max_hours": record["max_hours"],
+                "timezone": record["timezone"],
+                "avg_hours_free": round(float(mean_free.get(record["id"], 0.0)), 1),
             }
-            for _, row in self.employees.iterrows()
+            for record in self._employee_records
         ]
-        condensed_tasks = [
-            {
-                "id": row["id"],
-                "project_id": row["project_id"],
-                "skill_needed": row["skill_needed"],
-                "est_hours": row["est_hours"],
-                "status": row["status"],
-            }
-            for _, row in tasks.iterrows()
+
+    def _candidate_rows(
+        self,
+        roster: List[Dict[str, object]],
+        task_rows: List[Dict[str, object]],
+        preferred: Set[str],
+        committed_load: Dict[str, float],
+        available_tokens: int,
+    ) -> List[Dict[str, object]]:
+        """
+        The batch's candidates with their current load: the heuristic's picks first, then employees by best
+        skill match to the batch's tasks (everyone when nobody matches), cut to `available_tokens`.
+        """
+        skills = {str(task_row["skill_needed"]) for task_row in task_rows}
+        ranked = []
+        for position, employee in enumerate(roster):
+            match = max((self._skill_match_score(employee["skills"], skill) for skill in skills), default=0.0)
+            ranked.append((employee["id"] not in preferred, -match, position, employee))
+        relevant = [entry for entry in ranked if not entry[0] or entry[1] < 0]
+        rows = [
+            shorten_keys(
+                {**employee, "load_hours": round(float(committed_load.get(employee["id"], 0.0)), 1)},
+                _EMPLOYEE_KEY_LEGEND,
+            )
+            for _, _, _, employee in sorted(relevant or ranked, key=lambda entry: entry[:3])
         ]
-        availability_summary = (
-            self.availability.groupby("employee_id")["hours_free"].mean().reset_index().to_dict("records")
-        )
+        return self.packer.truncate(rows, available_tokens)
 
-        return json.dumps(
+    def _render_prompt(self, task_rows: List[Dict[str, object]], employee_rows: List[Dict[str, object]]) -> str:
+        return compact_json(
             {
-                "employees": condensed_employees,
-                "availability": availability_summary,
-                "tasks": condensed_tasks,
-                "instructions": "Assign only unstarted tasks. Maximize skill match, respect capacity and availability calendars (including zero-availability days), avoid overtime, and account for timezone overlap with task windows.",
-                "response_schema": {
-                    "assignments": [
-                        {
-                            "task_id": "T0001",
-                            "project_id": "P001",
-                            "assignee": "E001",
-                            "score": 0.95,
-                            "rationale": "why this person fits",
-                        }
-                    ]
-                },
-            },
-            indent=2,
+                "keys": {**key_legend(_EMPLOYEE_KEY_LEGEND), **key_legend(_TASK_KEY_LEGEND)},
+                "employees": employee_rows,
+                "tasks": [self._compact_task_row(task_row) for task_row in task_rows],
+                "instructions": _ALLOCATION_INSTRUCTIONS,
+                "response_schema": {"assignments": [_ASSIGNMENT_EXAMPLE]},
+            }
         )
 
+    def _llm_assign(
+        self,
+        tasks: pd.DataFrame,
+        system_prompt: str,
+        heuristic_assignments: List[Assignment],
+        baseline_load: Dict[str, float],
+    ) -> List[Assignment]:
+        """Route unstarted tasks through packed LLM batches, filling gaps from the heuristic plan."""
+        fallback_by_task = {a.task_id: asdict(a) for a in heuristic_assignments}
+        committed_load = dict(baseline_load)
+
+        open_tasks = tasks[tasks["status"].apply(self._is_unstarted)]
+        task_rows = [self._prompt_task_row(task) for _, task in open_tasks.iterrows()]
+        weekly_hours_by_task = {str(task_row["id"]): float(task_row["weekly_hours"]) for task_row in task_rows}
+        roster = self._roster()
+        # Half the budget goes to candidate employees, so a large roster never crowds out the tasks.
+        roster_tokens = self.packer.token_budget // 2
+        overhead_tokens = estimate_tokens(system_prompt) + estimate_tokens(self._render_prompt([], [])) + roster_tokens
+
+        assignments: List[Assignment] = []
+        assigned_ids: set[str] = set()
+        for batch in self.packer.pack(
+            task_rows,
+            self._compact_task_row,
+            overhead_tokens=overhead_tokens,
+            reserve_per_row=self.packer.row_tokens(_ASSIGNMENT_EXAMPLE),
+        ):
+            # Later batches see the load committed by earlier ones so capacity stays respected across batches.
+            batch_ids = [str(task_row["id"]) for task_row in batch.items]
+            preferred = {str(fallback_by_task[task_id]["assignee"]) for task_id in batch_ids if task_id in fallback_by_task}
+            employee_rows = self._candidate_rows(roster, batch.items, preferred, committed_load, roster_tokens)
+            user_prompt = self._render_prompt(batch.items, employee_rows)
+            record_prompt_tokens("resource_allocation", system_prompt + user_prompt)
+
+            def accept(item: Dict[str, object]) -> None:
+                assignment = Assignment(
+                    task_id=str(item.get("task_id")),
+                    project_id=str(item.get("project_id")),
+                    assignee=str(item.get("assignee")),
+                    score=float(item.get("score", 0.0)),
+                    rationale=str(item.get("rationale", "")),
+                )
+                if assignment.task_id in assigned_ids:
+                    return
+                assigned_ids.add(assignment.task_id)
+                assignments.append(assignment)
+                committed_load[assignment.assignee] = committed_load.get(
+                    assignment.assignee, 0.0
+                ) + weekly_hours_by_task.get(assignment.task_id, 0.0)
+
+            # Assignments are committed as they stream in; whatever the model skipped, malformed, or
+            # never sent because the call failed is filled from the heuristic plan afterwards.
+            seen_batch_ids: set[str] = set()
+            for item in safe_stream_openai_json_items(
+                system_prompt, user_prompt, "assignments", schema=_ASSIGNMENT_SCHEMA, agent="resource_allocation"
+            ):
+                seen_batch_ids.add(str(item["task_id"]))
+                accept(item)
+            for task_id in batch_ids:
+                if task_id not in seen_batch_ids and task_id in fallback_by_task:
+                    accept(fallback_by_task[task_id])
+
+        return assignments
+
     def run(self, tasks: pd.DataFrame) -> Dict[str, List]:
         system_prompt = (
             "You are a meticulous resource allocation co-pilot. Act like an operations "
@@ -418,28 +568,21 @@ class ResourceAllocationAgent:
             "Never invent employees or tasks. Return strictly valid JSON matching the "
             "requested schema and nothing else."
         )
-        user_prompt = self._render_prompt(tasks)
-        fallback = {"assignments": [a.__dict__ for a in self._heuristic_assign(tasks)]}
-        result = safe_openai_json(system_prompt, user_prompt, fallback=fallback)
-
-        assignments: List[Assignment] = []
-        for item in result.get("assignments", []):
-            assignments.append(
-                Assignment(
-                    task_id=str(item.get("task_id")),
-                    project_id=str(item.get("project_id")),
-                    assignee=str(item.get("assignee")),
-                    score=float(item.get("score", 0.0)),
-                    rationale=str(item.get("rationale", "")),
-                )
-            )
+        heuristic_assignments = self._heuristic_assign(tasks)
+        baseline_load = self._existing_open_workload(tasks)
+        if openai_enabled():
+            assignments = self._llm_assign(tasks, system_prompt, heuristic_assignments, baseline_load)
+        else:
+            # Nothing would reach the model: skip prompt rendering and keep the heuristic plan as-is.
+            note_fallback("resource_allocation")
+            assignments = heuristic_assignments
 
-        workloads = self._build_workload_rollups(assignments, tasks)
+        workloads = self._build_workload_rollups(assignments, tasks, baseline=baseline_load)
         self.run_store.log(
             self.run_id,
             "resource_allocation",
             inputs={"tasks": len(tasks)},
-            outputs={"assignments": [a.__dict__ for a in assignments], "workloads": [w.__dict__ for w in workloads]},
+            outputs={"assignments": [asdict(a) for a in assignments], "workloads": [asdict(w) for w in workloads]},
         )
         return {"assignments": assignments, "workloads": workloads}
 
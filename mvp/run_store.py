@@ -1,63 +1,853 @@
 """Simple SQLite run store for agent traceability."""
 from __future__ import annotations
 
+import atexit
+import gzip
+import hashlib
+import itertools
 import json
+import queue
 import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:  # optional: better ratio and faster than zlib; payloads record their codec either way
+    import zstandard
+except ImportError:  # pragma: no cover - exercised only where zstandard is absent
+    zstandard = None
+
+from .json_patch import apply_patch, make_patch
+
+# (run_id, agent_name, input_json, output_json); payloads are serialized by the caller so later
+# mutation of the logged dicts cannot change what gets written. Compression happens on the writer.
+_Row = Tuple[str, str, str, str]
+
+_INSERT_SQL = "INSERT INTO agent_runs (run_id, agent_name, input_hash, output_hash) VALUES (?, ?, ?, ?)"
+_ROLLUP_UPSERT_SQL = """
+    INSERT INTO agent_run_rollups (day, agent_name, runs, raw_bytes, last_row_id, last_run_id, last_output_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(day, agent_name) DO UPDATE SET
+        runs = runs + excluded.runs,
+        raw_bytes = raw_bytes + excluded.raw_bytes,
+        last_row_id = MAX(last_row_id, excluded.last_row_id),
+        last_run_id = CASE WHEN excluded.last_row_id > last_row_id THEN excluded.last_run_id ELSE last_run_id END,
+        last_output_hash = CASE
+            WHEN excluded.last_row_id > last_row_id THEN excluded.last_output_hash ELSE last_output_hash
+        END
+"""
+# Blobs still reachable from a kept row, a rollup, or (transitively) as the base of a reachable delta.
+_BLOB_GC_SQL = """
+    WITH RECURSIVE live(hash) AS (
+        SELECT input_hash FROM agent_runs
+        UNION SELECT output_hash FROM agent_runs
+        UNION SELECT last_output_hash FROM agent_run_rollups
+        UNION SELECT blob.base_hash FROM payload_blobs AS blob JOIN live ON blob.hash = live.hash
+              WHERE blob.base_hash IS NOT NULL
+    )
+    DELETE FROM payload_blobs WHERE hash NOT IN (SELECT hash FROM live)
+"""
+_SPAN_INSERT_SQL = (
+    "INSERT INTO run_spans (run_id, category, name, thread, started_seconds, seconds, attrs) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_BLOB_INSERT_SQL = (
+    "INSERT OR IGNORE INTO payload_blobs (hash, codec, base_hash, depth, raw_bytes, data) VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SUMMARY_UPSERT_SQL = """
+    INSERT INTO runs (run_id, agent_rows, payload_bytes, raw_bytes) VALUES (?, ?, ?, ?)
+    ON CONFLICT(run_id) DO UPDATE SET
+        last_logged_at = CURRENT_TIMESTAMP,
+        agent_rows = agent_rows + excluded.agent_rows,
+        payload_bytes = payload_bytes + excluded.payload_bytes,
+        raw_bytes = raw_bytes + excluded.raw_bytes
+"""
+# Other processes may hold the write lock briefly; wait for it rather than failing the insert.
+_BUSY_TIMEOUT_MS = 30_000
+_WRITE_RETRIES = 5
+_ZSTD_LEVEL = 3
+_ZLIB_LEVEL = 6
+# Longest chain of JSON-patch deltas before a payload is stored in full again; bounds read cost.
+_MAX_DELTA_DEPTH = 16
+
+
+def _preferred_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def _encode_payload(codec: str, payload_json: str) -> bytes:
+    raw = payload_json.encode("utf-8")
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    if codec == "zlib":
+        return zlib.compress(raw, _ZLIB_LEVEL)
+    return raw
+
+
+def _decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This run store holds zstd-compressed payloads; install `zstandard` to read them.")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    return blob
+
+
+def _payload_hash(payload_json: str) -> str:
+    return hashlib.sha256(payload_json.encode("utf-8")).hexdigest()
+
+
+def _create_legacy_table(conn: sqlite3.Connection) -> None:
+    """v1: the original uncompressed, unindexed table (kept so old databases migrate uniformly)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS agent_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            agent_name TEXT NOT NULL,
+            input_json TEXT NOT NULL,
+            output_json TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+
+
+def _compress_payloads(conn: sqlite3.Connection) -> None:
+    """v2: compressed payload columns, a (run_id, agent_name, created_at) index, and a runs summary."""
+    conn.execute("ALTER TABLE agent_runs RENAME TO agent_runs_v1")
+    conn.execute(
+        """
+        CREATE TABLE agent_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            agent_name TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            input_payload BLOB NOT NULL,
+            output_payload BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+    codec = _preferred_codec()
+    legacy_rows = conn.execute(
+        "SELECT id, run_id, agent_name, input_json, output_json, created_at FROM agent_runs_v1 ORDER BY id"
+    )
+    while True:
+        chunk = legacy_rows.fetchmany(500)
+        if not chunk:
+            break
+        conn.executemany(
+            "INSERT INTO agent_runs (id, run_id, agent_name, codec, input_payload, output_payload, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (row_id, run_id, agent, codec, _encode_payload(codec, inputs), _encode_payload(codec, outputs), created)
+                for row_id, run_id, agent, inputs, outputs, created in chunk
+            ],
+        )
+    conn.execute(
+        "CREATE INDEX idx_agent_runs_run_agent_created ON agent_runs (run_id, agent_name, created_at)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE runs (
+            run_id TEXT PRIMARY KEY,
+            first_logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            agent_rows INTEGER NOT NULL DEFAULT 0,
+            payload_bytes INTEGER NOT NULL DEFAULT 0,
+            raw_bytes INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    conn.execute("CREATE INDEX idx_runs_last_logged ON runs (last_logged_at)")
+    conn.execute(
+        """
+        INSERT INTO runs (run_id, first_logged_at, last_logged_at, agent_rows, payload_bytes, raw_bytes)
+        SELECT legacy.run_id, MIN(legacy.created_at), MAX(legacy.created_at), COUNT(*),
+               SUM(LENGTH(packed.input_payload) + LENGTH(packed.output_payload)),
+               SUM(LENGTH(legacy.input_json) + LENGTH(legacy.output_json))
+        FROM agent_runs_v1 AS legacy JOIN agent_runs AS packed ON packed.id = legacy.id
+        GROUP BY legacy.run_id
+        """
+    )
+    conn.execute("DROP TABLE agent_runs_v1")
+
+
+def _dedupe_payloads(conn: sqlite3.Connection) -> None:
+    """v3: payloads live once in a content-addressed payload_blobs table that agent_runs rows reference."""
+    conn.execute("ALTER TABLE agent_runs RENAME TO agent_runs_v2")
+    conn.execute(
+        """
+        CREATE TABLE payload_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            base_hash TEXT,
+            depth INTEGER NOT NULL DEFAULT 0,
+            raw_bytes INTEGER NOT NULL,
+            data BLOB NOT NULL
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE agent_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            agent_name TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            output_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+    packed_rows = conn.execute(
+        "SELECT id, run_id, agent_name, codec, input_payload, output_payload, created_at FROM agent_runs_v2 ORDER BY id"
+    )
+    while True:
+        chunk = packed_rows.fetchmany(500)
+        if not chunk:
+            break
+        blobs, runs = [], []
+        for row_id, run_id, agent, codec, input_payload, output_payload, created in chunk:
+            hashes = []
+            for payload in (input_payload, output_payload):
+                raw = _decompress(codec, payload)
+                payload_hash = hashlib.sha256(raw).hexdigest()
+                # Already-compressed bytes are stored as they are; only the addressing changes.
+                blobs.append((payload_hash, codec, None, 0, len(raw), payload))
+                hashes.append(payload_hash)
+            runs.append((row_id, run_id, agent, hashes[0], hashes[1], created))
+        conn.executemany(_BLOB_INSERT_SQL, blobs)
+        conn.executemany(
+            "INSERT INTO agent_runs (id, run_id, agent_name, input_hash, output_hash, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            runs,
+        )
+    conn.execute("DROP TABLE agent_runs_v2")
+    conn.execute(
+        "CREATE INDEX idx_agent_runs_run_agent_created ON agent_runs (run_id, agent_name, created_at)"
+    )
+    # Finds the previous output of an agent, the base for delta encoding.
+    conn.execute("CREATE INDEX idx_agent_runs_agent_id ON agent_runs (agent_name, id)")
+
+
+def _add_rollups(conn: sqlite3.Connection) -> None:
+    """v4: per-day, per-agent rollups that outlive rows removed by retention."""
+    conn.execute(
+        """
+        CREATE TABLE agent_run_rollups (
+            day TEXT NOT NULL,
+            agent_name TEXT NOT NULL,
+            runs INTEGER NOT NULL,
+            raw_bytes INTEGER NOT NULL,
+            last_row_id INTEGER NOT NULL,
+            last_run_id TEXT NOT NULL,
+            last_output_hash TEXT NOT NULL,
+            PRIMARY KEY (day, agent_name)
+        );
+        """
+    )
+
+
+def _add_spans(conn: sqlite3.Connection) -> None:
+    """v5: timing spans per run (agents, LLM calls, table loads, output artifacts)."""
+    conn.execute(
+        """
+        CREATE TABLE run_spans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            name TEXT NOT NULL,
+            thread TEXT NOT NULL,
+            started_seconds REAL NOT NULL,
+            seconds REAL NOT NULL,
+            attrs TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX idx_run_spans_run ON run_spans (run_id)")
+
+
+# Ordered schema migrations; the database's PRAGMA user_version records how many have been applied.
+_MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _create_legacy_table,
+    _compress_payloads,
+    _dedupe_payloads,
+    _add_rollups,
+    _add_spans,
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=_BUSY_TIMEOUT_MS / 1000, check_same_thread=False, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}")
+    # Only takes effect on a new, empty database; lets vacuum() hand pages back in small online steps.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only fsyncs at checkpoints; a power loss can drop the last commits but never corrupts.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@dataclass
+class AgentRunRecord:
+    """One agent_runs row; payloads are decoded on first access unless the query asked for them."""
+
+    id: int
+    run_id: str
+    agent_name: str
+    created_at: str
+    input_hash: str
+    output_hash: str
+    store: "RunStore" = field(repr=False, compare=False)
+    _decoded: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def input(self) -> Any:
+        return self._payload(self.input_hash)
+
+    @property
+    def output(self) -> Any:
+        return self._payload(self.output_hash)
+
+    def _payload(self, payload_hash: str) -> Any:
+        if payload_hash not in self._decoded:
+            self._decoded[payload_hash] = self.store.load_payload(payload_hash)
+        return self._decoded[payload_hash]
+
+    def load(self) -> "AgentRunRecord":
+        """Decode both payloads now (e.g. before handing the record to another thread)."""
+        self._payload(self.input_hash)
+        self._payload(self.output_hash)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "agent_name": self.agent_name,
+            "input": self.input,
+            "output": self.output,
+            "created_at": self.created_at,
+        }
+
+
+@dataclass
+class RunPage:
+    """A page of query results; pass `next_cursor` back to continue, None means this was the last page."""
+
+    records: List[AgentRunRecord]
+    next_cursor: Optional[str] = None
 
 
 class RunStore:
-    """Persists agent inputs/outputs to SQLite for auditing."""
+    """
+    Persists agent inputs/outputs to SQLite for auditing.
+
+    One long-lived WAL connection per store. With `background=True` (the default) inserts are queued
+    and written in batches by a writer thread, so agents never wait on disk; reads flush the queue
+    first so they always see earlier logs. Cross-process writers serialize on SQLite's write lock.
 
-    def __init__(self, db_path: Path):
+    Payloads are stored once per distinct content (sha256 of the JSON text). With `delta_encoding`, a new
+    output may instead be stored as a JSON patch against the same agent's previous output.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        background: bool = True,
+        batch_size: int = 256,
+        delta_encoding: bool = False,
+    ):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.background = background
+        self.batch_size = batch_size
+        self.delta_encoding = delta_encoding
+        # agent_name -> (hash, delta depth, decoded document) of its latest committed output.
+        self._delta_bases: Dict[str, Tuple[str, int, Any]] = {}
+        self._conn = _connect(self.db_path)
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._queue: "queue.Queue[Optional[List[_Row]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
         self._ensure_schema()
+        if background:
+            self._writer = threading.Thread(target=self._drain, name="run-store-writer", daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
 
     def _ensure_schema(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS agent_runs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    run_id TEXT NOT NULL,
-                    agent_name TEXT NOT NULL,
-                    input_json TEXT NOT NULL,
-                    output_json TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                """
-            )
-            conn.commit()
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            # Re-check under the write lock so concurrent processes migrate exactly once.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+                for target, migrate in enumerate(_MIGRATIONS[version:], start=version + 1):
+                    migrate(self._conn)
+                    self._conn.execute(f"PRAGMA user_version={target}")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
 
     def log(self, run_id: str, agent_name: str, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO agent_runs (run_id, agent_name, input_json, output_json) VALUES (?, ?, ?, ?)",
-                (run_id, agent_name, json.dumps(inputs), json.dumps(outputs)),
+        self.log_many([(run_id, agent_name, inputs, outputs)])
+
+    def log_many(self, records: Iterable[Tuple[str, str, Dict[str, Any], Dict[str, Any]]]) -> None:
+        """Log several (run_id, agent_name, inputs, outputs) records; they are committed together."""
+        rows = [
+            (run_id, agent_name, json.dumps(inputs), json.dumps(outputs))
+            for run_id, agent_name, inputs, outputs in records
+        ]
+        if not rows:
+            return
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.extend(rows)
+        else:
+            self._submit(rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator["RunStore"]:
+        """Buffer this thread's logs and commit them atomically on exit; discard them on error."""
+        outer = getattr(self._local, "pending", None)
+        if outer is not None:
+            # Nested blocks join the outermost transaction.
+            yield self
+            return
+        self._local.pending = []
+        try:
+            yield self
+        except BaseException:
+            self._local.pending = None
+            raise
+        rows, self._local.pending = self._local.pending, None
+        if rows:
+            self._submit(rows)
+
+    def log_spans(self, run_id: str, spans: Iterable[Any]) -> int:
+        """
+        Store a run's timing spans (instrumentation.Span records) in one transaction, bypassing the
+        agent-row queue: they are written once, at the end of a run. Returns the number stored.
+        """
+        rows = [
+            (run_id, s.category, s.name, s.thread, s.started, s.seconds, json.dumps(s.attrs, default=str))
+            for s in spans
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(_SPAN_INSERT_SQL, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    def spans_for_run(self, run_id: str, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A run's spans in start order, optionally one category ("agent", "llm", "load", "output")."""
+        query = "SELECT category, name, thread, started_seconds, seconds, attrs FROM run_spans WHERE run_id = ?"
+        params: Tuple[Any, ...] = (run_id,)
+        if category is not None:
+            query += " AND category = ?"
+            params += (category,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY started_seconds, id", params).fetchall()
+        return [
+            {
+                "category": row[0],
+                "name": row[1],
+                "thread": row[2],
+                "started": row[3],
+                "seconds": row[4],
+                "attrs": json.loads(row[5]),
+            }
+            for row in rows
+        ]
+
+    def flush(self) -> None:
+        """Block until every queued row has been committed."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+        # Stop the exit hook from keeping a closed store (and its connection state) alive.
+        atexit.unregister(self.close)
+
+    def _submit(self, rows: List[_Row]) -> None:
+        if self._writer is not None and not self._closed:
+            self._queue.put(rows)
+        else:
+            self._write(rows)
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batches = [item]
+            # Fold whatever else is already queued into the same transaction (one WAL commit).
+            stop = False
+            while sum(len(batch) for batch in batches) < self.batch_size:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is None:
+                    stop = True
+                    break
+                batches.append(extra)
+            try:
+                self._write([row for batch in batches for row in batch])
+            except Exception as exc:
+                # Any failure drops only this batch; the writer must outlive it or flush()/close() would hang.
+                print(f"[WARN] RunStore dropped {sum(len(b) for b in batches)} row(s): {exc!r}")
+            finally:
+                for _ in range(len(batches) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, rows: List[_Row]) -> None:
+        codec = _preferred_codec()
+        hashed = [
+            (run_id, agent_name, input_json, output_json, _payload_hash(input_json), _payload_hash(output_json))
+            for run_id, agent_name, input_json, output_json in rows
+        ]
+        for attempt in range(_WRITE_RETRIES):
+            try:
+                with self._lock:
+                    # IMMEDIATE takes the write lock up front so concurrent processes queue on
+                    # busy_timeout instead of failing a read->write upgrade mid-transaction.
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    staged_bases: Dict[str, Tuple[str, int, Any]] = {}
+                    try:
+                        summary: Dict[str, List[int]] = {}
+                        for run_id, agent_name, input_json, output_json, input_hash, output_hash in hashed:
+                            stored = self._store_payload(input_hash, input_json, codec)
+                            stored += self._store_payload(output_hash, output_json, codec, agent_name, staged_bases)
+                            self._conn.execute(_INSERT_SQL, (run_id, agent_name, input_hash, output_hash))
+                            totals = summary.setdefault(run_id, [0, 0, 0])
+                            totals[0] += 1
+                            totals[1] += stored
+                            totals[2] += len(input_json) + len(output_json)
+                        self._conn.executemany(
+                            _SUMMARY_UPSERT_SQL, [(run_id, *totals) for run_id, totals in summary.items()]
+                        )
+                    except BaseException:
+                        self._conn.execute("ROLLBACK")
+                        raise
+                    self._conn.execute("COMMIT")
+                    # Only committed blobs may serve as delta bases.
+                    self._delta_bases.update(staged_bases)
+                return
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc) and "busy" not in str(exc):
+                    raise
+                if attempt == _WRITE_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    def _store_payload(
+        self,
+        payload_hash: str,
+        payload_json: str,
+        codec: str,
+        agent_name: Optional[str] = None,
+        staged_bases: Optional[Dict[str, Tuple[str, int, Any]]] = None,
+    ) -> int:
+        """Insert the blob unless its content is already stored; returns the bytes newly written."""
+        track_base = self.delta_encoding and agent_name is not None and staged_bases is not None
+        existing = self._conn.execute("SELECT depth FROM payload_blobs WHERE hash = ?", (payload_hash,)).fetchone()
+        document = json.loads(payload_json) if track_base else None
+        if existing is not None:
+            stored, depth = 0, existing[0]
+        else:
+            data, base_hash, depth = _encode_payload(codec, payload_json), None, 0
+            base = self._delta_base(agent_name, staged_bases) if track_base else None
+            if base is not None and base[1] < _MAX_DELTA_DEPTH:
+                delta = _encode_payload(codec, json.dumps(make_patch(base[2], document)))
+                if len(delta) < len(data):
+                    data, base_hash, depth = delta, base[0], base[1] + 1
+            self._conn.execute(
+                _BLOB_INSERT_SQL, (payload_hash, codec, base_hash, depth, len(payload_json), data)
             )
-            conn.commit()
+            stored = len(data)
+        if track_base:
+            staged_bases[agent_name] = (payload_hash, depth, document)
+        return stored
 
-    def latest_for_run(self, run_id: str, agent_name: Optional[str] = None) -> list[Dict[str, Any]]:
-        query = "SELECT run_id, agent_name, input_json, output_json, created_at FROM agent_runs WHERE run_id = ?"
-        params: tuple[Any, ...] = (run_id,)
-        if agent_name:
-            query += " AND agent_name = ?"
-            params = (run_id, agent_name)
-        query += " ORDER BY created_at DESC"
-
-        with sqlite3.connect(self.db_path) as conn:
-            rows = conn.execute(query, params).fetchall()
-        results = []
-        for r in rows:
-            results.append(
-                {
-                    "run_id": r[0],
-                    "agent_name": r[1],
-                    "input": json.loads(r[2]),
-                    "output": json.loads(r[3]),
-                    "created_at": r[4],
+    def _delta_base(
+        self, agent_name: str, staged_bases: Dict[str, Tuple[str, int, Any]]
+    ) -> Optional[Tuple[str, int, Any]]:
+        base = staged_bases.get(agent_name)
+        if base is not None:
+            return base
+        base = self._delta_bases.get(agent_name)
+        # The cached base may have been garbage-collected by another process's prune since it was
+        # committed; this runs inside the write transaction, so a row seen here stays until COMMIT.
+        if base is not None and self._conn.execute(
+            "SELECT 1 FROM payload_blobs WHERE hash = ?", (base[0],)
+        ).fetchone() is not None:
+            return base
+        self._delta_bases.pop(agent_name, None)
+        row = self._conn.execute(
+            "SELECT b.hash, b.depth FROM agent_runs AS r JOIN payload_blobs AS b ON b.hash = r.output_hash "
+            "WHERE r.agent_name = ? ORDER BY r.id DESC LIMIT 1",
+            (agent_name,),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], self._load_payload(row[0])
+
+    def _load_payload(self, payload_hash: str) -> Any:
+        codec, base_hash, data = self._conn.execute(
+            "SELECT codec, base_hash, data FROM payload_blobs WHERE hash = ?", (payload_hash,)
+        ).fetchone()
+        document = json.loads(_decompress(codec, data))
+        if base_hash is None:
+            return document
+        return apply_patch(self._load_payload(base_hash), document)
+
+    def storage_stats(self) -> Dict[str, int]:
+        """Logged (uncompressed) bytes vs. bytes actually stored after compression, dedupe and deltas."""
+        self.flush()
+        with self._lock:
+            agent_rows, logged_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(agent_rows), 0), COALESCE(SUM(raw_bytes), 0) FROM runs"
+            ).fetchone()
+            blobs, delta_blobs, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COUNT(base_hash), COALESCE(SUM(LENGTH(data)), 0) FROM payload_blobs"
+            ).fetchone()
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "agent_rows": agent_rows,
+            "blobs": blobs,
+            "delta_blobs": delta_blobs,
+            "logged_bytes": logged_bytes,
+            "stored_bytes": stored_bytes,
+            "file_bytes": page_count * page_size,
+        }
+
+    def prune(self, keep_runs: int, *, archive_dir: Optional[Path] = None) -> Dict[str, int]:
+        """
+        Keep the newest `keep_runs` rows per agent. Older rows are folded into daily rollups (which keep
+        each day's last output), optionally appended to per-day gzip JSONL archives, and then deleted
+        along with any payload blobs nothing references anymore.
+        """
+        if keep_runs < 0:
+            raise ValueError("keep_runs must be zero or positive.")
+        self.flush()
+        with self._lock:
+            agents = [row[0] for row in self._conn.execute("SELECT DISTINCT agent_name FROM agent_runs")]
+            expired: List[Tuple[int, str, str, str, str, str]] = []
+            for agent_name in agents:
+                expired.extend(
+                    self._conn.execute(
+                        "SELECT id, run_id, agent_name, input_hash, output_hash, created_at FROM agent_runs "
+                        "WHERE agent_name = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+                        (agent_name, keep_runs),
+                    ).fetchall()
+                )
+        expired.sort()
+        stats = {"pruned_rows": len(expired), "archived_rows": 0, "rollup_days": 0, "blobs_deleted": 0}
+        if not expired:
+            return stats
+        if archive_dir is not None:
+            # Archived before deleting: an interrupted prune may archive rows twice but never loses them.
+            stats["archived_rows"] = self._archive(expired, Path(archive_dir))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rollups: Dict[Tuple[str, str], List[Any]] = {}
+                for row_id, run_id, agent_name, input_hash, output_hash, created_at in expired:
+                    raw_bytes = self._conn.execute(
+                        "SELECT COALESCE(SUM(raw_bytes), 0) FROM payload_blobs WHERE hash IN (?, ?)",
+                        (input_hash, output_hash),
+                    ).fetchone()[0]
+                    rollup = rollups.setdefault((str(created_at)[:10], agent_name), [0, 0, 0, "", ""])
+                    rollup[0] += 1
+                    rollup[1] += raw_bytes
+                    rollup[2:] = [row_id, run_id, output_hash]
+                self._conn.executemany(
+                    _ROLLUP_UPSERT_SQL, [(day, agent_name, *values) for (day, agent_name), values in rollups.items()]
+                )
+                self._conn.executemany("DELETE FROM agent_runs WHERE id = ?", [(row[0],) for row in expired])
+                self._conn.execute("DELETE FROM runs WHERE run_id NOT IN (SELECT run_id FROM agent_runs)")
+                self._conn.execute("DELETE FROM run_spans WHERE run_id NOT IN (SELECT run_id FROM runs)")
+                self._conn.execute(_BLOB_GC_SQL)
+                # cursor.rowcount is not reported for statements that start with WITH.
+                stats["blobs_deleted"] = self._conn.execute("SELECT changes()").fetchone()[0]
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            # A cached delta base may have been collected; re-read bases from the table next time.
+            self._delta_bases.clear()
+        stats["rollup_days"] = len({day for day, _ in rollups})
+        return stats
+
+    def _archive(self, rows: List[Tuple[int, str, str, str, str, str]], archive_dir: Path) -> int:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        handles: Dict[str, Any] = {}
+        try:
+            for row_id, run_id, agent_name, input_hash, output_hash, created_at in rows:
+                day = str(created_at)[:10]
+                if day not in handles:
+                    # Appending adds a gzip member; readers see one concatenated JSONL stream.
+                    handles[day] = gzip.open(archive_dir / f"agent_runs-{day}.jsonl.gz", "at", encoding="utf-8")
+                with self._lock:
+                    inputs, outputs = self._load_payload(input_hash), self._load_payload(output_hash)
+                record = {
+                    "id": row_id,
+                    "run_id": run_id,
+                    "agent_name": agent_name,
+                    "created_at": created_at,
+                    "input": inputs,
+                    "output": outputs,
                 }
-            )
-        return results
+                handles[day].write(json.dumps(record) + "\n")
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return len(rows)
+
+    def vacuum(self, *, pages_per_step: int = 256, full: bool = False) -> int:
+        """
+        Hand free pages back to the filesystem in short incremental steps, so concurrent writers only
+        ever wait for one step. Stores created before incremental auto-vacuum was enabled need a single
+        `full=True` VACUUM (blocking) to switch over. Returns the number of pages released.
+        """
+        self.flush()
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                if not full:
+                    return 0
+                self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self._conn.execute("VACUUM")
+                return page_count - self._conn.execute("PRAGMA page_count").fetchone()[0]
+        freed = 0
+        while True:
+            with self._lock:
+                free_before = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if free_before == 0:
+                    break
+                self._conn.execute(f"PRAGMA incremental_vacuum({int(pages_per_step)})").fetchall()
+                step = free_before - self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if step <= 0:
+                break
+            freed += step
+            time.sleep(0)  # let queued writes take the lock between steps
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return freed
+
+    def load_payload(self, payload_hash: str) -> Any:
+        with self._lock:
+            return self._load_payload(payload_hash)
+
+    def query(
+        self,
+        *,
+        run_id: Optional[str] = None,
+        agent_name: Optional[str] = None,
+        cursor: Optional[str] = None,
+        page_size: int = 50,
+        include_payloads: bool = False,
+    ) -> RunPage:
+        """
+        Newest-first page of agent rows, keyset-paginated on id so each page costs O(page_size) index reads
+        however large the table is. Payloads are decoded lazily unless `include_payloads` is set.
+        """
+        clauses, params = [], []
+        if run_id is not None:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if agent_name is not None:
+            clauses.append("agent_name = ?")
+            params.append(agent_name)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(int(cursor))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, run_id, agent_name, created_at, input_hash, output_hash FROM agent_runs "
+                f"{where}ORDER BY id DESC LIMIT ?",
+                (*params, page_size + 1),
+            ).fetchall()
+        records = [AgentRunRecord(*row, store=self) for row in rows[:page_size]]
+        if include_payloads:
+            for record in records:
+                record.load()
+        next_cursor = str(records[-1].id) if len(rows) > page_size else None
+        return RunPage(records, next_cursor)
+
+    def iter_records(self, *, page_size: int = 200, **filters: Any) -> Iterator[AgentRunRecord]:
+        """Walk every matching row newest-first, one query() page at a time."""
+        cursor = None
+        while True:
+            page = self.query(cursor=cursor, page_size=page_size, **filters)
+            yield from page.records
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def iter_latest_runs(self, *, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Runs newest-first across all run_ids from the summary table, paged along its last_logged_at index."""
+        self.flush()
+        position: Optional[Tuple[str, int]] = None
+        while True:
+            query = "SELECT rowid, run_id, first_logged_at, last_logged_at, agent_rows, payload_bytes, raw_bytes FROM runs "
+            params: Tuple[Any, ...] = ()
+            if position is not None:
+                query += "WHERE last_logged_at < ? OR (last_logged_at = ? AND rowid < ?) "
+                params = (position[0], position[0], position[1])
+            query += "ORDER BY last_logged_at DESC, rowid DESC LIMIT ?"
+            with self._lock:
+                rows = self._conn.execute(query, (*params, page_size)).fetchall()
+            for r in rows:
+                yield {
+                    "run_id": r[1],
+                    "first_logged_at": r[2],
+                    "last_logged_at": r[3],
+                    "agent_rows": r[4],
+                    "payload_bytes": r[5],
+                    "raw_bytes": r[6],
+                }
+            if len(rows) < page_size:
+                return
+            position = (rows[-1][3], rows[-1][0])
+
+    def list_runs(self, limit: int = 20) -> list[Dict[str, Any]]:
+        """Most recently logged runs from the summary table; never reads agent payloads."""
+        return list(itertools.islice(self.iter_latest_runs(page_size=max(limit, 1)), limit))
+
+    def latest_for_run(self, run_id: str, agent_name: Optional[str] = None) -> list[Dict[str, Any]]:
+        return [record.to_dict() for record in self.iter_records(run_id=run_id, agent_name=agent_name or None)]
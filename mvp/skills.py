@@ -0,0 +1,61 @@
+"""Skill-list parsing shared by the loaders and agents: one tokenizer, interned tuples."""
+from __future__ import annotations
+
+import ast
+import json
+import re
+from typing import Iterable, Tuple
+
+import pandas as pd
+
+from .records import shared_tuple
+
+Skills = Tuple[str, ...]
+
+# A bracketed list of single- or double-quoted items without escapes, e.g. "['Excel', \"Ops\"]".
+_LIST_RE = re.compile(r"""\s*\[\s*(?:(?:'[^'\\]*'|"[^"\\]*")\s*(?:,\s*(?:'[^'\\]*'|"[^"\\]*")\s*)*,?\s*)?\]\s*""")
+_ITEM_RE = re.compile(r"""'([^'\\]*)'|"([^"\\]*)\"""")
+
+
+def intern_skills(skills: Iterable[object]) -> Skills:
+    """
+    Strip, drop empties and return the canonical tuple for this skill list, so the employees frame, the
+    agents' lookups and the snapshot loader all hold the same objects.
+    """
+    return shared_tuple(text for text in (str(skill).strip() for skill in skills) if text)
+
+
+def parse_skills(raw: object) -> Skills:
+    """
+    Parse one skills cell: a list/tuple/set, a Python or JSON list literal, or comma-separated text.
+    Plain quoted lists go through a regex tokenizer; anything with escapes falls back to literal_eval.
+    """
+    if isinstance(raw, (list, tuple, set)):
+        return intern_skills(raw)
+    if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+        return intern_skills(())
+    text = str(raw).strip()
+    if not text:
+        return intern_skills(())
+    if _LIST_RE.fullmatch(text):
+        return intern_skills(single or double for single, double in _ITEM_RE.findall(text))
+    if text.startswith("["):
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            try:
+                parsed = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                parsed = None
+        if isinstance(parsed, list):
+            return intern_skills(parsed)
+    return intern_skills(text.split(","))
+
+
+def parse_skills_column(column: pd.Series) -> pd.Series:
+    """Parse a whole skills column, tokenizing each distinct cell once and broadcasting the tuples back."""
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    parsed = [parse_skills(value) for value in uniques]
+    parsed.append(intern_skills(()))  # code -1 (missing) indexes the trailing empty tuple
+    table = pd.Series(parsed, dtype=object).to_numpy()
+    return pd.Series(table[codes], index=column.index, name=column.name, dtype=object)
@@ -0,0 +1,150 @@
+"""Columnar binary snapshots of the input CSVs: one .npy file per column, memory-mapped on load."""
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .skills import intern_skills
+
+SNAPSHOT_DIRNAME = ".snapshots"
+_FORMAT_VERSION = 3
+_MANIFEST = "manifest.json"
+# Mapping costs more than reading for small columns; only columns past this size are memory-mapped.
+_MMAP_MIN_BYTES = 1 << 20
+
+
+def snapshot_dir_for(csv_path: Path) -> Path:
+    """data/tasks.csv -> data/.snapshots/tasks"""
+    csv_path = Path(csv_path)
+    return csv_path.parent / SNAPSHOT_DIRNAME / csv_path.stem
+
+
+def _source_stamp(csv_path: Path) -> Dict[str, int]:
+    stat = Path(csv_path).stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _sequence_kind(series: pd.Series) -> Optional[str]:
+    """'list' or 'tuple' when every cell is that container type, else None."""
+    if series.dtype != object or series.empty:
+        return None
+    for kind, container in (("list", list), ("tuple", tuple)):
+        if series.map(lambda value: isinstance(value, container)).all():
+            return kind
+    return None
+
+
+def _write_column(series: pd.Series, directory: Path, stem: str) -> Dict[str, Any]:
+    """Save one column and describe how to rebuild it with the same dtype."""
+    entry: Dict[str, Any] = {"name": series.name, "dtype": str(series.dtype)}
+    values = series.to_numpy()
+    if series.dtype.kind in "biufcmM":
+        # Numbers, bools, datetimes and timedeltas (NaT included) round-trip as-is and can be mapped.
+        entry["kind"] = "array"
+        np.save(directory / f"{stem}.npy", values, allow_pickle=False)
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        # Categoricals keep their integer codes (mappable) and store the category labels once.
+        entry["kind"] = "category"
+        entry["ordered"] = bool(series.cat.ordered)
+        np.save(directory / f"{stem}.npy", series.cat.codes.to_numpy(), allow_pickle=False)
+        np.save(directory / f"{stem}.categories.npy", series.cat.categories.to_numpy().astype(str), allow_pickle=False)
+        entry["categories_dtype"] = str(series.cat.categories.dtype)
+    elif _sequence_kind(series):
+        # Lists or tuples of strings (e.g. parsed skills): flattened values plus row offsets.
+        entry["kind"] = _sequence_kind(series)
+        lengths = series.map(len).to_numpy(dtype=np.int64)
+        flat = [str(item) for row in values for item in row]
+        np.save(directory / f"{stem}.npy", np.array(flat, dtype=str), allow_pickle=False)
+        np.save(directory / f"{stem}.offsets.npy", np.concatenate([[0], np.cumsum(lengths)]), allow_pickle=False)
+    elif series.map(lambda value: isinstance(value, str) or pd.isna(value)).all():
+        # Strings become a fixed-width unicode array; a mask restores missing values.
+        entry["kind"] = "str"
+        missing = series.isna().to_numpy()
+        np.save(directory / f"{stem}.npy", np.where(missing, "", values.astype(object)).astype(str), allow_pickle=False)
+        if missing.any():
+            entry["mask"] = True
+            np.save(directory / f"{stem}.mask.npy", missing, allow_pickle=False)
+    else:
+        raise ValueError(f"Column {series.name!r} with dtype {series.dtype} has no snapshot encoding.")
+    return entry
+
+
+def _read_column(entry: Dict[str, Any], directory: Path, stem: str, rows: int) -> pd.Series:
+    column_path = directory / f"{stem}.npy"
+    mmap_mode = "r" if column_path.stat().st_size >= _MMAP_MIN_BYTES else None
+    data = np.load(column_path, mmap_mode=mmap_mode, allow_pickle=False)
+    if entry["kind"] == "array":
+        # A plain ndarray view of the mapping: pages are read on first touch, not copied up front.
+        return pd.Series(np.asarray(data), name=entry["name"], copy=False)
+    if entry["kind"] == "category":
+        labels = np.load(directory / f"{stem}.categories.npy", allow_pickle=False).astype(object)
+        categories = pd.Index(labels, dtype=entry["categories_dtype"])
+        values = pd.Categorical.from_codes(np.asarray(data), categories=categories, ordered=entry["ordered"])
+        return pd.Series(values, name=entry["name"], copy=False)
+    if entry["kind"] in ("list", "tuple"):
+        flat = data.astype(object)
+        offsets = np.load(directory / f"{stem}.offsets.npy", allow_pickle=False)
+        # Tuples come back as the shared interned skill tuples, exactly as the CSV loader produces them.
+        build = list if entry["kind"] == "list" else intern_skills
+        cells = np.empty(rows, dtype=object)
+        for row, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            cells[row] = build(flat[start:end].tolist())
+        return pd.Series(cells, name=entry["name"], dtype=object, copy=False)
+    values = data.astype(object)
+    if entry.get("mask"):
+        values[np.load(directory / f"{stem}.mask.npy", allow_pickle=False)] = np.nan
+    return pd.Series(values, name=entry["name"], dtype=entry["dtype"])
+
+
+def write_snapshot(frame: pd.DataFrame, target: Path, csv_path: Path) -> Path:
+    """
+    Write `frame` (already parsed from csv_path) as a snapshot generation under target. The manifest is
+    swapped in atomically last, so readers see either the previous generation or the complete new one.
+    """
+    if not isinstance(frame.index, pd.RangeIndex):
+        raise ValueError("Snapshots store a default RangeIndex only.")
+    target = Path(target)
+    target.mkdir(parents=True, exist_ok=True)
+    generation = uuid.uuid4().hex[:12]
+    columns: List[Dict[str, Any]] = []
+    for position, name in enumerate(frame.columns):
+        entry = _write_column(frame[name], target, f"{generation}-{position}")
+        entry["file"] = f"{generation}-{position}"
+        columns.append(entry)
+    manifest = {
+        "format": _FORMAT_VERSION,
+        "generation": generation,
+        "source": {"name": Path(csv_path).name, **_source_stamp(csv_path)},
+        "rows": len(frame),
+        "columns": columns,
+    }
+    staging = target / f"{_MANIFEST}.{generation}"
+    staging.write_text(json.dumps(manifest, indent=2))
+    os.replace(staging, target / _MANIFEST)
+    for stale in target.glob("*.npy"):
+        if not stale.name.startswith(f"{generation}-"):
+            stale.unlink(missing_ok=True)
+    return target
+
+
+def read_snapshot(target: Path, csv_path: Path) -> Optional[pd.DataFrame]:
+    """The snapshot's frame if it was taken from csv_path as it is now; None if missing, stale or unreadable."""
+    try:
+        manifest = json.loads((Path(target) / _MANIFEST).read_text())
+        if manifest.get("format") != _FORMAT_VERSION:
+            return None
+        stamp = manifest["source"]
+        if {"mtime_ns": stamp["mtime_ns"], "size": stamp["size"]} != _source_stamp(csv_path):
+            return None
+        rows = manifest["rows"]
+        series = [_read_column(entry, Path(target), entry["file"], rows) for entry in manifest["columns"]]
+    except (OSError, ValueError, KeyError):
+        # A concurrent refresh may have removed an older generation mid-read; the CSV is the fallback.
+        return None
+    return pd.DataFrame({column.name: column for column in series}, copy=False)
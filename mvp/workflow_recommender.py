@@ -1,36 +1,69 @@
 """OpenAI-backed workflow recommender."""
 from __future__ import annotations
 
-import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from .llm_utils import safe_openai_json
+from .llm_utils import note_fallback, openai_enabled, safe_openai_json
+from .prompt_packing import PromptPacker, compact_json, estimate_tokens, record_prompt_tokens
+from .records import record_dict
 from .run_store import RunStore
 
+_RECOMMENDER_INSTRUCTIONS = (
+    "Recommend concrete process changes: parallelize safe tasks, set WIP limits, resequence items blocked by "
+    "bottlenecks, rebalance workload across timezones, and add AI co-pilots to repetitive writing/analysis steps. "
+    "Context tables are columnar (`columns` names each row position). Return JSON list of recommendations."
+)
+
 
 class WorkflowRecommender:
     """Suggests process tweaks using OpenAI with rule-based fallback."""
 
-    def __init__(self, assignments, ai_suggestions, bottlenecks, run_store: RunStore, run_id: str):
+    def __init__(
+        self,
+        assignments,
+        ai_suggestions,
+        bottlenecks,
+        run_store: RunStore,
+        run_id: str,
+        *,
+        token_budget: Optional[int] = None,
+    ):
         self.assignments = assignments
         self.ai_suggestions = ai_suggestions
         self.bottlenecks = bottlenecks
         self.run_store = run_store
         self.run_id = run_id
+        self.packer = PromptPacker(token_budget)
+
+    def _render_prompt(self, system_prompt: str = "") -> str:
+        # Per-row guardrail boilerplate and rationales add little here; keep the fields that drive process advice.
+        assignment_rows = [
+            [getattr(a, "task_id", None), getattr(a, "assignee", None), round(float(getattr(a, "score", 0.0)), 2)]
+            for a in self.assignments
+        ]
+        suggestion_rows = [
+            [getattr(s, "task_id", None), getattr(s, "department", None), getattr(s, "reviewer", None), getattr(s, "reason", None)]
+            for s in self.ai_suggestions
+            if getattr(s, "recommended", False)
+        ]
 
-    def _render_prompt(self) -> str:
-        return json.dumps(
-            {
+        def payload(assignments: List[List[object]], suggestions: List[List[object]]) -> Dict[str, object]:
+            return {
                 "context": {
-                    "assignments": [getattr(a, "__dict__", a) for a in self.assignments],
-                    "ai_suggestions": [getattr(s, "__dict__", s) for s in self.ai_suggestions],
-                    "bottlenecks": [getattr(b, "__dict__", b) for b in self.bottlenecks],
+                    "bottlenecks": [record_dict(b) for b in self.bottlenecks],
+                    "assignments": {"columns": ["task_id", "assignee", "score"], "rows": assignments},
+                    "ai_suggestions": {"columns": ["task_id", "department", "reviewer", "reason"], "rows": suggestions},
+                    "totals": {"assignments": len(assignment_rows), "ai_recommended": len(suggestion_rows)},
                 },
-                "instructions": "Recommend concrete process changes: parallelize safe tasks, set WIP limits, resequence items blocked by bottlenecks, rebalance workload across timezones, and add AI co-pilots to repetitive writing/analysis steps. Return JSON list of recommendations.",
+                "instructions": _RECOMMENDER_INSTRUCTIONS,
                 "response_schema": {"recommendations": ["text" for _ in range(3)]},
-            },
-            indent=2,
-        )
+            }
+
+        available = self.packer.token_budget - estimate_tokens(system_prompt) - estimate_tokens(compact_json(payload([], [])))
+        kept_suggestions = self.packer.truncate(suggestion_rows, available // 2)
+        available -= sum(self.packer.row_tokens(row) for row in kept_suggestions)
+        kept_assignments = self.packer.truncate(assignment_rows, available)
+        return compact_json(payload(kept_assignments, kept_suggestions))
 
     def run(self) -> List[str]:
         system_prompt = (
@@ -40,8 +73,6 @@ class WorkflowRecommender:
             "generic advice. Output JSON adhering to the response schema and nothing "
             "else."
         )
-        user_prompt = self._render_prompt()
-
         fallback_recos: List[str] = []
         if self.bottlenecks:
             fallback_recos.append("Set WIP limits and add daily standups to relieve the top bottleneck stage.")
@@ -50,11 +81,14 @@ class WorkflowRecommender:
         if self.assignments:
             fallback_recos.append("Rebalance workload by shifting low-skill tasks to underutilized team members.")
 
-        result = safe_openai_json(
-            system_prompt,
-            user_prompt,
-            fallback={"recommendations": fallback_recos or ["No recommendations generated."]},
-        )
+        fallback = {"recommendations": fallback_recos or ["No recommendations generated."]}
+        if openai_enabled():
+            user_prompt = self._render_prompt(system_prompt)
+            record_prompt_tokens("workflow_recommender", system_prompt + user_prompt)
+            result = safe_openai_json(system_prompt, user_prompt, fallback=fallback, agent="workflow_recommender")
+        else:
+            note_fallback("workflow_recommender")
+            result = fallback
         recommendations = [str(r) for r in result.get("recommendations", fallback_recos)]
 
         self.run_store.log(
@@ -1,28 +1,35 @@
+"""Synthetic retail dataset generator with six injected workflow bottlenecks.
+
+Produces employees, availability, projects, tasks and an event log shaped like data/, with the bottlenecks
+the agents should find: analytics backlog, creative review ping-pong, engineering interrupts, vendor waits,
+late finance/legal gates and misallocated owners. Every injected delay is also recorded, by stage and handoff
+edge, in bottleneck_manifest.json, the ground truth benchmarks/bottleneck_recovery.py scores the detector on.
+
+Generation is vectorized with NumPy: every task advances through its bottleneck flow one step at a time, all
+tasks at once, so multi-million-event datasets take seconds. Each table draws from its own random stream
+spawned from one seed, so the same config and seed always give the same files.
+
+Usage: python synthetic_data_generator.py --output_dir /tmp/retail [--scale 100] [--seed 42]
+           [--employees 33] [--projects 10] [--tasks_per_project 15] [--availability_days 60] [--json]
+"""
 # ============================================================
 # 0) Imports + Config
 # ============================================================
-import json, random, re, math
-from dataclasses import dataclass
-from datetime import datetime, timedelta, date, time
-from typing import List, Dict, Optional, Tuple, Literal
-
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from dataclasses import dataclass, replace
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 import pandas as pd
 
-SEED = 42
-random.seed(SEED)
-
 TYPE_OF_COMPANY = "a mid-sized e-commerce/fashion/retail company selling apparel, accessories, and beauty"
-NUMBER_OF_EMPLOYEES = 33
-
-TOTAL_PROJECTS = 10
-COMPLETED_PROJECTS = 4
-IN_PROGRESS_PROJECTS = 4
-NOT_STARTED_PROJECTS = 2
-TASKS_PER_PROJECT = 15
-
-# Availability horizon
-AVAIL_START_DATE = date(2025, 12, 15)
-AVAIL_DAYS = 60
 
 TIMEZONES = [
     "America/New_York",
@@ -33,53 +40,82 @@ TIMEZONES = [
     "Europe/Paris",
 ]
 
-# "Workday" clamp used in events + task timestamps
-WORKDAY_START_LOCAL = time(9, 0)
-WORKDAY_END_LOCAL = time(18, 0)
-
-OUTPUT_DIR = "/Users/tiffanie/code/agentic-project-management/data"
-# EXCEL_PATH = f"{OUTPUT_DIR}/synthetic_retail_dataset.xlsx"
-JSON_PATH = f"{OUTPUT_DIR}/synthetic_retail_dataset.json"
+# "Workday" clamp used in events + task timestamps (seconds after midnight)
+WORKDAY_START_S = 9 * 3_600
+WORKDAY_END_S = 18 * 3_600
 
 # Ollama settings (will fallback if server not reachable)
-USE_OLLAMA = False
 OLLAMA_HOST = "http://localhost:11434"
 OLLAMA_MODEL = "llama3.1"  # change to your installed model name, e.g. "llama3", "mistral", etc.
 
+TABLES = ("employees", "availability", "projects", "tasks", "events")
+# Ground truth for scoring the bottleneck detector (benchmarks/bottleneck_recovery.py)
+MANIFEST_FILE = "bottleneck_manifest.json"
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """Dataset shape; the defaults match the bundled data/ tables (33 employees, 10 projects x 15 tasks)."""
+
+    employees: int = 33
+    projects: int = 10
+    tasks_per_project: int = 15
+    availability_days: int = 60
+    availability_start: date = date(2025, 12, 15)
+    seed: int = 42
+    use_ollama: bool = False
+
+    def scaled(self, factor: float) -> GeneratorConfig:
+        """Employees and projects multiplied by `factor`; tasks and events grow with the projects."""
+        return replace(
+            self,
+            employees=max(1, round(self.employees * factor)),
+            projects=max(1, round(self.projects * factor)),
+        )
+
+
 # ============================================================
 # 1) Light helpers
 # ============================================================
 
-def iso_dt(dt: datetime) -> str:
-    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+_DAY = 86_400
+_HOUR = 3_600
+_QUARTER_HOURS = np.array([0, 15, 30, 45]) * 60
+_NO_TIME = -1  # "no forced pickup" marker in timestamp arrays
 
-def parse_iso_dt(s: str) -> datetime:
-    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S")
 
-def clamp_dt(dt: datetime, start_t: time, end_t: time) -> datetime:
-    # Keep same date; clamp time
-    t = dt.time()
-    if t < start_t:
-        return dt.replace(hour=start_t.hour, minute=start_t.minute, second=0)
-    if t > end_t:
-        return dt.replace(hour=end_t.hour, minute=end_t.minute, second=0)
-    return dt.replace(second=0)
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip().lower())
 
-def rand_time(min_h=9, max_h=18) -> Tuple[int,int,int]:
-    hh = random.randint(min_h, max_h)
-    mm = random.choice([0, 15, 30, 45])
-    ss = 0
-    return (hh, mm, ss)
 
-def daterange(start: date, days: int):
-    for i in range(days):
-        yield start + timedelta(days=i)
+def _ids(prefix: str, count: int, width: int) -> np.ndarray:
+    width = max(width, len(str(count)))
+    return np.char.add(prefix, np.char.zfill(np.arange(1, count + 1).astype(str), width)).astype(object)
+
+
+def _iso(seconds: np.ndarray) -> np.ndarray:
+    """Epoch seconds -> "YYYY-MM-DDTHH:MM:SS" strings (formatting each distinct time once; most repeat)."""
+    unique, inverse = np.unique(seconds, return_inverse=True)
+    return unique.astype("datetime64[s]").astype(str).astype(object)[inverse]
+
+
+def _clamp_workday(ts: np.ndarray) -> np.ndarray:
+    """Keep each timestamp's date; clamp its time into the workday and drop the seconds."""
+    time_of_day = np.clip(ts % _DAY, WORKDAY_START_S, WORKDAY_END_S)
+    return ts - ts % _DAY + time_of_day - time_of_day % 60
+
+
+def _business_ts(rng: np.random.Generator, base: np.ndarray, min_hour: int = 10, max_hour: int = 16) -> np.ndarray:
+    """Same day as `base`, at a random quarter hour between min_hour and max_hour."""
+    hours = rng.integers(min_hour, max_hour + 1, len(base))
+    return base - base % _DAY + hours * _HOUR + rng.choice(_QUARTER_HOURS, len(base))
+
+
+def _streams(seed: int) -> Dict[str, np.random.Generator]:
+    """One independent generator per table, so changing how one table is drawn never reshuffles the others."""
+    children = np.random.SeedSequence(seed).spawn(len(TABLES))
+    return {table: np.random.default_rng(child) for table, child in zip(TABLES, children)}
 
-def safe_int(x, default=0):
-    try:
-        return int(x)
-    except:
-        return default
 
 # ============================================================
 # 2) Ollama call (1-2 calls total) with fallback
@@ -106,8 +142,9 @@ def ollama_chat(prompt: str, model: str = OLLAMA_MODEL, temperature: float = 0.6
     data = r.json()
     return data["message"]["content"]
 
-def try_ollama_json(prompt: str, default_obj):
-    if not USE_OLLAMA:
+
+def try_ollama_json(prompt: str, default_obj: Any, enabled: bool = False) -> Any:
+    if not enabled:
         return default_obj
     try:
         txt = ollama_chat(prompt)
@@ -120,8 +157,9 @@ def try_ollama_json(prompt: str, default_obj):
         print(f"[WARN] Ollama unavailable or JSON parse failed, using fallback. Reason: {e}")
         return default_obj
 
+
 # ============================================================
-# 3) Employees (Python-only)
+# 3) Employees
 # ============================================================
 
 DEPARTMENTS = [
@@ -205,7 +243,7 @@ ROLES = [
     ("Legal & Compliance", "Privacy & Data Compliance Specialist"),
 ]
 
-# Department skill catalogs (15 each)
+# Department skill catalogs (10 each)
 DEPT_SKILLS: Dict[str, List[str]] = {
     "Brand Marketing": [
         "Brand positioning", "Campaign planning", "Creative briefing", "Brand voice", "Influencer strategy",
@@ -268,42 +306,61 @@ DEPT_SKILLS: Dict[str, List[str]] = {
 FIRST_NAMES = ["Ava","Mia","Sofia","Liam","Noah","Ethan","Olivia","Isabella","Aria","Zoe","Kai","Leo","Amir","Nina","Hana","Chloe","Evelyn","Maya","Jade","Sam"]
 LAST_NAMES  = ["Nguyen","Patel","Kim","Garcia","Lopez","Chen","Singh","Rodriguez","Williams","Brown","Lee","Martinez","Davis","Wilson","Anderson","Thomas","Moore","Jackson","Martin","Taylor"]
 
-def generate_employees_py() -> List[Dict]:
-    employee_rows = []
-    # Build E001..E033 and assign roles 1:1 from ROLES list (already 33)
-    for i in range(1, NUMBER_OF_EMPLOYEES + 1):
-        eid = f"E{i:03d}"
-        dept, role = ROLES[i-1]
-        name = f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}"
-        max_hours = random.randint(20, 60)
-        tz = random.choice(TIMEZONES)
-
-        # 5 skills from own dept + 1 cross-dept skill
-        dept_sk = random.sample(DEPT_SKILLS[dept], k=5)
-        other_dept = random.choice([d for d in DEPARTMENTS if d != dept])
-        cross = random.choice(DEPT_SKILLS[other_dept])
-        skills = dept_sk + [cross]
-        random.shuffle(skills)
-
-        employee_rows.append({
-            "id": eid,
-            "name": name,
-            "department": dept,
-            "role": role,
-            "skills": skills,
-            "max_hours": max_hours,
-            "timezone": tz,
-        })
-    return employee_rows
-
-employees = generate_employees_py()
-employees_df = pd.DataFrame(employees)
-
-# Global skill pool used for tasks skill_needed selection
-skill_pool = sorted({s.strip() for e in employees for s in e["skills"] if s.strip()})
+_ROLE_TITLES = np.array([role for _, role in ROLES], dtype=object)
+_ROLE_DEPT = np.array([DEPARTMENTS.index(dept) for dept, _ in ROLES])
+_DEPARTMENT_NAMES = np.array(DEPARTMENTS, dtype=object)
+_SKILLS_PER_DEPT = len(DEPT_SKILLS[DEPARTMENTS[0]])
+# Every department skill, department by department; employees' skills are indices into this.
+_SKILL_CATALOG = np.array([skill for dept in DEPARTMENTS for skill in DEPT_SKILLS[dept]], dtype=object)
+OWN_SKILLS = 5  # plus one cross-department skill
+
+
+@dataclass(frozen=True)
+class _Staff:
+    """Employee columns the later tables need, as positional arrays."""
+
+    ids: np.ndarray
+    role: np.ndarray  # index into ROLES
+    dept: np.ndarray  # index into DEPARTMENTS
+    max_hours: np.ndarray
+    skills: np.ndarray  # (employees, OWN_SKILLS + 1) indices into _SKILL_CATALOG
+
+
+def _build_employees(rng: np.random.Generator, count: int) -> Tuple[pd.DataFrame, _Staff]:
+    # Roles repeat the 33-role roster in order, so every department keeps its share at any size.
+    role = np.arange(count) % len(ROLES)
+    dept = _ROLE_DEPT[role]
+
+    # 5 skills from own dept (already in random order) + 1 cross-dept skill at a random position
+    own = dept[:, None] * _SKILLS_PER_DEPT + np.argsort(rng.random((count, _SKILLS_PER_DEPT)), axis=1)[:, :OWN_SKILLS]
+    other_dept = (dept + rng.integers(1, len(DEPARTMENTS), count)) % len(DEPARTMENTS)
+    cross = other_dept * _SKILLS_PER_DEPT + rng.integers(0, _SKILLS_PER_DEPT, count)
+    slot = rng.integers(0, OWN_SKILLS + 1, count)[:, None]
+    columns = np.arange(OWN_SKILLS + 1)
+    skills = np.take_along_axis(own, np.minimum(columns - (columns > slot), OWN_SKILLS - 1), axis=1)
+    skills[columns == slot] = cross
+
+    staff = _Staff(
+        ids=_ids("E", count, 3), role=role, dept=dept, max_hours=rng.integers(20, 61, count), skills=skills
+    )
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), count)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), count)]
+    frame = pd.DataFrame(
+        {
+            "id": staff.ids,
+            "name": first + " " + last,
+            "department": _DEPARTMENT_NAMES[dept],
+            "role": _ROLE_TITLES[role],
+            "skills": _SKILL_CATALOG[skills].tolist(),
+            "max_hours": staff.max_hours,
+            "timezone": np.array(TIMEZONES, dtype=object)[rng.integers(0, len(TIMEZONES), count)],
+        }
+    )
+    return frame, staff
+
 
 # ============================================================
-# 4) Availability (Python-only, "LLM-like nuance")
+# 4) Availability ("LLM-like nuance")
 # ============================================================
 
 def seniority_score(role: str) -> int:
@@ -314,123 +371,116 @@ def seniority_score(role: str) -> int:
     if any(k in r for k in ["senior"]): return 1
     return 0
 
-def role_rhythm(dept: str) -> Dict[str, float]:
-    """
-    Returns meeting-load + weekend-likelihood by dept to shape daily free hours.
-    """
-    # meeting_load: higher means fewer deep-work hours on weekdays
-    # weekend_bias: higher means more likely nonzero Sat/Sun hours
-    base = {
-        "Engineering": (0.9, 0.2),
-        "Data & Analytics": (1.0, 0.1),
-        "Product Management": (1.4, 0.2),
-        "Brand Marketing": (1.2, 0.3),
-        "Performance Marketing": (1.1, 0.35),
-        "Creative Studio": (1.1, 0.45),
-        "Merchandising & Buying": (1.2, 0.25),
-        "Supply Chain": (1.1, 0.25),
-        "Warehouse & Fulfillment Ops": (1.0, 0.2),
-        "Customer Experience (CX)": (1.3, 0.35),
-        "Sales & Partnerships": (1.4, 0.4),
-        "Finance": (1.2, 0.15),
-        "Legal & Compliance": (1.3, 0.1),
-        "Product Design (UX/UI)": (1.1, 0.25),
-    }
-    ml, wb = base.get(dept, (1.1, 0.2))
-    return {"meeting_load": ml, "weekend_bias": wb}
 
-def weekly_pattern_for_employee(emp: Dict) -> Dict[str, int]:
+# meeting_load: higher means fewer deep-work hours on weekdays
+# weekend_bias: higher means more likely nonzero Sat/Sun hours
+DEPT_RHYTHM: Dict[str, Tuple[float, float]] = {
+    "Engineering": (0.9, 0.2),
+    "Data & Analytics": (1.0, 0.1),
+    "Product Management": (1.4, 0.2),
+    "Brand Marketing": (1.2, 0.3),
+    "Performance Marketing": (1.1, 0.35),
+    "Creative Studio": (1.1, 0.45),
+    "Merchandising & Buying": (1.2, 0.25),
+    "Supply Chain": (1.1, 0.25),
+    "Warehouse & Fulfillment Ops": (1.0, 0.2),
+    "Customer Experience (CX)": (1.3, 0.35),
+    "Sales & Partnerships": (1.4, 0.4),
+    "Finance": (1.2, 0.15),
+    "Legal & Compliance": (1.3, 0.1),
+    "Product Design (UX/UI)": (1.1, 0.25),
+}
+FOCUS_DEPARTMENTS = ["Engineering", "Data & Analytics", "Product Design (UX/UI)"]
+CRUNCH_DEPARTMENTS = ["Brand Marketing", "Performance Marketing", "Creative Studio"]
+
+
+def _weekly_patterns(rng: np.random.Generator, staff: _Staff) -> np.ndarray:
     """
-    Produces 0..10 hours_free per day, with:
+    (employees, 7) hours free Mon..Sun, 0..10, with:
     - seniority reduces deep-work
     - part-time reduces overall
     - midweek focus blocks (Tue/Wed) for ICs
     - weekends usually low but varies by dept
     """
-    dept = emp["department"]
-    role = emp["role"]
-    max_hours = emp["max_hours"]
-
-    s = seniority_score(role)
-    rhythm = role_rhythm(dept)
-    meeting_load = rhythm["meeting_load"] + 0.25*s  # seniors have more meetings
-    weekend_bias = rhythm["weekend_bias"]
-
-    # base weekday deep-work capacity
-    # scale with max_hours (20..50 maps ~3..7 avg weekday)
-    scale = (max_hours - 20) / 30.0  # 0..1
-    base_weekday = 3.0 + 4.0*scale   # 3..7
-    base_weekday = max(2.0, base_weekday - 0.6*s)  # senior reduction
-
-    # convert meeting load into reduction
-    base_weekday = max(1.5, base_weekday - 0.8*(meeting_load - 1.0))
-
-    # add "focus blocks" Tue/Wed for IC-ish roles (lower seniority)
-    focus_boost = 1.0 if s <= 1 and dept in ["Engineering","Data & Analytics","Product Design (UX/UI)"] else 0.4
-
-    # daily jitter
-    def jitter(x): return x + random.uniform(-0.7, 0.7)
-
-    mon = jitter(base_weekday - 0.3)  # Monday meetings
-    tue = jitter(base_weekday + focus_boost)
-    wed = jitter(base_weekday + focus_boost)
-    thu = jitter(base_weekday + 0.2)
-    fri = jitter(base_weekday - 0.5)  # Friday lighter
-
-    # weekends
-    sat = random.uniform(0, 3) * weekend_bias
-    sun = random.uniform(0, 2.5) * (weekend_bias * 0.9)
-
-    # occasionally: crunch weeks for marketing/creative near launches
-    if dept in ["Brand Marketing","Performance Marketing","Creative Studio"] and random.random() < 0.25:
-        sat += random.uniform(0.5, 2.0)
-        # sunday sometimes
-        if random.random() < 0.5:
-            sun += random.uniform(0.25, 1.5)
-
-    # clamp to 0..10 ints
-    days = [mon,tue,wed,thu,fri,sat,sun]
-    days = [int(max(0, min(10, round(x)))) for x in days]
-
-    return {"mon":days[0],"tue":days[1],"wed":days[2],"thu":days[3],"fri":days[4],"sat":days[5],"sun":days[6]}
-
-patterns = {e["id"]: weekly_pattern_for_employee(e) for e in employees}
-
-availability_rows = []
-weekday_fields = ["mon","tue","wed","thu","fri","sat","sun"]
-for d in daterange(AVAIL_START_DATE, AVAIL_DAYS):
-    fld = weekday_fields[d.weekday()]
-    for eid, pat in patterns.items():
-        # small day-to-day variability (simulate interruptions / PTO)
-        base = pat[fld]
-        if random.random() < 0.05:
-            base = max(0, base - random.randint(2, 5))  # partial PTO
-        if random.random() < 0.05:
-            base = min(10, base + random.randint(1, 3)) # extra push
-        availability_rows.append({"employee_id": eid, "date": d.isoformat(), "hours_free": int(base)})
-
-availability_df = pd.DataFrame(availability_rows)
+    count = len(staff.ids)
+    seniority = np.array([seniority_score(role) for role in _ROLE_TITLES])[staff.role]
+    meeting_load, weekend_bias = np.array([DEPT_RHYTHM.get(dept, (1.1, 0.2)) for dept in DEPARTMENTS]).T[:, staff.dept]
+    meeting_load = meeting_load + 0.25 * seniority  # seniors have more meetings
+
+    # base weekday deep-work capacity: max_hours 20..50 maps to ~3..7, minus seniority and meeting load
+    scale = (staff.max_hours - 20) / 30.0
+    base_weekday = np.maximum(2.0, 3.0 + 4.0 * scale - 0.6 * seniority)
+    base_weekday = np.maximum(1.5, base_weekday - 0.8 * (meeting_load - 1.0))
+
+    focus_depts = [DEPARTMENTS.index(dept) for dept in FOCUS_DEPARTMENTS]
+    focus_boost = np.where((seniority <= 1) & np.isin(staff.dept, focus_depts), 1.0, 0.4)
+    # Monday meetings, Tue/Wed focus blocks, lighter Friday; each day jittered
+    offsets = np.column_stack([np.full(count, -0.3), focus_boost, focus_boost, np.full(count, 0.2), np.full(count, -0.5)])
+    weekdays = base_weekday[:, None] + offsets + rng.uniform(-0.7, 0.7, (count, 5))
+
+    sat = rng.uniform(0, 3, count) * weekend_bias
+    sun = rng.uniform(0, 2.5, count) * (weekend_bias * 0.9)
+    # occasionally: crunch weeks for marketing/creative near launches, sunday sometimes
+    crunch = np.isin(staff.dept, [DEPARTMENTS.index(dept) for dept in CRUNCH_DEPARTMENTS]) & (rng.random(count) < 0.25)
+    sat += np.where(crunch, rng.uniform(0.5, 2.0, count), 0.0)
+    sun += np.where(crunch & (rng.random(count) < 0.5), rng.uniform(0.25, 1.5, count), 0.0)
+
+    return np.clip(np.round(np.column_stack([weekdays, sat, sun])), 0, 10).astype(np.int64)
+
+
+def _build_availability(rng: np.random.Generator, staff: _Staff, start: date, days: int) -> pd.DataFrame:
+    patterns = _weekly_patterns(rng, staff)
+    dates = np.datetime64(start, "D") + np.arange(days)
+    weekday = (dates.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Mon=0
+    hours = patterns[:, weekday].T.ravel()  # day-major, like one row per employee per day
+
+    # small day-to-day variability (simulate interruptions / PTO)
+    size = len(hours)
+    pto = rng.random(size) < 0.05
+    hours = np.where(pto, np.maximum(0, hours - rng.integers(2, 6, size)), hours)  # partial PTO
+    push = rng.random(size) < 0.05
+    hours = np.where(push, np.minimum(10, hours + rng.integers(1, 4, size)), hours)  # extra push
+    return pd.DataFrame(
+        {
+            "employee_id": np.tile(staff.ids, days),
+            "date": np.repeat(dates.astype(str).astype(object), len(staff.ids)),
+            "hours_free": hours,
+        }
+    )
+
 
 # ============================================================
 # 5) Projects (1 LLM call; Python assigns IDs + deadlines)
 # ============================================================
 
-def make_deadlines():
-    """
-    Deadlines relative to 2026-01-01:
-    - completed (4): in 2025
-    - in_progress (4): early 2026
-    - not_started (2): mid-late 2026
-    """
-    completed = [date(2025, m, random.randint(5, 25)) for m in [8,9,10,11]]
-    inprog    = [date(2026, m, random.randint(5, 28)) for m in [1,2,3,4]]
-    notstart  = [date(2026, m, random.randint(5, 28)) for m in [7,10]]
-    return completed, inprog, notstart
+BUCKETS = ("completed", "in_progress", "not_started")
+# Share of the portfolio per bucket, in id order (4/4/2 of the default 10 projects).
+COMPLETED_SHARE = 0.4
+IN_PROGRESS_SHARE = 0.4
+# Deadlines relative to 2026-01-01, per bucket: (year, months cycled through, latest day of month).
+BUCKET_DEADLINES: Dict[str, Tuple[int, Tuple[int, ...], int]] = {
+    "completed": (2025, (8, 9, 10, 11), 25),
+    "in_progress": (2026, (1, 2, 3, 4), 28),
+    "not_started": (2026, (7, 10), 28),
+}
+
+FALLBACK_PROJECTS: List[Dict[str, Any]] = [
+    {"name":"Returns Experience Overhaul (Self-Service + Policy Simplification)","description":"Improve self-serve returns flows, clarify policy copy, and reduce ticket volume by streamlining refunds/exchanges.","priority":5},
+    {"name":"Warehouse Slotting Optimization for Peak Season","description":"Re-slot top SKUs, improve pick paths, and reduce fulfillment cycle time ahead of peak demand.","priority":4},
+    {"name":"Holiday Paid Social + Influencer Launch Campaign","description":"Launch holiday campaign with paid social + creators; deliver creative system and measurement plan.","priority":4},
+    {"name":"Fraud Rules Refresh + Chargeback Reduction","description":"Tune fraud rules and implement monitoring to reduce chargebacks while maintaining conversion.","priority":5},
+    {"name":"Checkout Performance & Conversion Sprint","description":"Improve checkout speed and UX; ship instrumentation and experiments to lift conversion.","priority":5},
+    {"name":"Inventory Accuracy Program (Cycle Counts + Scanner Rollout)","description":"Deploy scanners and cycle-count SOPs to improve inventory accuracy and reduce oversells.","priority":4},
+    {"name":"Lifecycle Email Personalization MVP","description":"Build segmentation + templates for lifecycle journeys and measure engagement lifts.","priority":4},
+    {"name":"Product Detail Page Creative Refresh (UGC + Image System)","description":"Refresh PDP visual system including UGC modules and updated image guidelines.","priority":3},
+    {"name":"Shopify Replatform Phase 1 (Catalog + Theme Architecture)","description":"Re-architect theme and catalog structure for scalability; establish deployment pipeline.","priority":5},
+    {"name":"International Shipping Expansion (Duties/Taxes + Carriers)","description":"Add carriers and duties/taxes handling for international customers, with updated CX workflows.","priority":4},
+]
 
-completed_dl, inprog_dl, notstart_dl = make_deadlines()
 
-project_prompt = f"""
-You are generating a portfolio of {TOTAL_PROJECTS} cross-functional projects for {TYPE_OF_COMPANY}.
+def _projects_prompt(count: int) -> str:
+    return f"""
+You are generating a portfolio of {count} cross-functional projects for {TYPE_OF_COMPANY}.
 Return ONLY JSON with schema:
 {{
   "projects": [
@@ -440,72 +490,129 @@ Return ONLY JSON with schema:
 }}
 
 Constraints:
-- Exactly {TOTAL_PROJECTS} projects.
+- Exactly {count} projects.
 - Names must be realistic for e-commerce/fashion/retail: marketing campaigns, replatforming, warehouse optimization, returns, personalization, creative refresh, fraud, loyalty, international shipping, etc.
 - Descriptions are 1-2 sentences with a clear end result.
 - Priorities: 1-5 (5 highest).
 - Ensure projects span many departments and require cross-functional work.
 """
 
-fallback_projects = {
-    "projects": [
-        {"name":"Returns Experience Overhaul (Self-Service + Policy Simplification)","description":"Improve self-serve returns flows, clarify policy copy, and reduce ticket volume by streamlining refunds/exchanges.","priority":5},
-        {"name":"Warehouse Slotting Optimization for Peak Season","description":"Re-slot top SKUs, improve pick paths, and reduce fulfillment cycle time ahead of peak demand.","priority":4},
-        {"name":"Holiday Paid Social + Influencer Launch Campaign","description":"Launch holiday campaign with paid social + creators; deliver creative system and measurement plan.","priority":4},
-        {"name":"Fraud Rules Refresh + Chargeback Reduction","description":"Tune fraud rules and implement monitoring to reduce chargebacks while maintaining conversion.","priority":5},
-        {"name":"Checkout Performance & Conversion Sprint","description":"Improve checkout speed and UX; ship instrumentation and experiments to lift conversion.","priority":5},
-        {"name":"Inventory Accuracy Program (Cycle Counts + Scanner Rollout)","description":"Deploy scanners and cycle-count SOPs to improve inventory accuracy and reduce oversells.","priority":4},
-        {"name":"Lifecycle Email Personalization MVP","description":"Build segmentation + templates for lifecycle journeys and measure engagement lifts.","priority":4},
-        {"name":"Product Detail Page Creative Refresh (UGC + Image System)","description":"Refresh PDP visual system including UGC modules and updated image guidelines.","priority":3},
-        {"name":"Shopify Replatform Phase 1 (Catalog + Theme Architecture)","description":"Re-architect theme and catalog structure for scalability; establish deployment pipeline.","priority":5},
-        {"name":"International Shipping Expansion (Duties/Taxes + Carriers)","description":"Add carriers and duties/taxes handling for international customers, with updated CX workflows.","priority":4},
+
+def _roadmaps_prompt(projects_brief: List[Dict[str, str]], tasks_per_project: int, skill_pool: Sequence[str]) -> str:
+    return f"""
+You are generating task roadmaps for {TYPE_OF_COMPANY}.
+Return ONLY JSON with schema:
+{{
+  "roadmaps": {{
+     "P001": [["Task name", "Skill needed"], ... exactly {tasks_per_project} items],
+     ...
+  }}
+}}
+
+Rules:
+- Provide a roadmap for each project id in the input list.
+- Each roadmap must have exactly {tasks_per_project} tasks ordered roughly by execution order.
+- "Skill needed" MUST be chosen EXACTLY from this allowed skill pool (use exact strings):
+{json.dumps(list(skill_pool), indent=2)}
+
+Projects:
+{json.dumps(projects_brief, indent=2)}
+"""
+
+
+def project_catalog(
+    count: int, tasks_per_project: int, skill_pool: Sequence[str], use_ollama: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Template projects (name, description, priority, roadmap of [task name, skill] pairs), at most one per
+    pre-authored project; larger portfolios repeat them as later waves. With `use_ollama`, a local model
+    proposes the projects and roadmaps and the pre-authored ones fill any gaps.
+    """
+    fallback = FALLBACK_PROJECTS[: min(count, len(FALLBACK_PROJECTS))]
+    payload = try_ollama_json(_projects_prompt(len(fallback)), {"projects": fallback}, use_ollama)
+    projects = payload.get("projects", fallback)[: len(fallback)] or fallback
+    brief = [
+        {"id": f"P{i + 1:03d}", "name": str(p["name"]), "description": str(p["description"])}
+        for i, p in enumerate(projects)
     ]
-}
+    roadmaps = try_ollama_json(
+        _roadmaps_prompt(brief, tasks_per_project, skill_pool), {"roadmaps": {}}, use_ollama
+    ).get("roadmaps", {})
+
+    catalog = []
+    for i, (project, item) in enumerate(zip(projects, brief)):
+        roadmap = (
+            roadmaps.get(item["id"])
+            or PROJECT_TASK_ROADMAPS.get(item["name"])
+            or PROJECT_TASK_ROADMAPS[fallback[i]["name"]]
+        )
+        catalog.append({**item, "priority": int(project["priority"]), "roadmap": roadmap})
+    return catalog
+
+
+def _project_buckets(count: int) -> np.ndarray:
+    """Bucket code (index into BUCKETS) per project; buckets are assigned in id order."""
+    completed = round(count * COMPLETED_SHARE)
+    in_progress = min(count - completed, round(count * IN_PROGRESS_SHARE))
+    return np.repeat(np.arange(len(BUCKETS)), [completed, in_progress, count - completed - in_progress])
+
+
+def _build_projects(
+    rng: np.random.Generator, count: int, catalog: List[Dict[str, Any]]
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+    """Projects frame plus each project's bucket code, deadline (datetime64[D]) and catalog template index."""
+    buckets = _project_buckets(count)
+    deadlines = np.empty(count, dtype="datetime64[D]")
+    for code, bucket in enumerate(BUCKETS):
+        rows = np.flatnonzero(buckets == code)
+        year, months, last_day = BUCKET_DEADLINES[bucket]
+        month_starts = np.array([f"{year}-{month:02d}-01" for month in months], dtype="datetime64[D]")
+        deadlines[rows] = month_starts[np.arange(len(rows)) % len(months)] + rng.integers(4, last_day, len(rows))
+
+    template = np.arange(count) % len(catalog)
+    wave = np.arange(count) // len(catalog)
+    names = [
+        catalog[t]["name"] if w == 0 else f"{catalog[t]['name']} (Wave {w + 1})"
+        for t, w in zip(template.tolist(), wave.tolist())
+    ]
+    frame = pd.DataFrame(
+        {
+            "id": _ids("P", count, 3),
+            "name": np.array(names, dtype=object),
+            "description": np.array([p["description"] for p in catalog], dtype=object)[template],
+            "deadline": deadlines.astype(str).astype(object),
+            "priority": np.array([p["priority"] for p in catalog])[template],
+        }
+    )
+    return frame, buckets, deadlines, template
 
-proj_payload = try_ollama_json(project_prompt, fallback_projects)
-proj_list = proj_payload.get("projects", fallback_projects["projects"])[:TOTAL_PROJECTS]
-
-# Assign IDs + deadlines by bucket (deterministic ordering)
-project_rows = []
-all_deadlines = completed_dl + inprog_dl + notstart_dl
-for i in range(TOTAL_PROJECTS):
-    pid = f"P{i+1:03d}"
-    meta = proj_list[i]
-    dl = all_deadlines[i]
-    project_rows.append({
-        "id": pid,
-        "name": meta["name"],
-        "description": meta["description"],
-        "deadline": dl.isoformat(),
-        "priority": int(meta["priority"]),
-    })
-
-projects_df = pd.DataFrame(project_rows).sort_values("id").reset_index(drop=True)
-
-# bucket IDs deterministically
-projects_sorted = projects_df.to_dict("records")
-completed_ids = {p["id"] for p in projects_sorted[:COMPLETED_PROJECTS]}
-in_progress_ids = {p["id"] for p in projects_sorted[COMPLETED_PROJECTS:COMPLETED_PROJECTS + IN_PROGRESS_PROJECTS]}
-not_started_ids = {p["id"] for p in projects_sorted[-NOT_STARTED_PROJECTS:]}
 
 # ============================================================
 # 6) Tasks roadmap (1 LLM call total) -> Python fills dates/status/est_hours
 # ============================================================
 
-# Skill categories -> hour distributions
-def est_hours_for_skill(skill: str) -> int:
+# Skill categories -> est_hours ranges; the first category with a keyword in the skill wins.
+EST_HOURS_BY_SKILL: List[Tuple[Tuple[str, ...], int, int]] = [
+    (("sql", "looker", "dbt", "dashboard", "ga4", "experiment"), 2, 20),  # mix queries + dashboards
+    (("api", "backend", "frontend", "react", "javascript", "typescript", "shopify", "kubernetes", "docker", "ci/cd", "integration"), 12, 40),
+    (("creative", "graphic", "copy", "art direction", "email design", "pdp", "photoshop", "illustrator", "figma"), 6, 18),
+    (("vendor", "procurement", "logistics", "supply", "warehouse", "3pl", "inventory"), 8, 24),
+    (("legal", "compliance", "contract", "tax", "accounting", "finance", "fp&a"), 6, 20),
+]
+DEFAULT_EST_HOURS = (4, 16)
+
+# Due dates fall inside window_start..deadline with more density late: (probability, window fraction range).
+DUE_PHASES = ((0.25, 0.05, 0.35), (0.40, 0.35, 0.75), (0.35, 0.75, 1.00))
+BUCKET_WINDOW_DAYS = {"completed": 42, "in_progress": 28, "not_started": 21}
+
+
+def est_hours_range(skill: str) -> Tuple[int, int]:
     s = skill.lower()
-    if any(k in s for k in ["sql","looker","dbt","dashboard","ga4","experiment"]):
-        return random.randint(2, 20)  # mix queries + dashboards
-    if any(k in s for k in ["api","backend","frontend","react","javascript","typescript","shopify","kubernetes","docker","ci/cd","integration"]):
-        return random.randint(12, 40)
-    if any(k in s for k in ["creative","graphic","copy","art direction","email design","pdp","photoshop","illustrator","figma"]):
-        return random.randint(6, 18)
-    if any(k in s for k in ["vendor","procurement","logistics","supply","warehouse","3pl","inventory"]):
-        return random.randint(8, 24)
-    if any(k in s for k in ["legal","compliance","contract","tax","accounting","finance","fp&a"]):
-        return random.randint(6, 20)
-    return random.randint(4, 16)
+    for keywords, low, high in EST_HOURS_BY_SKILL:
+        if any(k in s for k in keywords):
+            return low, high
+    return DEFAULT_EST_HOURS
+
 
 def status_sequence(bucket: str, n: int) -> List[str]:
     if bucket == "completed":
@@ -514,35 +621,10 @@ def status_sequence(bucket: str, n: int) -> List[str]:
         return ["not_started"] * n
     # in_progress: first 60% in_progress; remaining split
     k_inprog = int(round(0.60 * n))
-    rem = n - k_inprog
     k_comp = int(round(0.25 * n))
     k_block = int(round(0.10 * n))
-    k_ns = n - k_inprog - k_comp - k_block
-    seq = (["in_progress"] * k_inprog) + (["completed"] * k_comp) + (["blocked"] * k_block) + (["not_started"] * k_ns)
-    return seq[:n]
-
-# Build single prompt for all projects (minimize calls)
-projects_brief = [{"id": p["id"], "name": p["name"], "description": p["description"]} for p in projects_sorted]
-
-tasks_prompt = f"""
-You are generating task roadmaps for {TYPE_OF_COMPANY}.
-Return ONLY JSON with schema:
-{{
-  "roadmaps": {{
-     "P001": [["Task name", "Skill needed"], ... exactly {TASKS_PER_PROJECT} items],
-     ...
-  }}
-}}
-
-Rules:
-- Provide a roadmap for each project id in the input list.
-- Each roadmap must have exactly {TASKS_PER_PROJECT} tasks ordered roughly by execution order.
-- "Skill needed" MUST be chosen EXACTLY from this allowed skill pool (use exact strings):
-{json.dumps(skill_pool, indent=2)}
-
-Projects:
-{json.dumps(projects_brief, indent=2)}
-"""
+    seq = (["in_progress"] * k_inprog) + (["completed"] * k_comp) + (["blocked"] * k_block)
+    return (seq + ["not_started"] * n)[:n]
 
 PROJECT_TASK_ROADMAPS: Dict[str, List[List[str]]] = {
 
@@ -727,187 +809,86 @@ PROJECT_TASK_ROADMAPS: Dict[str, List[List[str]]] = {
     ],
 }
 
-fallback_roadmaps = {"roadmaps": {}}
-for p in projects_sorted:
-    pid = p["id"]
-    pname = p["name"]
-
-    if pname not in PROJECT_TASK_ROADMAPS:
-        raise KeyError(f"No fallback roadmap found for project: {pname}")
 
-    # Use the pre-authored roadmap directly
-    items = PROJECT_TASK_ROADMAPS[pname]
-
-    # Optional safety check: trim or pad to TASKS_PER_PROJECT
-    if len(items) > TASKS_PER_PROJECT:
-        items = items[:TASKS_PER_PROJECT]
-    elif len(items) < TASKS_PER_PROJECT:
+def _roadmap_matrix(
+    rng: np.random.Generator, catalog: List[Dict[str, Any]], per_project: int, skill_pool: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(templates, per_project) task names and skills, each roadmap trimmed or padded to `per_project`."""
+    names = np.empty((len(catalog), per_project), dtype=object)
+    skills = np.empty((len(catalog), per_project), dtype=object)
+    for row, project in enumerate(catalog):
+        items = [(str(name), str(skill)) for name, skill in project["roadmap"][:per_project]]
         # pad with low-risk generic wrap-up tasks if needed
-        remaining = TASKS_PER_PROJECT - len(items)
-        for i in range(remaining):
-            items.append([
-                f"Finalize and document remaining work for {pname}",
-                random.choice(skill_pool),
-            ])
-
-    fallback_roadmaps["roadmaps"][pid] = items
-
-# Try Ollama; if it fails, this deterministic roadmap is used
-roadmap_payload = try_ollama_json(tasks_prompt, fallback_roadmaps)
-roadmaps = roadmap_payload.get("roadmaps", fallback_roadmaps["roadmaps"])
-
-def pick_due_dates(project_deadline: date, n: int, bucket: str) -> List[datetime]:
+        for index in rng.integers(0, len(skill_pool), per_project - len(items)).tolist():
+            items.append((f"Finalize and document remaining work for {project['name']}", skill_pool[index]))
+        names[row], skills[row] = zip(*items)
+    return names, skills
+
+
+def _build_tasks(
+    rng: np.random.Generator,
+    per_project: int,
+    project_ids: np.ndarray,
+    buckets: np.ndarray,
+    deadlines: np.ndarray,
+    template: np.ndarray,
+    catalog: List[Dict[str, Any]],
+    skill_pool: Sequence[str],
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """
-    Create due dates inside window_start..deadline with clustering near the end
-    and a late-gate cluster for legal/finance tasks (handled later in events too).
+    Tasks frame (assignee left empty for the event flows to fill) plus the arrays those flows need: the
+    distinct skills, each task's skill code into them, status, and start/due epoch seconds (start is
+    _NO_TIME for tasks that have not started).
     """
-    if bucket == "completed":
-        window_start = project_deadline - timedelta(days=42)
-    elif bucket == "in_progress":
-        window_start = project_deadline - timedelta(days=28)
-    else:
-        window_start = project_deadline - timedelta(days=21)
-
-    window_end = project_deadline
-    total_days = max(7, (window_end - window_start).days)
-
-    # Create milestones: early/mid/late, with more density late
-    due_dates = []
-    for i in range(n):
-        phase = random.random()
-        if phase < 0.25:
-            offset = int(random.uniform(0.05, 0.35) * total_days)
-        elif phase < 0.65:
-            offset = int(random.uniform(0.35, 0.75) * total_days)
-        else:
-            offset = int(random.uniform(0.75, 1.00) * total_days)
-        d = window_start + timedelta(days=min(total_days, max(0, offset)))
-        hh, mm, ss = rand_time(10, 16)
-        dt = datetime(d.year, d.month, d.day, hh, mm, ss)
-        due_dates.append(dt)
-
+    names, skills = _roadmap_matrix(rng, catalog, per_project, skill_pool)
+    needed, skill_codes = np.unique(skills.astype(str), return_inverse=True)
+    skill_codes = skill_codes.reshape(skills.shape)
+    project = np.repeat(np.arange(len(project_ids)), per_project)
+    position = np.tile(np.arange(per_project), len(project_ids))
+    skill_code = skill_codes[template[project], position]
+    count = len(project)
+
+    low, high = np.array([est_hours_range(skill) for skill in needed]).reshape(-1, 2).T
+    est_hours = rng.integers(low[skill_code], high[skill_code] + 1)
+    sequences = np.array([status_sequence(bucket, per_project) for bucket in BUCKETS], dtype=object)
+    status = sequences[buckets[project], position]
+
+    # Due dates inside window_start..deadline, clustered near the end, at business hours
+    window = np.array([BUCKET_WINDOW_DAYS[bucket] for bucket in BUCKETS])[buckets[project]]
+    phase = rng.choice(len(DUE_PHASES), count, p=[share for share, _, _ in DUE_PHASES])
+    low_fraction, high_fraction = np.array([(low, high) for _, low, high in DUE_PHASES]).T[:, phase]
+    offset = np.clip((rng.uniform(low_fraction, high_fraction) * window).astype(np.int64), 0, window)
+    deadline = deadlines.astype("datetime64[s]").astype(np.int64)[project]
+    due = _business_ts(rng, deadline - (window - offset) * _DAY)
     # Sort to respect roadmap order (mostly increasing)
-    due_dates.sort()
-    return due_dates
-
-def start_from_due(due: datetime, est_hours: int, role_hint: str) -> datetime:
-    # duration buffer: hours -> days-ish, add meeting load for senior roles
-    senior = 1 if any(k in role_hint.lower() for k in ["vp","director","head","manager","lead"]) else 0
-    base_days = max(1.0, est_hours / 6.0)  # rough
-    base_days *= (1.2 + 0.2*senior)
-    jitter = random.uniform(0.7, 1.3)
-    start = due - timedelta(days=base_days*jitter)
-    return clamp_dt(start, WORKDAY_START_LOCAL, WORKDAY_END_LOCAL)
-
-tasks_rows = []
-task_id_counter = 1
-
-for p in projects_sorted:
-    pid = p["id"]
-    bucket = "completed" if pid in completed_ids else ("in_progress" if pid in in_progress_ids else "not_started")
-    deadline = datetime.strptime(p["deadline"], "%Y-%m-%d").date()
-
-    items = roadmaps.get(pid, fallback_roadmaps["roadmaps"][pid])
-    items = items[:TASKS_PER_PROJECT]
-
-    due_list = pick_due_dates(deadline, TASKS_PER_PROJECT, bucket)
-    statuses = status_sequence(bucket, TASKS_PER_PROJECT)
-
-    for j, (tname, skill_needed) in enumerate(items):
-        est = est_hours_for_skill(skill_needed)
-        due_dt = due_list[j]
-        # assignee/handoffs will be inferred from events; keep placeholder for now
-        assignee = None
-        handoffs = []
-        if bucket == "not_started" or statuses[j] == "not_started":
-            start_dt = None
-        else:
-            # role hint: pick someone likely from dept based on skill (rough)
-            role_hint = "Engineer" if any(k in skill_needed.lower() for k in ["react","api","shopify","kubernetes","docker"]) else "IC"
-            start_dt = start_from_due(due_dt, est, role_hint)
-
-        tid = f"T{task_id_counter:04d}"
-        task_id_counter += 1
-
-        tasks_rows.append({
-            "id": tid,
-            "project_id": pid,
-            "name": str(tname),
-            "skill_needed": str(skill_needed),
-            "est_hours": int(est),
-            "assignee": assignee,      # filled later
-            "start": iso_dt(start_dt) if start_dt else None,
-            "due": iso_dt(due_dt),
-            "status": statuses[j],
-            "_handoffs": handoffs,     # filled later
-        })
-
-tasks_df = pd.DataFrame([{k:v for k,v in r.items() if not k.startswith("_")} for r in tasks_rows])
+    due = np.sort(due.reshape(len(project_ids), per_project), axis=1).ravel()
+
+    # Start = due minus a duration buffer (est_hours -> days, plus meeting load and jitter), in the workday
+    started = status != "not_started"
+    buffer_days = np.maximum(1.0, est_hours / 6.0) * 1.2 * rng.uniform(0.7, 1.3, count)
+    start = np.where(started, _clamp_workday(due - (buffer_days * _DAY).astype(np.int64)), _NO_TIME)
+
+    frame = pd.DataFrame(
+        {
+            "id": _ids("T", count, 4),
+            "project_id": project_ids[project],
+            "name": names[template[project], position],
+            "skill_needed": needed.astype(object)[skill_code],
+            "est_hours": est_hours,
+            "assignee": None,  # filled from the start events
+            "start": np.where(started, _iso(start), None),
+            "due": _iso(due),
+            "status": status,
+        }
+    )
+    return frame, needed, skill_code, status, start, due
 
-# ============================================================
-# 7) Events generation (Python-only) implementing 6 bottlenecks
-#    + backfill tasks.assignee and tasks._handoffs
-# ============================================================
 
-from collections import defaultdict
 
-def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
-
-def _contains_any(text: str, keywords: List[str]) -> bool:
-    t = _norm(text)
-    return any(k in t for k in keywords)
-
-def _skill_match(emp_skills: List[str], skill_needed: str) -> bool:
-    sn = _norm(skill_needed)
-    for sk in emp_skills:
-        s = _norm(sk)
-        if sn in s or s in sn:
-            return True
-    return False
-
-# Build lookups
-emp_by_id = {e["id"]: e for e in employees}
-emp_skills_map = {e["id"]: e["skills"] for e in employees}
-
-def pick_pool(role_keywords: List[str], skill_keywords: List[str], k: int) -> List[str]:
-    scored = []
-    for e in employees:
-        score = 0
-        role_t = _norm(e["role"])
-        if any(rk in role_t for rk in role_keywords): score += 5
-        sk_blob = " | ".join([_norm(s) for s in e["skills"]])
-        if any(sk in sk_blob for sk in skill_keywords): score += 2
-        score += int(e["max_hours"] >= 40)
-        scored.append((score, e["id"]))
-    scored.sort(reverse=True)
-    chosen = [eid for sc,eid in scored if sc > 0][:k]
-    if len(chosen) < k:
-        chosen = [eid for _,eid in scored[:k]]
-    return chosen
-
-data_team = pick_pool(
-    ["data", "analytics", "analyst", "bi", "engineer"],
-    ["sql", "looker", "dbt", "ga4", "experiment"],
-    2
-)
-engineering_team = pick_pool(
-    ["engineer", "engineering", "developer", "devops", "platform"],
-    ["react", "api", "shopify", "kubernetes", "docker", "qa automation", "javascript"],
-    3
-)
-creative_team = pick_pool(
-    ["designer", "creative", "brand", "copywriter", "art director"],
-    ["figma", "photoshop", "illustrator", "copywriting", "graphic design", "email design"],
-    3
-)
-ops_team = pick_pool(
-    ["operations", "supply", "logistics", "warehouse", "fulfillment", "procurement"],
-    ["vendor", "supply", "logistics", "warehouse", "inventory", "3pl"],
-    2
-)
-legal_team = pick_pool(["legal", "compliance", "counsel"], ["legal", "compliance", "contract"], 1)
-finance_team = pick_pool(["finance", "accounting", "fp&a", "controller"], ["finance", "accounting", "tax"], 1)
+# ============================================================
+# 7) Events generation implementing 6 bottlenecks
+#    + backfill tasks.assignee
+# ============================================================
 
 ANALYTICS_SKILLS = {"sql","looker","dbt","experimentation","ga4"}
 CREATIVE_SKILLS  = {"copywriting","art direction","graphic design","email design","email marketing"}
@@ -924,9 +905,6 @@ def skill_group(skill_needed: str) -> str:
     if any(k in s for k in FINLEGAL_SKILLS):  return "finlegal"
     return "other"
 
-dept_by_id = {e["id"]: e["department"] for e in employees}
-all_employee_ids = [e["id"] for e in employees]
-
 # Department guardrails keep lifecycle/creative work inside the right swim lane.
 GROUP_DEPARTMENT_RULES = {
     "creative": {
@@ -984,492 +962,550 @@ GROUP_DEPARTMENT_RULES = {
     },
 }
 
-def _pool_for_group(group: str, include_adjacent: bool=False, adjacent_only: bool=False) -> List[str]:
+GROUPS = ("analytics", "creative", "engineering", "ops", "finlegal", "other")
+
+# Specialist teams per 33 employees (role keywords, skill keywords, members); they grow with the roster.
+TEAMS: Dict[str, Tuple[List[str], List[str], int]] = {
+    "data": (["data", "analytics", "analyst", "bi", "engineer"], ["sql", "looker", "dbt", "ga4", "experiment"], 2),
+    "engineering": (
+        ["engineer", "engineering", "developer", "devops", "platform"],
+        ["react", "api", "shopify", "kubernetes", "docker", "qa automation", "javascript"],
+        3,
+    ),
+    "creative": (
+        ["designer", "creative", "brand", "copywriter", "art director"],
+        ["figma", "photoshop", "illustrator", "copywriting", "graphic design", "email design"],
+        3,
+    ),
+    "ops": (
+        ["operations", "supply", "logistics", "warehouse", "fulfillment", "procurement"],
+        ["vendor", "supply", "logistics", "warehouse", "inventory", "3pl"],
+        2,
+    ),
+    "legal": (["legal", "compliance", "counsel"], ["legal", "compliance", "contract"], 1),
+    "finance": (["finance", "accounting", "fp&a", "controller"], ["finance", "accounting", "tax"], 1),
+}
+SENIOR_KEYWORDS = ["director", "vp", "head", "lead", "manager"]
+
+EVENT_TYPES = ("start", "queue", "handoff", "end")
+QUEUE_TAGS = (
+    "DATA_QUEUE",
+    "CREATIVE_REVIEW",
+    "CREATIVE_REWORK",
+    "VENDOR_WAIT",
+    "OPS_ESCALATION",
+    "LEGAL_QUEUE",
+    "LEGAL_CLARIFY",
+    "LEGAL_REVIEW",
+    "LEGAL_APPROVAL",
+    "ENG_INTAKE",
+    "ENG_SWITCH",
+    "ENG_BLOCK",
+    "ENG_ESCALATION",
+    "GENERAL_BACKLOG",
+)
+# The injected bottlenecks, in the order of the flow comments below (#1..#6).
+BOTTLENECKS = (
+    "analytics_backlog",
+    "creative_review",
+    "engineering_interrupts",
+    "vendor_waits",
+    "late_gates",
+    "misallocation",
+)
+# Bottleneck behind each queue tag. GENERAL_BACKLOG is baseline noise, and LEGAL_APPROVAL waits before the
+# end event rather than a pickup, so neither appears in the manifest.
+TAG_BOTTLENECKS: Dict[str, str] = {
+    "DATA_QUEUE": "analytics_backlog",
+    "CREATIVE_REVIEW": "creative_review",
+    "CREATIVE_REWORK": "creative_review",
+    "ENG_INTAKE": "engineering_interrupts",
+    "ENG_SWITCH": "engineering_interrupts",
+    "ENG_BLOCK": "engineering_interrupts",
+    "ENG_ESCALATION": "engineering_interrupts",
+    "VENDOR_WAIT": "vendor_waits",
+    "OPS_ESCALATION": "vendor_waits",
+    "LEGAL_QUEUE": "late_gates",
+    "LEGAL_CLARIFY": "late_gates",
+    "LEGAL_REVIEW": "late_gates",
+}
+_TAG_BOTTLENECK = np.array([BOTTLENECKS.index(TAG_BOTTLENECKS[tag]) if tag in TAG_BOTTLENECKS else -1 for tag in QUEUE_TAGS])
+MANIFEST_COLUMNS = ["bottleneck", "stage", "from_stage", "to_stage", "count", "magnitude_hours", "p90_hours", "total_hours"]
+
+Range = Tuple[Union[int, np.ndarray], Union[int, np.ndarray]]
+
+
+def _team(staff: _Staff, role_keywords: List[str], skill_keywords: List[str], size: int) -> np.ndarray:
+    """The `size` best-fitting employees by role, skills and capacity, as sorted employee indices."""
+    role_fit = np.array([any(k in _norm(role) for k in role_keywords) for role in _ROLE_TITLES])[staff.role]
+    skill_fit = np.array([any(k in _norm(skill) for k in skill_keywords) for skill in _SKILL_CATALOG])
+    score = 5 * role_fit + 2 * skill_fit[staff.skills].any(axis=1) + (staff.max_hours >= 40)
+    # highest score first; ties go to the later employee id
+    order = np.lexsort((-np.arange(len(score)), -score))
+    return np.sort(order[:size])
+
+
+def _group_pool(staff: _Staff, group: str, kind: str) -> np.ndarray:
+    """Employee mask for a skill group's "core" departments, its "adjacent" ones, or "both"; everyone if empty."""
     rules = GROUP_DEPARTMENT_RULES.get(group, GROUP_DEPARTMENT_RULES["other"])
-    if adjacent_only:
-        depts = set(rules.get("adjacent", set()))
-    else:
-        depts = set(rules.get("core", set()))
-        if include_adjacent:
-            depts |= set(rules.get("adjacent", set()))
-    if not depts:
-        depts = set(rules.get("core", set()) | rules.get("adjacent", set()))
-    pool = [eid for eid in all_employee_ids if dept_by_id.get(eid) in depts]
-    if not pool and include_adjacent and not adjacent_only:
-        depts |= set(rules.get("adjacent", set()))
-        pool = [eid for eid in all_employee_ids if dept_by_id.get(eid) in depts]
-    return pool or all_employee_ids[:]
-
-def rand_business_ts(base: datetime, min_hour=10, max_hour=16) -> datetime:
-    dt = base.replace(hour=random.randint(min_hour, max_hour),
-                      minute=random.choice([0,15,30,45]),
-                      second=0)
-    return clamp_dt(dt, WORKDAY_START_LOCAL, WORKDAY_END_LOCAL)
-
-def add_hours(ts: datetime, hours: int) -> datetime:
-    return ts + timedelta(hours=int(hours))
-
-def nearest_burst_anchor(ts: datetime) -> datetime:
-    d = ts.date()
-    wd = d.weekday()  # Mon=0
-    target_wd = 0 if random.random() < 0.65 else 2
-    delta = (target_wd - wd) % 7
-    anchor_date = d + timedelta(days=delta)
-    anchor = datetime(anchor_date.year, anchor_date.month, anchor_date.day, 10, 0, 0)
-    anchor += timedelta(minutes=random.choice([0,10,20,30,40]))
-    return anchor
-
-def best_fit_assignee(skill_needed: str, exclude: Optional[str]=None, pool: Optional[List[str]]=None) -> Optional[str]:
-    candidates = []
-    pool_ids = set(pool) if pool else None
-    for eid, sks in emp_skills_map.items():
-        if exclude and eid == exclude: continue
-        if pool_ids is not None and eid not in pool_ids: continue
-        if _skill_match(sks, skill_needed):
-            candidates.append(eid)
-    if not candidates:
-        return None
-    candidates.sort(key=lambda eid: emp_by_id[eid]["max_hours"], reverse=True)
-    return candidates[0]
-
-def pick_senior_reviewer() -> Optional[str]:
-    seniors = []
-    for e in employees:
-        r = _norm(e["role"])
-        if any(k in r for k in ["director","vp","head","lead","manager"]):
-            seniors.append(e["id"])
-    pref = [eid for eid in seniors if eid in creative_team]
-    pool = pref or seniors
-    return random.choice(pool) if pool else None
-
-event_rows = []
-def add_event(task_id: str, typ: str, ts: datetime, from_a: Optional[str], to_a: Optional[str]):
-    event_rows.append({
-        "task_id": task_id,
-        "type": typ,
-        "timestamp": iso_dt(ts),
-        "from_assignee": from_a,
-        "to_assignee": to_a,
-    })
-
-def _queue_label(tag: str, assignee: str) -> str:
-    core = tag.upper().replace(" ", "_")
-    return f"QUEUE::{core}::{assignee}"
-
-def add_idle_and_handoff(
-    task_id: str,
-    current_owner: str,
-    last_ts: datetime,
-    next_owner: str,
-    wait_range: Tuple[int, int],
-    tag: str,
-    service_range: Tuple[int, int] = (1, 4),
-    forced_pickup: Optional[datetime] = None,
-) -> Tuple[datetime, str]:
+    depts = {"core": rules["core"], "adjacent": rules["adjacent"], "both": rules["core"] | rules["adjacent"]}[kind]
+    mask = np.isin(staff.dept, [DEPARTMENTS.index(dept) for dept in depts])
+    return mask if mask.any() else np.ones(len(staff.ids), dtype=bool)
+
+
+def _best_fit(matches: np.ndarray, max_hours: np.ndarray, pool: Union[bool, np.ndarray]) -> np.ndarray:
+    """Per needed skill, the matching pool member with the most max_hours (first on ties), or -1."""
+    score = np.where(matches & pool, max_hours, -1)
+    return np.where(score.max(axis=1, initial=-1) >= 0, score.argmax(axis=1), -1)
+
+
+def _pick(rng: np.random.Generator, members: np.ndarray, count: int) -> np.ndarray:
+    return members[rng.integers(0, len(members), count)]
+
+
+def _pick_other(rng: np.random.Generator, members: np.ndarray, exclude: np.ndarray) -> np.ndarray:
+    """A member per element of `exclude`, never that element itself unless it is the only member."""
+    if len(members) < 2 or not len(exclude):
+        return np.full(len(exclude), members[0])
+    spot = np.searchsorted(members, exclude)
+    inside = members[np.minimum(spot, len(members) - 1)] == exclude
+    draw = rng.integers(0, len(members) - inside)
+    return members[draw + (inside & (draw >= spot))]
+
+
+class _EventFlows:
     """
-    Inserts an explicit queue/idle record so stage completion and next pickup diverge.
-    Returns (pickup_ts, queue_label).
+    Event log for the started tasks. Each bottleneck flow is a fixed series of steps (handoff, queue wait,
+    end); a step is applied to every task taking it at once, so the Python work grows with the number of
+    steps, not tasks. Owners are employee indices; queue labels are encoded as ints until the final frame.
     """
-    service_hours = random.randint(service_range[0], service_range[1])
-    complete_ts = rand_business_ts(add_hours(last_ts, service_hours))
-    queue_label = _queue_label(tag, current_owner)
-    add_event(task_id, "queue", complete_ts, current_owner, queue_label)
-
-    if forced_pickup:
-        pickup_ts = forced_pickup
-        if pickup_ts <= complete_ts:
-            pickup_ts = rand_business_ts(add_hours(complete_ts, wait_range[0]))
-    else:
-        wait_hours = random.randint(wait_range[0], wait_range[1])
-        pickup_ts = rand_business_ts(add_hours(complete_ts, wait_hours))
-
-    add_event(task_id, "handoff", pickup_ts, queue_label, next_owner)
-    return pickup_ts, queue_label
-
-# Start with a "default initial owner" based on skill match (can be mismatched sometimes)
-def initial_owner_for_task(skill_needed: str, group: str) -> str:
-    core_pool = _pool_for_group(group, include_adjacent=False)
-    adjacent_only_pool = _pool_for_group(group, adjacent_only=True)
-    misalign_prob = 0.15 if group != "other" else 0.10
-
-    if random.random() < misalign_prob and adjacent_only_pool:
-        pick_pool = adjacent_only_pool
-    else:
-        pick_pool = core_pool
-
-    bf = best_fit_assignee(skill_needed, pool=pick_pool)
-    if bf:
-        return bf
-    return random.choice(pick_pool or all_employee_ids)
-
-def _random_owner_from_group(group: str, exclude: Optional[str]=None) -> str:
-    pool = [eid for eid in _pool_for_group(group, include_adjacent=True) if eid != exclude]
-    if not pool:
-        pool = [eid for eid in all_employee_ids if eid != exclude]
-    return random.choice(pool)
-
-# Build events for each task row
-task_row_by_id = {r["id"]: r for r in tasks_rows}
-
-for row in tasks_rows:
-    status = row["status"]
-    if status == "not_started":
-        continue
-    if row["start"] is None:
-        continue
-
-    tid = row["id"]
-    skill_needed = row["skill_needed"]
-    group = skill_group(skill_needed)
-
-    start_dt = clamp_dt(parse_iso_dt(row["start"]), WORKDAY_START_LOCAL, WORKDAY_END_LOCAL)
-    due_dt = parse_iso_dt(row["due"])
-
-    # initial assignee (may be mismatched)
-    current = initial_owner_for_task(skill_needed, group)
-    add_event(tid, "start", start_dt, None, current)
-    last_ts = start_dt
-
-    mismatch = not _skill_match(emp_skills_map.get(current, []), skill_needed)
-
-    # ----------------------------
-    # Bottleneck #6: Misallocation
-    # ----------------------------
-    if mismatch:
-        better = best_fit_assignee(skill_needed, exclude=current)
-        if better:
-            h_ts = rand_business_ts(add_hours(last_ts, random.randint(6, 24)))
-            add_event(tid, "handoff", h_ts, current, better)
-            current = better
-            last_ts = h_ts
-            # occasional bounce
-            if random.random() < 0.25:
-                bounce_ts = rand_business_ts(add_hours(last_ts, random.randint(12, 36)))
-                bounce_owner = _random_owner_from_group(group, exclude=current)
-                add_event(tid, "handoff", bounce_ts, current, bounce_owner)
-                last_ts = bounce_ts
-                current = bounce_owner
-
-    # ---------------------------------------------
-    # Bottleneck #1: Analytics backlog + queue burst
-    # ---------------------------------------------
-    if group == "analytics":
-        data_owner = random.choice(data_team) if data_team else current
-        if current != data_owner:
-            anchor = nearest_burst_anchor(last_ts)
-            pickup_guess = rand_business_ts(anchor, 10, 12)
-            wait_range = (24, 96)
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                data_owner,
-                wait_range,
-                tag="DATA_QUEUE",
-                forced_pickup=pickup_guess,
-            )
-            current = data_owner
-        else:
-            # even if already on data team, force a queued pickup
-            wait_range = (24, 96)
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                current,
-                wait_range,
-                tag="DATA_QUEUE",
-            )
 
-    # --------------------------------------------
-    # Bottleneck #2: Creative review ping-pong
-    # --------------------------------------------
-    if group == "creative":
-        designer = random.choice(creative_team) if creative_team else current
-        reviewer = pick_senior_reviewer() or designer
-
-        hops = random.randint(2, 4)
-        seq = []
-        if current != designer:
-            seq.append(designer)
-        for i in range(hops):
-            seq.append(reviewer if i % 2 == 0 else designer)
-
-        # dedupe consecutive
-        clean = []
-        for x in seq:
-            if not clean or clean[-1] != x:
-                clean.append(x)
-
-        for nxt in clean:
-            if nxt == current:
-                continue
-            if nxt == reviewer:
-                wait_range = (48, 120)
-                tag = "CREATIVE_REVIEW"
-            else:
-                wait_range = (12, 48)
-                tag = "CREATIVE_REWORK"
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                nxt,
-                wait_range,
-                tag=tag,
-                service_range=(2, 6),
+    def __init__(
+        self,
+        rng: np.random.Generator,
+        staff: _Staff,
+        needed: np.ndarray,
+        skill: np.ndarray,
+        status: np.ndarray,
+        start: np.ndarray,
+        due: np.ndarray,
+    ):
+        self.rng = rng
+        self.staff = staff
+        self.skill = skill
+        self.status = status
+        self.start = start
+        self.due = due
+        self.last = start.copy()
+        self.current = np.zeros(len(start), dtype=np.int64)
+        self.mismatch = np.zeros(len(start), dtype=bool)
+        self._employees = len(staff.ids)
+        self._chunks: List[Tuple[np.ndarray, ...]] = []
+        self._delays: List[Tuple[np.ndarray, ...]] = []
+
+        needed_group = np.array([GROUPS.index(skill_group(s)) for s in needed], dtype=np.int64)
+        self.group = needed_group[skill]
+        # matches[s, e]: one of employee e's skills contains needed skill s, or the other way round
+        catalog = [_norm(s) for s in _SKILL_CATALOG]
+        pairs = np.array([[n in c or c in n for c in catalog] for n in map(_norm, needed)], dtype=bool)
+        pairs = pairs.reshape(len(needed), len(catalog))
+        self.matches = np.zeros((len(needed), self._employees), dtype=bool)
+        for column in staff.skills.T:
+            self.matches |= pairs[:, column]
+
+        self.pools = {
+            kind: np.array([_group_pool(staff, group, kind) for group in GROUPS]) for kind in ("core", "adjacent", "both")
+        }
+        self.best = {
+            kind: _best_fit(self.matches, staff.max_hours, self.pools[kind][needed_group]) for kind in ("core", "adjacent")
+        }
+        self.best["any"] = _best_fit(self.matches, staff.max_hours, True)
+
+        per_roster = max(1, round(self._employees / len(ROLES)))
+        self.teams = {
+            name: _team(staff, role_keywords, skill_keywords, size * per_roster)
+            for name, (role_keywords, skill_keywords, size) in TEAMS.items()
+        }
+        senior = np.array([any(k in _norm(role) for k in SENIOR_KEYWORDS) for role in _ROLE_TITLES])[staff.role]
+        seniors = np.flatnonzero(senior)
+        preferred = np.intersect1d(seniors, self.teams["creative"])
+        self.reviewers = next(pool for pool in (preferred, seniors, self.teams["creative"]) if len(pool))
+
+    def run(self) -> np.ndarray:
+        """Apply every flow; returns each task's starting owner (its tasks.assignee)."""
+        owners = self._assign_initial_owners()
+        self._misallocation()
+        self._analytics_backlog()
+        self._creative_review()
+        self._vendor_waits()
+        self._late_gates()
+        self._engineering_interrupts()
+        self._default_ends()
+        return owners
+
+    # --- event records -------------------------------------------------
+
+    def _log(self, rows: np.ndarray, kind: str, ts: np.ndarray, source: Any, target: Any) -> None:
+        self._chunks.append(
+            (
+                rows,
+                np.full(len(rows), EVENT_TYPES.index(kind), dtype=np.int8),
+                ts,
+                np.broadcast_to(np.asarray(source, dtype=np.int64), rows.shape),
+                np.broadcast_to(np.asarray(target, dtype=np.int64), rows.shape),
             )
-            current = nxt
-
-    # --------------------------------------------
-    # Bottleneck #4: Ops waiting on vendors
-    # --------------------------------------------
-    if group == "ops":
-        ops_owner = random.choice(ops_team) if ops_team else current
-        if current != ops_owner:
-            h_ts = rand_business_ts(add_hours(last_ts, random.randint(2, 12)))
-            add_event(tid, "handoff", h_ts, current, ops_owner)
-            current = ops_owner
-            last_ts = h_ts
-
-        # vendor silence 72–168h
-        last_ts, _ = add_idle_and_handoff(
-            tid,
-            current,
-            last_ts,
-            current,
-            (72, 168),
-            tag="VENDOR_WAIT",
-            service_range=(1, 3),
         )
 
-        # often handoff to finance/merch after response
-        secondary = finance_team[0] if finance_team else random.choice([e["id"] for e in employees if e["id"] != current])
-        if random.random() < 0.7 and secondary != current:
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                secondary,
-                (12, 36),
-                tag="OPS_ESCALATION",
-                service_range=(2, 6),
-            )
-            current = secondary
-
-    # --------------------------------------------
-    # Bottleneck #5: Finance/Legal gate late
-    # --------------------------------------------
-    if group == "finlegal":
-        gate_owner = (legal_team[0] if legal_team else None) or (finance_team[0] if finance_team else None) or current
-
-        # late handoff within 12–60h of due
-        target = due_dt - timedelta(hours=random.randint(12, 60))
-        h_ts = rand_business_ts(target)
-        if h_ts <= last_ts:
-            h_ts = rand_business_ts(add_hours(last_ts, random.randint(2, 12)))
-        if gate_owner != current:
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                gate_owner,
-                (12, 48),
-                tag="LEGAL_QUEUE",
-                forced_pickup=h_ts,
-            )
-            current = gate_owner
-        else:
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                current,
-                (12, 48),
-                tag="LEGAL_QUEUE",
-                forced_pickup=h_ts,
-            )
+    def _queue_code(self, tag: Union[str, np.ndarray], holder: np.ndarray) -> np.ndarray:
+        tag_index = QUEUE_TAGS.index(tag) if isinstance(tag, str) else tag
+        return self._employees * (1 + tag_index) + holder
+
+    def _note_delay(self, kind: Union[int, np.ndarray], holders: np.ndarray, owners: np.ndarray, hours: np.ndarray) -> None:
+        """Keep injected delays for the manifest; kind -1 (baseline waits) is dropped."""
+        keep = np.broadcast_to(kind, holders.shape) >= 0
+        kinds = np.broadcast_to(kind, holders.shape)[keep]
+        self._delays.append((kinds, holders[keep], owners[keep], np.maximum(hours[keep], 0.0)))
+
+    def _labels(self, codes: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(codes, return_inverse=True)
+        n, ids = self._employees, self.staff.ids
+        labels = [
+            None if code < 0 else ids[code] if code < n else f"QUEUE::{QUEUE_TAGS[code // n - 1]}::{ids[code % n]}"
+            for code in unique.tolist()
+        ]
+        return np.array(labels, dtype=object)[inverse]
+
+    def frame(self, task_ids: np.ndarray) -> pd.DataFrame:
+        """Events in task order, each task's in the order they happened, with the data/events.csv columns."""
+        rows, kinds, stamps, sources, targets = (np.concatenate(column) for column in zip(*self._chunks))
+        order = np.argsort(rows, kind="stable")
+        return pd.DataFrame(
+            {
+                "task_id": task_ids[rows[order]],
+                "type": np.array(EVENT_TYPES, dtype=object)[kinds[order]],
+                "timestamp": _iso(stamps[order]),
+                "from_assignee": self._labels(sources[order]),
+                "to_assignee": self._labels(targets[order]),
+            }
+        )
 
-        # clarification loop sometimes
-        if random.random() < 0.30:
-            requester = random.choice(creative_team) if creative_team else random.choice([e["id"] for e in employees])
-            if requester != current:
-                last_ts, _ = add_idle_and_handoff(
-                    tid,
-                    current,
-                    last_ts,
-                    requester,
-                    (12, 36),
-                    tag="LEGAL_CLARIFY",
-                )
-                current = requester
-                last_ts, _ = add_idle_and_handoff(
-                    tid,
-                    current,
-                    last_ts,
-                    gate_owner,
-                    (12, 36),
-                    tag="LEGAL_REVIEW",
-                )
-                current = gate_owner
-
-        if status == "completed":
-            last_ts_queue_label = _queue_label("LEGAL_APPROVAL", current)
-            service_complete = rand_business_ts(add_hours(last_ts, random.randint(2, 6)))
-            add_event(tid, "queue", service_complete, current, last_ts_queue_label)
-            last_ts = rand_business_ts(add_hours(service_complete, random.randint(36, 96)))
-            add_event(tid, "end", last_ts, current, None)
-        continue
-
-    # --------------------------------------------
-    # Bottleneck #3: Engineering interrupts + late ends
-    # --------------------------------------------
-    if group == "engineering":
-        if engineering_team and current not in engineering_team:
-            eng_owner = random.choice(engineering_team)
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                eng_owner,
-                (6, 18),
-                tag="ENG_INTAKE",
+    def manifest(self) -> pd.DataFrame:
+        """
+        Injected bottlenecks per (bottleneck, edge), in the detector's terms: stages are "Role (Department)",
+        and `stage` is the one absorbing the delay (the receiving stage for queue waits, the wrong owner for
+        misallocation). Magnitudes are the realized delays in hours, clipped at zero like the detector's waits.
+        """
+        kinds, holders, owners, hours = (np.concatenate(column) for column in zip(*self._delays))
+        labels = _ROLE_TITLES[self.staff.role] + " (" + _DEPARTMENT_NAMES[self.staff.dept] + ")"
+        delays = pd.DataFrame(
+            {
+                "bottleneck": np.array(BOTTLENECKS, dtype=object)[kinds],
+                "from_stage": labels[holders],
+                "to_stage": labels[owners],
+                "hours": hours,
+            }
+        )
+        delays["stage"] = delays["to_stage"].where(delays["bottleneck"] != "misallocation", delays["from_stage"])
+        grouped = delays.groupby(["bottleneck", "stage", "from_stage", "to_stage"])["hours"]
+        stats = grouped.agg(count="size", magnitude_hours="mean", total_hours="sum")
+        stats["p90_hours"] = grouped.quantile(0.9)
+        manifest = stats.reset_index()[MANIFEST_COLUMNS].round(2)
+        order = manifest["bottleneck"].map(BOTTLENECKS.index)
+        return manifest.assign(order=order).sort_values(["order", "total_hours"], ascending=[True, False]).drop(
+            columns="order"
+        ).reset_index(drop=True)
+
+    # --- flow steps ----------------------------------------------------
+
+    def _rows(self, group: str) -> np.ndarray:
+        return np.flatnonzero(self.group == GROUPS.index(group))
+
+    def _handoff(self, rows: np.ndarray, owners: np.ndarray, hours: Tuple[int, int]) -> None:
+        ts = _business_ts(self.rng, self.last[rows] + self.rng.integers(hours[0], hours[1] + 1, len(rows)) * _HOUR)
+        self._log(rows, "handoff", ts, self.current[rows], owners)
+        self.current[rows] = owners
+        self.last[rows] = ts
+
+    def _queue_handoff(
+        self,
+        rows: np.ndarray,
+        owners: np.ndarray,
+        wait: Range,
+        tag: Union[str, np.ndarray],
+        service: Tuple[int, int] = (1, 4),
+        forced: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Explicit queue/idle record so stage completion and next pickup diverge: the holder finishes after
+        `service` hours and queues the work; `owners` pick it up after `wait` hours, or at `forced` (where not
+        _NO_TIME) unless that is not after the queue record.
+        """
+        rng, count = self.rng, len(rows)
+        holder = self.current[rows]
+        done = _business_ts(rng, self.last[rows] + rng.integers(service[0], service[1] + 1, count) * _HOUR)
+        tag_index = QUEUE_TAGS.index(tag) if isinstance(tag, str) else tag
+        queue = self._queue_code(tag_index, holder)
+        self._log(rows, "queue", done, holder, queue)
+
+        low, high = wait
+        pickup = _business_ts(rng, done + rng.integers(low, np.add(high, 1), count) * _HOUR)
+        if forced is not None:
+            floor = _business_ts(rng, done + np.multiply(low, _HOUR))
+            pickup = np.where(forced == _NO_TIME, pickup, np.where(forced > done, forced, floor))
+        self._log(rows, "handoff", pickup, queue, owners)
+        self._note_delay(_TAG_BOTTLENECK[tag_index], holder, owners, (pickup - done) / _HOUR)
+        self.current[rows] = owners
+        self.last[rows] = pickup
+
+    def _after_last(self, rows: np.ndarray, ts: np.ndarray) -> np.ndarray:
+        """`ts`, or a fresh slot 6-24h after the task's last event where `ts` does not come after it."""
+        retry = _business_ts(self.rng, self.last[rows] + self.rng.integers(6, 25, len(rows)) * _HOUR)
+        return np.where(ts <= self.last[rows], retry, ts)
+
+    def _end(self, rows: np.ndarray, ts: np.ndarray) -> None:
+        self._log(rows, "end", ts, self.current[rows], -1)
+        self.last[rows] = ts
+
+    # --- flows ---------------------------------------------------------
+
+    def _assign_initial_owners(self) -> np.ndarray:
+        """Best skill match in the group's core departments; sometimes an adjacent department instead."""
+        rng, count = self.rng, len(self.skill)
+        misalign = rng.random(count) < np.where(self.group == GROUPS.index("other"), 0.10, 0.15)
+        owners = np.where(misalign, self.best["adjacent"][self.skill], self.best["core"][self.skill])
+        # no skill match in the chosen pool: anyone from it
+        for group in range(len(GROUPS)):
+            for kind, chosen in (("core", ~misalign), ("adjacent", misalign)):
+                rows = np.flatnonzero((owners < 0) & (self.group == group) & chosen)
+                owners[rows] = _pick(rng, np.flatnonzero(self.pools[kind][group]), len(rows))
+        self.current[:] = owners
+        self.mismatch = ~self.matches[self.skill, owners]
+        self._log(np.arange(count), "start", self.last.copy(), -1, owners)
+        return owners
+
+    def _misallocation(self) -> None:
+        """Bottleneck #6: mismatched owners hand off to the best skill match, occasionally bouncing on."""
+        better = self.best["any"][self.skill]
+        rows = np.flatnonzero(self.mismatch & (better >= 0))
+        held_since = self.last[rows]
+        mismatched = self.current[rows]
+        self._handoff(rows, better[rows], (6, 24))
+        # the delay is time spent with the wrong owner, which the detector sees as that stage's service time
+        self._note_delay(BOTTLENECKS.index("misallocation"), mismatched, better[rows], (self.last[rows] - held_since) / _HOUR)
+        bounced = rows[self.rng.random(len(rows)) < 0.25]
+        for group in range(len(GROUPS)):
+            sub = bounced[self.group[bounced] == group]
+            pool = np.flatnonzero(self.pools["both"][group])
+            self._handoff(sub, _pick_other(self.rng, pool, self.current[sub]), (12, 36))
+
+    def _analytics_backlog(self) -> None:
+        """Bottleneck #1: analytics work queues for the data team, picked up in Monday/Wednesday bursts."""
+        rng, rows = self.rng, self._rows("analytics")
+        owners = _pick(rng, self.teams["data"], len(rows))
+        day = self.last[rows] - self.last[rows] % _DAY
+        weekday = (day // _DAY + 3) % 7  # 1970-01-01 was a Thursday; Mon=0
+        burst = np.where(rng.random(len(rows)) < 0.65, 0, 2)
+        anchor = _business_ts(rng, day + (burst - weekday) % 7 * _DAY, 10, 12)
+        # even if already on data team, force a queued pickup (after the usual wait)
+        forced = np.where(self.current[rows] != owners, anchor, _NO_TIME)
+        self._queue_handoff(rows, owners, (24, 96), "DATA_QUEUE", forced=forced)
+
+    def _creative_review(self) -> None:
+        """Bottleneck #2: review ping-pong between a designer and a senior reviewer, with slow reviews."""
+        rng, rows = self.rng, self._rows("creative")
+        designer = _pick(rng, self.teams["creative"], len(rows))
+        reviewer = _pick(rng, self.reviewers, len(rows))
+        hops = rng.integers(2, 5, len(rows))
+        # designer first, then `hops` alternating reviewer/designer steps; steps to the current owner are skipped
+        steps = [(designer, np.ones(len(rows), dtype=bool))]
+        steps += [(reviewer if hop % 2 == 0 else designer, hops > hop) for hop in range(4)]
+        for target, active in steps:
+            move = active & (target != self.current[rows])
+            review = target[move] == reviewer[move]
+            self._queue_handoff(
+                rows[move],
+                target[move],
+                (np.where(review, 48, 12), np.where(review, 120, 48)),
+                np.where(review, QUEUE_TAGS.index("CREATIVE_REVIEW"), QUEUE_TAGS.index("CREATIVE_REWORK")),
+                service=(2, 6),
             )
-            current = eng_owner
 
+    def _vendor_waits(self) -> None:
+        """Bottleneck #4: ops waits days on vendors, then often escalates to finance."""
+        rng, rows = self.rng, self._rows("ops")
+        owners = _pick(rng, self.teams["ops"], len(rows))
+        move = self.current[rows] != owners
+        self._handoff(rows[move], owners[move], (2, 12))
+        # vendor silence 72-168h
+        self._queue_handoff(rows, self.current[rows], (72, 168), "VENDOR_WAIT", service=(1, 3))
+        secondary = _pick(rng, self.teams["finance"], len(rows))
+        escalate = (rng.random(len(rows)) < 0.7) & (secondary != self.current[rows])
+        self._queue_handoff(rows[escalate], secondary[escalate], (12, 36), "OPS_ESCALATION", service=(2, 6))
+
+    def _late_gates(self) -> None:
+        """Bottleneck #5: finance/legal review is picked up late (12-60h before due), sometimes with a clarification loop."""
+        rng, rows = self.rng, self._rows("finlegal")
+        gates = _pick(rng, self.teams["legal"], len(rows))
+        pickup = _business_ts(rng, self.due[rows] - rng.integers(12, 61, len(rows)) * _HOUR)
+        stale = pickup <= self.last[rows]
+        pickup[stale] = _business_ts(rng, self.last[rows][stale] + rng.integers(2, 13, stale.sum()) * _HOUR)
+        self._queue_handoff(rows, gates, (12, 48), "LEGAL_QUEUE", forced=pickup)
+
+        requester = _pick(rng, self.teams["creative"], len(rows))
+        clarify = (rng.random(len(rows)) < 0.30) & (requester != gates)
+        self._queue_handoff(rows[clarify], requester[clarify], (12, 36), "LEGAL_CLARIFY")
+        self._queue_handoff(rows[clarify], gates[clarify], (12, 36), "LEGAL_REVIEW")
+
+        done = rows[self.status[rows] == "completed"]
+        holder = self.current[done]
+        approved = _business_ts(rng, self.last[done] + rng.integers(2, 7, len(done)) * _HOUR)
+        self._log(done, "queue", approved, holder, self._queue_code("LEGAL_APPROVAL", holder))
+        self._end(done, _business_ts(rng, approved + rng.integers(36, 97, len(done)) * _HOUR))
+
+    def _engineering_interrupts(self) -> None:
+        """Bottleneck #3: engineering intake queues, context-switch handoffs, long blocks and late ends."""
+        rng, rows = self.rng, self._rows("engineering")
+        team = self.teams["engineering"]
+        intake = rows[~np.isin(self.current[rows], team)]
+        self._queue_handoff(intake, _pick(rng, team, len(intake)), (6, 18), "ENG_INTAKE")
         # context switching spikes
-        if engineering_team and random.random() < 0.55:
-            spikes = random.randint(1, 3)
-            for _ in range(spikes):
-                nxt = random.choice([e for e in engineering_team if e != current] or engineering_team)
-                last_ts, _ = add_idle_and_handoff(
-                    tid,
-                    current,
-                    last_ts,
-                    nxt,
-                    (8, 36),
-                    tag="ENG_SWITCH",
-                )
-                current = nxt
-
+        spiky = rows[rng.random(len(rows)) < 0.55]
+        spikes = rng.integers(1, 4, len(spiky))
+        for spike in range(3):
+            sub = spiky[spikes > spike]
+            self._queue_handoff(sub, _pick_other(rng, team, self.current[sub]), (8, 36), "ENG_SWITCH")
         # blocked: no end, long gap
-        if status == "blocked":
-            last_ts, _ = add_idle_and_handoff(
-                tid,
-                current,
-                last_ts,
-                current,
-                (96, 240),
-                tag="ENG_BLOCK",
-                service_range=(2, 6),
-            )
-            if engineering_team and random.random() < 0.4:
-                nxt = random.choice([e for e in engineering_team if e != current] or engineering_team)
-                last_ts, _ = add_idle_and_handoff(
-                    tid,
-                    current,
-                    last_ts,
-                    nxt,
-                    (24, 48),
-                    tag="ENG_ESCALATION",
-                )
-                current = nxt
-            continue
-
+        blocked = rows[self.status[rows] == "blocked"]
+        self._queue_handoff(blocked, self.current[blocked], (96, 240), "ENG_BLOCK", service=(2, 6))
+        escalated = blocked[rng.random(len(blocked)) < 0.4]
+        self._queue_handoff(escalated, _pick_other(rng, team, self.current[escalated]), (24, 48), "ENG_ESCALATION")
         # late completion bias (near/after due)
-        drift = random.randint(0, 36)
-        end_target = due_dt + timedelta(hours=drift) if random.random() < 0.6 else due_dt - timedelta(hours=random.randint(0, 12))
-        end_ts = rand_business_ts(end_target)
-        if end_ts <= last_ts:
-            end_ts = rand_business_ts(add_hours(last_ts, random.randint(6, 24)))
-
-        if status == "completed":
-            add_event(tid, "end", end_ts, current, None)
-        continue
-
-    # default end for completed
-    if status == "completed":
-        # Inject a small backlog wait so every task sees at least one queue gap
-        backlog_wait = (1, 4)
-        backlog_service = (1, 2)
-        last_ts, _ = add_idle_and_handoff(
-            tid,
-            current,
-            last_ts,
-            current,
-            backlog_wait,
-            tag="GENERAL_BACKLOG",
-            service_range=backlog_service,
-        )
-        end_ts = rand_business_ts(due_dt - timedelta(hours=random.randint(1, 12)))
-        if end_ts <= last_ts:
-            end_ts = rand_business_ts(add_hours(last_ts, random.randint(6, 24)))
-        # mismatch inflation (30–80%)
-        if mismatch:
-            inflate = random.uniform(1.3, 1.8)
-            extra = int(((end_ts - start_dt).total_seconds()/3600.0) * (inflate - 1.0))
-            end_ts = rand_business_ts(add_hours(end_ts, max(6, extra)))
-        add_event(tid, "end", end_ts, current, None)
-
-events_df = pd.DataFrame(event_rows)
-
-# Backfill tasks.assignee + task handoffs from events
-# - assignee = first start event to_assignee
-# - handoffs = sequence of to_assignee in handoff events
-handoffs_map = defaultdict(list)
-assignee_map = {}
-
-for _, ev in events_df.sort_values(["task_id","timestamp"]).iterrows():
-    if ev["type"] == "start" and ev["to_assignee"]:
-        assignee_map.setdefault(ev["task_id"], ev["to_assignee"])
-    if ev["type"] == "handoff" and ev["to_assignee"]:
-        handoffs_map[ev["task_id"]].append(ev["to_assignee"])
-
-for r in tasks_rows:
-    tid = r["id"]
-    r["assignee"] = assignee_map.get(tid)
-    r["_handoffs"] = handoffs_map.get(tid, [])
-
-tasks_df = pd.DataFrame([{k:v for k,v in r.items() if not k.startswith("_")} for r in tasks_rows])
+        done = rows[self.status[rows] == "completed"]
+        late = rng.random(len(done)) < 0.6
+        drift = np.where(late, rng.integers(0, 37, len(done)), -rng.integers(0, 13, len(done)))
+        self._end(done, self._after_last(done, _business_ts(rng, self.due[done] + drift * _HOUR)))
+
+    def _default_ends(self) -> None:
+        """Other completed tasks: a short backlog wait so every task sees a queue gap, then the end."""
+        rng = self.rng
+        closing = ~np.isin(self.group, [GROUPS.index("finlegal"), GROUPS.index("engineering")])
+        rows = np.flatnonzero((self.status == "completed") & closing)
+        self._queue_handoff(rows, self.current[rows], (1, 4), "GENERAL_BACKLOG", service=(1, 2))
+        ends = self._after_last(rows, _business_ts(rng, self.due[rows] - rng.integers(1, 13, len(rows)) * _HOUR))
+        # mismatch inflation (30-80%)
+        elapsed_hours = (ends - self.start[rows]) / _HOUR
+        extra = np.maximum(6, (elapsed_hours * (rng.uniform(1.3, 1.8, len(rows)) - 1.0)).astype(np.int64))
+        inflated = _business_ts(rng, ends + extra * _HOUR)
+        self._end(rows, np.where(self.mismatch[rows], inflated, ends))
+
 
 # ============================================================
-# 8) Exports: CSV + Excel + JSON
+# 8) Library API + CLI exports: CSV (+ JSON)
 # ============================================================
 
-# CSV exports
-employees_df.to_csv(f"{OUTPUT_DIR}/employees.csv", index=False)
-availability_df.to_csv(f"{OUTPUT_DIR}/availability.csv", index=False)
-projects_df.to_csv(f"{OUTPUT_DIR}/projects.csv", index=False)
-tasks_df.to_csv(f"{OUTPUT_DIR}/tasks.csv", index=False)
-events_df.to_csv(f"{OUTPUT_DIR}/events.csv", index=False)
-
-# # Excel workbook
-# with pd.ExcelWriter(EXCEL_PATH, engine="openpyxl") as writer:
-#     employees_df.to_excel(writer, sheet_name="employees", index=False)
-#     availability_df.to_excel(writer, sheet_name="availability", index=False)
-#     projects_df.to_excel(writer, sheet_name="projects", index=False)
-#     tasks_df.to_excel(writer, sheet_name="tasks", index=False)
-#     events_df.to_excel(writer, sheet_name="events", index=False)
-
-# JSON dump (structured)
-payload = {
-    "employees": employees,
-    "availability": availability_rows,
-    "projects": project_rows,
-    "tasks": tasks_rows,
-    "events": event_rows,
-}
-with open(JSON_PATH, "w") as f:
-    json.dump(payload, f, indent=2)
-
-print("Done.")
-# print("Excel:", EXCEL_PATH)
-print("JSON:", JSON_PATH)
-print("CSVs:", [f"{OUTPUT_DIR}/{x}.csv" for x in ["employees","availability","projects","tasks","events"]])
-
-# Quick sanity peek: show a few rows
-print("Employee df: ", employees_df.head(5), '\n')
-print("Availibility df: ", availability_df.head(5), '\n')
-print("Projects df: ",projects_df.head(5), '\n')
-print("Tasks df: ",tasks_df.head(5), '\n')
-print("Events df: ",events_df.head(10), '\n')
+def generate(config: GeneratorConfig = GeneratorConfig()) -> Dict[str, pd.DataFrame]:
+    """
+    The five tables for `config`, keyed by table name, with the data/ CSV columns, plus "manifest": the
+    bottlenecks injected into the events (see _EventFlows.manifest).
+    """
+    if min(config.employees, config.projects, config.tasks_per_project) < 1:
+        raise ValueError("employees, projects and tasks_per_project must all be at least 1.")
+    streams = _streams(config.seed)
+    employees, staff = _build_employees(streams["employees"], config.employees)
+    availability = _build_availability(
+        streams["availability"], staff, config.availability_start, config.availability_days
+    )
+
+    # Global skill pool used for padded roadmap skills (and offered to the roadmap prompt)
+    skill_pool = sorted(set(_SKILL_CATALOG[np.unique(staff.skills)]))
+    catalog = project_catalog(config.projects, config.tasks_per_project, skill_pool, config.use_ollama)
+    projects, buckets, deadlines, template = _build_projects(streams["projects"], config.projects, catalog)
+    tasks, needed, skill, status, start, due = _build_tasks(
+        streams["tasks"],
+        config.tasks_per_project,
+        projects["id"].to_numpy(dtype=object),
+        buckets,
+        deadlines,
+        template,
+        catalog,
+        skill_pool,
+    )
+
+    # Events for every started task; a task's assignee is the owner at its start event
+    started = np.flatnonzero(status != "not_started")
+    flows = _EventFlows(
+        streams["events"], staff, needed, skill[started], status[started], start[started], due[started]
+    )
+    owners = flows.run()
+    assignee = np.full(len(tasks), None, dtype=object)
+    assignee[started] = staff.ids[owners]
+    tasks["assignee"] = assignee
+    events = flows.frame(tasks["id"].to_numpy(dtype=object)[started])
+    return {
+        "employees": employees,
+        "availability": availability,
+        "projects": projects,
+        "tasks": tasks,
+        "events": events,
+        "manifest": flows.manifest(),
+    }
+
+
+def write_dataset(frames: Dict[str, pd.DataFrame], output_dir: Path, *, json_dump: bool = False) -> Path:
+    """
+    Write <table>.csv for each table (the data/ layout load_dataset reads), the bottleneck manifest when the
+    frames carry one, and optionally the JSON dump.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for table in TABLES:
+        frames[table].to_csv(output_dir / f"{table}.csv", index=False)
+    if "manifest" in frames:
+        manifest = {"bottlenecks": json.loads(frames["manifest"].to_json(orient="records"))}
+        with open(output_dir / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+    if json_dump:
+        # JSON dump (structured); tasks also carry the owners they were handed to, in order
+        payload = {table: json.loads(frames[table].to_json(orient="records")) for table in TABLES}
+        events = frames["events"]
+        handoffs = events[events["type"].eq("handoff")].groupby("task_id", sort=False)["to_assignee"].agg(list)
+        for task in payload["tasks"]:
+            task["_handoffs"] = handoffs.get(task["id"], [])
+        with open(output_dir / "synthetic_retail_dataset.json", "w") as f:
+            json.dump(payload, f, indent=2)
+    return output_dir
+
+
+def main() -> None:
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output_dir", type=Path, required=True)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply employees and projects (and so tasks and events).")
+    parser.add_argument("--employees", type=int, default=None, help="Overrides the scaled employee count.")
+    parser.add_argument("--projects", type=int, default=None, help="Overrides the scaled project count.")
+    parser.add_argument("--tasks_per_project", type=int, default=defaults.tasks_per_project)
+    parser.add_argument("--availability_days", type=int, default=defaults.availability_days)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--use_ollama", action="store_true", help="Ask a local Ollama model for projects and roadmaps.")
+    parser.add_argument("--json", action="store_true", help="Also write synthetic_retail_dataset.json.")
+    args = parser.parse_args()
+
+    scaled = defaults.scaled(args.scale)
+    config = replace(
+        scaled,
+        employees=args.employees or scaled.employees,
+        projects=args.projects or scaled.projects,
+        tasks_per_project=args.tasks_per_project,
+        availability_days=args.availability_days,
+        seed=args.seed,
+        use_ollama=args.use_ollama,
+    )
+    started = time.perf_counter()
+    frames = generate(config)
+    write_dataset(frames, args.output_dir, json_dump=args.json)
+    sizes = ", ".join(f"{table}={len(frame)}" for table, frame in frames.items())
+    print(f"[INFO] Wrote {sizes} to {args.output_dir} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Streaming extraction of JSON array items across arbitrary chunk boundaries."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from mvp import llm_utils
+from mvp.json_stream import ItemSchema, JSONArrayItemStream
+
+ITEMS = [
+    {"task_id": "T1", "note": 'says "hi" and {braces}', "score": 1.5},
+    {"task_id": "T2", "note": "back\\slash ]} and \\\" quote", "tags": ["a", "b"]},
+    {"task_id": "T3", "note": "", "nested": {"depth": [1, {"x": "}"}]}},
+]
+COMPLETION = "Here you go:\n```json\n" + json.dumps({"meta": {"n": 3}, "items": ITEMS}) + "\n```"
+
+SCHEMA = ItemSchema(required={"task_id": (str,)}, optional={"score": (int, float)})
+
+
+def _feed(text: str, size: int, array_key: str = "items"):
+    parser = JSONArrayItemStream(array_key)
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start : start + size]))
+    return parser, items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, len(COMPLETION)])
+def test_items_survive_any_chunk_size(size):
+    parser, items = _feed(COMPLETION, size)
+    assert items == ITEMS
+    assert parser.complete
+    assert parser.malformed == 0
+
+
+def test_items_are_yielded_as_soon_as_they_close():
+    parser = JSONArrayItemStream("items")
+    head = json.dumps({"items": ITEMS[:1]})[:-2]
+    assert parser.feed(head) == ITEMS[:1]
+    assert not parser.complete
+    assert parser.feed("]}") == []
+    assert parser.complete
+
+
+def test_truncated_final_item_keeps_earlier_items():
+    text = json.dumps({"items": ITEMS})
+    cut = text.index('"T3"') + 2
+    parser, items = _feed(text[:cut], 2)
+    assert items == ITEMS[:2]
+    assert not parser.complete
+
+
+def test_other_arrays_are_not_mistaken_for_items():
+    text = json.dumps({"items_extra": [{"task_id": "X"}], "items": ITEMS[:1]})
+    _, items = _feed(text, 1)
+    assert items == ITEMS[:1]
+
+
+def test_schema_problems():
+    assert SCHEMA.problem({"task_id": "T1", "score": 2}) is None
+    assert SCHEMA.problem({"task_id": "T1", "extra": object()}) is None
+    assert SCHEMA.problem({"score": 2}) == "missing 'task_id'"
+    assert SCHEMA.problem({"task_id": 7}) == "'task_id' has type int"
+    assert SCHEMA.problem({"task_id": "T1", "score": "high"}) == "'score' has type str"
+    assert SCHEMA.problem(["T1"]) == "expected an object, got list"
+
+
+def _invalid_item_count() -> int:
+    entries = llm_utils.fallback_telemetry()["entries"]
+    return sum(e["count"] for e in entries if e["agent"] == "json_stream_test" and e["reason"] == "invalid_item")
+
+
+@pytest.fixture
+def streamed_completion(monkeypatch):
+    """An API key, no response cache, and a fake streaming call that returns the given chunks."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    llm_utils.set_force_openai_fallback(False)
+    monkeypatch.setattr(llm_utils, "active_response_cache", lambda temperature=0.2: None)
+    monkeypatch.setattr(llm_utils, "get_openai_client", lambda api_key=None: object())
+
+    def use(chunks):
+        monkeypatch.setattr(llm_utils, "_stream_completion_text", lambda *args: iter(chunks))
+
+    return use
+
+
+def test_safe_stream_drops_items_that_fail_the_schema(streamed_completion):
+    rejected = {"task_id": 42, "note": "wrong type"}
+    text = json.dumps({"items": [ITEMS[0], rejected, ITEMS[1]]})
+    streamed_completion([text[i : i + 2] for i in range(0, len(text), 2)])
+    before = _invalid_item_count()
+
+    items = list(
+        llm_utils.safe_stream_openai_json_items("system", "user", "items", schema=SCHEMA, agent="json_stream_test")
+    )
+
+    assert items == [ITEMS[0], ITEMS[1]]
+    assert _invalid_item_count() == before + 1
+
+
+def test_safe_stream_ends_quietly_on_a_truncated_completion(streamed_completion):
+    text = json.dumps({"items": ITEMS})
+    streamed_completion([text[: text.index('"T3"')]])
+    items = list(llm_utils.safe_stream_openai_json_items("system", "user", "items", agent="json_stream_test"))
+    assert items == ITEMS[:2]
@@ -0,0 +1,38 @@
+"""Availability checks for OpenAI calls without an API key."""
+from __future__ import annotations
+
+import pytest
+
+from mvp import llm_utils
+
+
+@pytest.fixture
+def default_cache(tmp_path, monkeypatch):
+    """No API key and the CLI's default readwrite response cache."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    llm_utils.set_force_openai_fallback(False)
+    cache = llm_utils.configure_response_cache(tmp_path / "llm_cache.db", "readwrite")
+    yield cache
+    llm_utils.configure_response_cache(tmp_path / "llm_cache.db", "off")
+
+
+def test_missing_key_with_empty_default_cache_short_circuits(default_cache):
+    assert llm_utils.openai_unavailable_reason() == "missing_api_key"
+    assert not llm_utils.openai_enabled()
+
+
+def test_missing_key_allows_cacheable_replays_only(default_cache):
+    default_cache.put("key", '{"ok": true}')
+    assert llm_utils.openai_enabled()
+    assert llm_utils.openai_unavailable_reason(0.35) == "missing_api_key"
+    # The availability probe is not a lookup, so it leaves the hit/miss counters alone.
+    assert default_cache.stats()["hits"] == 0 and default_cache.stats()["misses"] == 0
+
+
+def test_forced_fallback_wins_over_cache(default_cache):
+    default_cache.put("key", '{"ok": true}')
+    llm_utils.set_force_openai_fallback(True)
+    try:
+        assert llm_utils.openai_unavailable_reason() == "disabled"
+    finally:
+        llm_utils.set_force_openai_fallback(False)
@@ -0,0 +1,37 @@
+"""Combined reports that reuse section files' bytes."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from mvp.report_writer import ReportWriter
+
+REPORT = {
+    "assignments": [{"task_id": "T1", "assignee": "E1"}],
+    "bottlenecks": [{"stage": "Legal", "metric": 12.5}],
+    "stage_delays": [{"stage": "Legal", "mean_wait_hours": 3.0}],
+    "process_graph": {"nodes": ["Legal"], "edges": []},
+    "run_id": "run-1",
+}
+BOTTLENECK_KEYS = ("bottlenecks", "stage_delays", "process_graph")
+
+
+@pytest.mark.parametrize("pretty", [True, False])
+def test_spliced_members_match_a_fresh_encoding(tmp_path, pretty):
+    writer = ReportWriter(tmp_path, pretty=pretty)
+    section = writer.write("assignments.json", REPORT["assignments"])
+    group = writer.write_combined("bottlenecks.json", {key: REPORT[key] for key in BOTTLENECK_KEYS})
+
+    spliced = writer.write_combined("full.json", REPORT, {"assignments": section, BOTTLENECK_KEYS: group})
+    encoded = writer.write_combined("plain.json", REPORT)
+
+    assert spliced.read_bytes() == encoded.read_bytes()
+    assert json.loads(spliced.read_bytes()) == REPORT
+
+
+def test_group_that_is_not_consecutive_is_encoded(tmp_path):
+    writer = ReportWriter(tmp_path)
+    group = writer.write_combined("group.json", {"assignments": [], "run_id": "stale"})
+    combined = writer.write_combined("full.json", REPORT, {("assignments", "run_id"): group})
+    assert json.loads(combined.read_bytes()) == REPORT
@@ -0,0 +1,126 @@
+"""RunStore migrations, round trips, pruning and pagination."""
+from __future__ import annotations
+
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from mvp.run_store import SCHEMA_VERSION, RunStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    run_store = RunStore(tmp_path / "runs.db", background=False)
+    yield run_store
+    run_store.close()
+
+
+def _write_v1_db(db_path: Path, rows) -> None:
+    """The original schema, as written before migrations existed (user_version left at 0)."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE agent_runs (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, "
+        "agent_name TEXT NOT NULL, input_json TEXT NOT NULL, output_json TEXT NOT NULL, "
+        "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.executemany(
+        "INSERT INTO agent_runs (run_id, agent_name, input_json, output_json, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(run_id, agent, json.dumps(inputs), json.dumps(outputs), created) for run_id, agent, inputs, outputs, created in rows],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_v1_database_migrates_to_current_schema(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    _write_v1_db(
+        db_path,
+        [
+            ("run-a", "bottleneck_detector", {"n": 1}, {"stages": ["triage"]}, "2024-01-01 10:00:00"),
+            ("run-a", "workflow_recommender", {"n": 2}, {"steps": []}, "2024-01-01 10:00:01"),
+            ("run-b", "bottleneck_detector", {"n": 1}, {"stages": ["triage"]}, "2024-01-02 09:00:00"),
+        ],
+    )
+
+    store = RunStore(db_path, background=False)
+    try:
+        version = sqlite3.connect(db_path).execute("PRAGMA user_version").fetchone()[0]
+        assert version == SCHEMA_VERSION
+        assert store.latest_for_run("run-a", "bottleneck_detector") == [
+            {
+                "run_id": "run-a",
+                "agent_name": "bottleneck_detector",
+                "input": {"n": 1},
+                "output": {"stages": ["triage"]},
+                "created_at": "2024-01-01 10:00:00",
+            }
+        ]
+        assert [run["run_id"] for run in store.list_runs()] == ["run-b", "run-a"]
+        # Identical payloads from both runs are stored once.
+        stats = store.storage_stats()
+        assert stats["agent_rows"] == 3 and stats["blobs"] == 4
+    finally:
+        store.close()
+
+
+def test_latest_for_run_round_trip(store):
+    store.log("run-1", "ai_opportunity", {"tasks": ["T1", "T2"]}, {"scores": {"T1": 0.5}})
+    store.log("run-1", "resource_allocation", {"tasks": []}, {"assignments": []})
+    store.log("run-2", "ai_opportunity", {"tasks": ["T3"]}, {"scores": {}})
+
+    records = store.latest_for_run("run-1")
+    assert [(r["agent_name"], r["input"], r["output"]) for r in records] == [
+        ("resource_allocation", {"tasks": []}, {"assignments": []}),
+        ("ai_opportunity", {"tasks": ["T1", "T2"]}, {"scores": {"T1": 0.5}}),
+    ]
+    assert store.latest_for_run("run-1", "ai_opportunity")[0]["output"] == {"scores": {"T1": 0.5}}
+    assert store.latest_for_run("missing") == []
+
+
+def test_prune_archives_expired_rows(store, tmp_path):
+    for index in range(5):
+        store.log(f"run-{index}", "bottleneck_detector", {"i": index}, {"out": index})
+    store.log("run-4", "workflow_recommender", {"i": 4}, {"out": "kept"})
+
+    archive_dir = tmp_path / "archive"
+    stats = store.prune(2, archive_dir=archive_dir)
+
+    assert stats["pruned_rows"] == 3
+    assert stats["archived_rows"] == 3
+    assert stats["rollup_days"] == 1
+    remaining = [(r.run_id, r.agent_name) for r in store.iter_records()]
+    assert remaining == [("run-4", "workflow_recommender"), ("run-4", "bottleneck_detector"), ("run-3", "bottleneck_detector")]
+    assert {run["run_id"] for run in store.list_runs()} == {"run-3", "run-4"}
+
+    archived = []
+    for archive in sorted(archive_dir.glob("agent_runs-*.jsonl.gz")):
+        with gzip.open(archive, "rt", encoding="utf-8") as handle:
+            archived.extend(json.loads(line) for line in handle)
+    assert [(row["run_id"], row["input"], row["output"]) for row in archived] == [
+        (f"run-{index}", {"i": index}, {"out": index}) for index in range(3)
+    ]
+
+
+def test_query_paginates_without_gaps_or_repeats(store):
+    store.log_many((f"run-{index % 3}", "agent", {"i": index}, {"i": index}) for index in range(11))
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = store.query(cursor=cursor, page_size=4, include_payloads=True)
+        assert len(page.records) <= 4
+        seen.extend(record.input["i"] for record in page.records)
+        pages += 1
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert seen == list(range(10, -1, -1))
+    assert pages == 3
+
+    filtered = store.query(run_id="run-1", page_size=2)
+    assert [record.output["i"] for record in filtered.records] == [10, 7]
+    rest = store.query(run_id="run-1", page_size=2, cursor=filtered.next_cursor)
+    assert [record.output["i"] for record in rest.records] == [4, 1]
+    assert rest.next_cursor is None